@@ -0,0 +1,47 @@
+from .workload import WorkloadConfig
+from .suite import runBenchmark, compare
+import argparse
+import importlib
+import json
+import sys
+
+# Usage: python -m src.goal_processing.benchmarks --goals 16 --cycles 200 --output results.json [--baseline old.json]
+
+
+def _historyClass(name: str) -> type:
+    """
+    @param name: "module:Class" (Ex: "src.goal_processing.execution_history.in_memory_execution_history:InMemoryExecutionHistory").
+    """
+    module, className = name.split(":")
+    return getattr(importlib.import_module(module), className)
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = WorkloadConfig()
+    parser = argparse.ArgumentParser(description="Benchmark of goal processing and explanations over synthetic agents.")
+    for name, value in defaults.toDict().items():
+        parser.add_argument("--" + name, type=type(value), default=value)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--explanations", type=int, default=50)
+    parser.add_argument("--history", action="append", default=None,
+                        help="History backend as module:Class. Can be repeated. The default is InMemoryExecutionHistory.")
+    parser.add_argument("--noMemory", action="store_true", help="Skips the peak memory run.")
+    parser.add_argument("--output", default=None, help="JSON file of the results. The default is the standard output.")
+    parser.add_argument("--baseline", default=None, help="JSON file of previous results, compared with these ones (p50 ratios).")
+    args = parser.parse_args(argv)
+    config = WorkloadConfig(**{name: getattr(args, name) for name in defaults.toDict()})
+    historyClasses = [_historyClass(name) for name in args.history] if args.history else None
+    res = runBenchmark(config, historyClasses, args.cycles, args.explanations, not args.noMemory)
+    if args.baseline:
+        with open(args.baseline) as f:
+            res['comparison'] = compare(json.load(f), res)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(res, f, indent=2)
+    else:
+        json.dump(res, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
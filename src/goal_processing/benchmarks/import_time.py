@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Usage: python -m src.goal_processing.benchmarks.import_time [--runs 5] [--budget 0.2] [--module src.goal_processing.core]
+
+_package = __package__.rsplit(".", 1)[0]  # Ex: "src.goal_processing"
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), *([os.pardir] * (_package.count(".") + 2))))
+
+HEAVY_MODULES = ("deepdiff", "nest_asyncio", "numpy")  # Loaded only when the features that need them are used
+
+_script = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def _importTimes(stderr: str) -> dict[str, tuple[int, int]]:
+    """
+    @return: {module: (self microseconds, cumulative microseconds)}, parsed from the output of "python -X importtime".
+    """
+    res = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        res[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+    return res
+
+
+def measureImportTime(module: str = _package + ".core", runs: int = 5, top: int = 10) -> dict:
+    """
+    Measures the import time of a module in new interpreters (cold start of a process; compiled files are reused).
+    @param module (optional): The imported module. The default is the core of the library.
+    @param runs (optional): Number of interpreters. A first warm-up interpreter (which can compile changed sources) is not counted.
+    @param top (optional): Number of modules reported in 'slowest'.
+    @return: {
+                'module', 'runs',
+                'seconds': {'median', 'min', 'max'} (wall time of the import statement),
+                'heavyModules': heavy optional dependencies loaded by the import (see "HEAVY_MODULES"),
+                'slowest': [(module, self seconds)] of the median run
+             }
+    """
+    script = _script.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    for run in range(runs + 1):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=_root,
+                              capture_output=True, text=True, check=True)
+        if run > 0:
+            samples.append((json.loads(proc.stdout.strip().splitlines()[-1]), _importTimes(proc.stderr)))
+    samples.sort(key=lambda sample: sample[0]['seconds'])
+    result, times = samples[len(samples) // 2]
+    seconds = [sample[0]['seconds'] for sample in samples]
+    slowest = sorted(((name, t[0] / 1e6) for name, t in times.items()), key=lambda item: item[1], reverse=True)
+    return {
+        'module': module,
+        'runs': runs,
+        'seconds': {'median': statistics.median(seconds), 'min': min(seconds), 'max': max(seconds)},
+        'heavyModules': result['heavy'],
+        'slowest': slowest[:top]
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import time (cold start) of the library.")
+    parser.add_argument("--module", default=_package + ".core")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Maximum median seconds. Exits with an error if exceeded, or if heavy modules are loaded.")
+    args = parser.parse_args(argv)
+    res = measureImportTime(args.module, args.runs)
+    json.dump(res, sys.stdout, indent=2)
+    print()
+    if args.budget is not None and (res['seconds']['median'] > args.budget or len(res['heavyModules']) > 0):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from ..core import AbstractExecutionHistory, EntityRegistry, State, runSync
+from ..processors.sequential_processor import SequentialProcessor
+from ..execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from ..explainers.sequential_explainer import SequentialExplainer
+from ..hosts.agent_host import LatencyStats
+from .workload import WorkloadConfig, generateAgent, generateEnvironment
+from collections.abc import Awaitable, Callable
+import platform
+import random
+import time
+import tracemalloc
+
+OPERATIONS = ["deliberateAsync", "processIntentionsAsync", "getAsync", "xHistory", "xNot"]
+
+
+class _Recorder:
+    """
+    Collects the latency (and optionally the peak memory) of each operation of a benchmark run.
+    """
+
+    def __init__(self, traceMemory: bool):
+        self.traceMemory = traceMemory
+        self.stats = {op: LatencyStats(maxSamples=100000) for op in OPERATIONS}
+        self.peakMemory = {op: 0 for op in OPERATIONS}
+
+    async def measure(self, op: str, f: Callable[[], Awaitable]) -> None:
+        if self.traceMemory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        await f()
+        self.stats[op].add(time.perf_counter() - start)
+        if self.traceMemory:
+            self.peakMemory[op] = max(self.peakMemory[op], tracemalloc.get_traced_memory()[1] - before)
+
+
+async def _runAsync(config: WorkloadConfig, historyClass: type[AbstractExecutionHistory], cycles: int, explanations: int, recorder: _Recorder) -> int:
+    """
+    Runs the workload once against a new history.
+    @return: Number of states saved in the history.
+    """
+    rng = random.Random(config.seed)
+    with EntityRegistry("benchmark").scope() as registry:  # The entities of the run are released with it
+        agent = generateAgent(config, "Benchmark agent")
+        history = historyClass()
+        processor = SequentialProcessor(agent, history)
+        for _ in range(cycles):
+            data = generateEnvironment(config, rng)
+            await recorder.measure("deliberateAsync", lambda: processor.deliberateAsync(data))
+            await recorder.measure("processIntentionsAsync", processor.processIntentionsAsync)
+        actions = [action for goal in agent.goals for plan in goal.plans for action in plan.actions]
+        states = await history.getAsync({})
+        now = time.time()
+        for _ in range(explanations):
+            action = rng.choice(actions)
+            await recorder.measure("getAsync", lambda: history.getAsync({'toIds': {action.id}, 'limit': 10}))
+        explainer = SequentialExplainer(history, registry=registry)
+        actionStates = [state for state in states if state.toId in {action.id for action in actions}]
+        for state in rng.sample(actionStates, min(explanations, len(actionStates))):
+            await recorder.measure("xHistory", lambda: _drain(explainer.xHistoryAsync(state)))
+        plans = [(plan, action) for goal in agent.goals for plan in goal.plans for action in plan.actions]
+        for _ in range(explanations):
+            plan, action = rng.choice(plans)
+            possible = State(plan.id, action.id, now, now, {})
+            await recorder.measure("xNot", lambda: _drain(explainer.xNotAsync(possible, maxNodes=1000)))
+        return len(states)
+
+
+async def _drain(generator) -> None:
+    async for _ in generator:
+        pass
+
+
+async def runBenchmarkAsync(config: WorkloadConfig, historyClasses: list[type[AbstractExecutionHistory]] | None = None, cycles: int = 100, explanations: int = 50, traceMemory: bool = True) -> dict:
+    """
+    Drives a SequentialProcessor and a SequentialExplainer over a synthetic agent, against each history backend.
+    Latencies are measured without memory tracing. If "traceMemory" is True, the run is repeated under "tracemalloc"
+    to measure the peak memory allocated by each operation.
+    @param config: A instance of the class WorkloadConfig.
+    @param historyClasses (optional): History backends, created without parameters. The default is InMemoryExecutionHistory.
+    @param cycles (optional): Number of deliberations (each followed by the processing of the intentions).
+    @param explanations (optional): Number of history queries, "xHistory" and "xNot" calls.
+    @param traceMemory (optional): Measures the peak memory of each operation.
+    @return: A JSON-serializable dict. For each backend and operation: latency statistics (seconds), throughput (operations
+             per second) and peak memory (bytes).
+    """
+    if (historyClasses is None):
+        historyClasses = [InMemoryExecutionHistory]
+    res = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.time(),
+        'config': config.toDict(),
+        'cycles': cycles,
+        'explanations': explanations,
+        'results': {}
+    }
+    for historyClass in historyClasses:
+        recorder = _Recorder(False)
+        states = await _runAsync(config, historyClass, cycles, explanations, recorder)
+        if (traceMemory):
+            memoryRecorder = _Recorder(True)
+            tracemalloc.start()
+            try:
+                await _runAsync(config, historyClass, cycles, explanations, memoryRecorder)
+            finally:
+                tracemalloc.stop()
+        operations = {}
+        for op in OPERATIONS:
+            summary = recorder.stats[op].summary()
+            summary['throughput'] = summary['count'] / recorder.stats[op].total if recorder.stats[op].total > 0 else 0.0
+            if (traceMemory):
+                summary['peakMemory'] = memoryRecorder.peakMemory[op]
+            operations[op] = summary
+        res['results'][historyClass.__name__] = {'states': states, 'operations': operations}
+    return res
+
+
+def runBenchmark(config: WorkloadConfig, historyClasses: list[type[AbstractExecutionHistory]] | None = None, cycles: int = 100, explanations: int = 50, traceMemory: bool = True) -> dict:
+    """
+    Wraps the "runBenchmarkAsync" method for synchronous calls.
+    """
+    return runSync(runBenchmarkAsync(config, historyClasses, cycles, explanations, traceMemory))
+
+
+def compare(baseline: dict, current: dict, metric: str = "p50") -> dict:
+    """
+    Compares two results of "runBenchmark" (Ex: of two versions of the library).
+    @param metric (optional): Statistic compared ('mean', 'p50', 'p95', 'p99', 'max', 'throughput' or 'peakMemory').
+    @return: For each backend and operation present in both results: current / baseline (Ex: 0.5 for twice as fast, in latency).
+    """
+    res = {}
+    for backend, results in current['results'].items():
+        if backend not in baseline['results']:
+            continue
+        res[backend] = {}
+        for op, summary in results['operations'].items():
+            old = baseline['results'][backend]['operations'].get(op, {}).get(metric)
+            if old and metric in summary:
+                res[backend][op] = summary[metric] / old
+    return res
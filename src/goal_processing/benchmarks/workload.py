@@ -0,0 +1,108 @@
+from ..core import DataContainer, BeliefReviewFunction, Goal, Conflict, Agent, GoalPromotion, Plan, Action
+import random
+
+
+class WorkloadConfig:
+    """
+    Shape of a synthetic agent (see "generateAgent").
+    """
+
+    def __init__(self, brfs: int = 4, goals: int = 8, promotionDepth: int = 3, plans: int = 2, actionsPerPlan: int = 1, conflicts: int = 2, beliefs: int = 32, beliefDepth: int = 2, passRate: float = 0.7, failureRate: float = 0.1, seed: int = 0):
+        """
+        Constructor:
+        @param brfs (optional): Number of belief revision functions. The sensors of the environment are split between them.
+        @param goals (optional): Number of goals.
+        @param promotionDepth (optional): Number of promotions of each goal (Ex: 3 for active, desired and executive).
+        @param plans (optional): Number of plans of each goal, with priorities 0, 1, ...
+        @param actionsPerPlan (optional): Number of actions of each plan.
+        @param conflicts (optional): Number of conflicts, each one between two random goals.
+        @param beliefs (optional): Number of leaves of the belief tree (and of sensors in the environment).
+        @param beliefDepth (optional): Depth of the belief paths (Ex: 2 for "b3.v17").
+        @param passRate (optional): Probability of each promotion accepting the goal.
+        @param failureRate (optional): Probability of each action raising an error.
+        @param seed (optional): Seed of the agent structure and of the generated environments.
+        """
+        self.brfs = brfs
+        self.goals = goals
+        self.promotionDepth = promotionDepth
+        self.plans = plans
+        self.actionsPerPlan = actionsPerPlan
+        self.conflicts = conflicts
+        self.beliefs = beliefs
+        self.beliefDepth = beliefDepth
+        self.passRate = passRate
+        self.failureRate = failureRate
+        self.seed = seed
+
+    def toDict(self) -> dict:
+        return dict(vars(self))
+
+    def beliefPath(self, index: int) -> str:
+        """
+        @return: The belief path of a leaf of the belief tree. Leaves are spread over "beliefDepth" levels of branches.
+        """
+        branches = max(1, round(self.beliefs ** (1 / self.beliefDepth))) if self.beliefDepth > 1 else 1
+        path = []
+        rest = index
+        for _ in range(self.beliefDepth - 1):
+            path.append("b" + str(rest % branches))
+            rest //= branches
+        path.append("v" + str(index))
+        return ".".join(path)
+
+
+def _brf(paths: list[tuple[str, str]]):
+    async def brf(getEnv, get, getChannel, set):
+        for sensor, path in paths:
+            await set(path, await getEnv(sensor))
+    return brf
+
+
+def _promotion(path: str, passRate: float):
+    async def promotion(get, priority):
+        if (await get(path) < passRate):
+            return priority + 1
+    return promotion
+
+
+def _action(path: str, failureRate: float):
+    async def action(getEnv, get):
+        if (get(path) < failureRate):
+            raise Exception("Synthetic failure")
+    return action
+
+
+def generateAgent(config: WorkloadConfig, desc: str = "") -> Agent:
+    """
+    Creates a synthetic agent.
+    Each sensor of the environment is copied to a belief by a BRF. Each promotion reads a belief and accepts the goal with
+    probability "passRate". Each action reads a belief and fails with probability "failureRate".
+    @param config: A instance of the class WorkloadConfig.
+    @param desc (optional): Description of the agent.
+    """
+    rng = random.Random(config.seed)
+    paths = [config.beliefPath(i) for i in range(config.beliefs)]
+    brfs = []
+    for b in range(config.brfs):
+        sensors = [("s" + str(i), paths[i]) for i in range(b, config.beliefs, config.brfs)]
+        brfs.append(BeliefReviewFunction(f=_brf(sensors), desc="Review sensors " + str(b)))
+    goals = []
+    for g in range(config.goals):
+        promotions = [GoalPromotion(f=_promotion(rng.choice(paths), config.passRate), name="level" + str(p), desc="Promotion " + str(p) + " of goal " + str(g))
+                      for p in range(config.promotionDepth)]
+        plans = [Plan(priority=p, desc="Plan " + str(p) + " of goal " + str(g), actions=[
+            Action(f=_action(rng.choice(paths), config.failureRate), desc="Action " + str(a) + " of plan " + str(p) + " of goal " + str(g))
+            for a in range(config.actionsPerPlan)]) for p in range(config.plans)]
+        goals.append(Goal(promotions=promotions, plans=plans, desc="Goal " + str(g)))
+    conflicts = []
+    if (config.goals > 1):
+        for _ in range(config.conflicts):
+            conflicts.append(Conflict(goals=rng.sample(goals, 2)))
+    return Agent(beliefs=DataContainer("beliefs"), channel=DataContainer("channel"), brfs=brfs, goals=goals, conflicts=conflicts, desc=desc)
+
+
+def generateEnvironment(config: WorkloadConfig, rng: random.Random) -> dict:
+    """
+    @return: Environment data for a deliberation: a random value between 0 and 1 for each sensor.
+    """
+    return {"s" + str(i): rng.random() for i in range(config.beliefs)}
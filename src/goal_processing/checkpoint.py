@@ -0,0 +1,164 @@
+from .core import hasDiff
+from typing import Any
+import os
+import pickle
+import struct
+import zlib
+
+# A checkpoint file is a sequence of records: a full snapshot, followed by the deltas of the following checkpoints.
+# Each record is a compressed pickle, preceded by its length (4 bytes).
+
+_header = struct.Struct("<I")
+
+
+def _flatten(snapshot: dict, prefix: tuple = (), res: dict | None = None) -> dict[tuple, Any]:
+    """
+    @return: The leaves of a snapshot (values that are not non-empty dicts), by path (tuple of keys).
+    """
+    if res is None:
+        res = {}
+    for key, value in snapshot.items():
+        if isinstance(value, dict) and len(value) > 0:
+            _flatten(value, prefix + (key,), res)
+        else:
+            res[prefix + (key,)] = value
+    return res
+
+
+def _unflatten(leaves: dict[tuple, Any]) -> dict:
+    res: dict = {}
+    for path, value in leaves.items():
+        d = res
+        for key in path[:-1]:
+            d = d.setdefault(key, {})
+        d[path[-1]] = value
+    return res
+
+
+def _encode(record: tuple) -> bytes:
+    data = zlib.compress(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+    return _header.pack(len(data)) + data
+
+
+def _records(path: str) -> tuple[list[tuple], int]:
+    """
+    @return: The records of a checkpoint file, and the offset of the end of the last complete record.
+             An incomplete last record (Ex: interrupted write) is ignored.
+    """
+    res = []
+    with open(path, "rb") as f:
+        content = f.read()
+    offset = 0
+    while offset + _header.size <= len(content):
+        size, = _header.unpack_from(content, offset)
+        offset += _header.size
+        if offset + size > len(content):
+            offset -= _header.size
+            break
+        res.append(pickle.loads(zlib.decompress(content[offset:offset + size])))
+        offset += size
+    return res, offset
+
+
+def _writeFull(path: str, leaves: dict[tuple, Any]) -> int:
+    data = _encode(("full", leaves))
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as f:
+        f.write(data)
+    os.replace(tmpPath, path)  # Atomic: a crash leaves the previous checkpoint
+    return len(data)
+
+
+def saveSnapshot(snapshot: dict, path: str) -> int:
+    """
+    Writes a snapshot (Ex: "processor.snapshot()") to a compact binary file.
+    @return: The size of the file, in bytes.
+    """
+    return _writeFull(path, _flatten(snapshot))
+
+
+def loadSnapshot(path: str) -> dict:
+    """
+    @return: The snapshot of a file written by "saveSnapshot" or by a Checkpointer (the full snapshot with its deltas applied).
+    """
+    return _unflatten(_loadLeaves(path)[0])
+
+
+def _loadLeaves(path: str) -> tuple[dict[tuple, Any], int, int]:
+    """
+    @return: The leaves of the snapshot of a file, the number of deltas after its full snapshot, and the size of its complete records.
+    """
+    leaves: dict[tuple, Any] = {}
+    deltas = 0
+    records, end = _records(path)
+    for record in records:
+        if record[0] == "full":
+            leaves = record[1]
+            deltas = 0
+        else:
+            deltas += 1
+            _, changed, removed = record
+            for key in removed:
+                leaves.pop(key, None)
+            leaves.update(changed)
+    return leaves, deltas, end
+
+
+class Checkpointer:
+    """
+    Incremental checkpoints of a processor (or of a FleetProcessor) in a file.
+    The first checkpoint writes the full snapshot. The following ones append only the parts of the snapshot that changed
+    (Ex: changed beliefs, new attributes, the goal queue), and every "fullEvery" checkpoints the file is compacted into a full snapshot.
+    Use: "checkpointer.checkpoint()" between processing cycles, and "checkpointer.restore()" after a restart.
+    """
+
+    def __init__(self, processor: Any, path: str, fullEvery: int = 100):
+        """
+        Constructor:
+        @param processor: A instance of a subclass of AbstractProcessor, or a FleetProcessor.
+        @param path: Checkpoint file.
+        @param fullEvery (optional): Number of incremental checkpoints between full snapshots.
+        """
+        self.processor = processor
+        self.path = path
+        self.fullEvery = fullEvery
+        self._leaves: dict[tuple, Any] | None = None  # Last written snapshot
+        self._deltas = 0
+
+    def checkpoint(self) -> int:
+        """
+        Writes a checkpoint of the processor.
+        @return: The number of bytes written.
+        """
+        leaves = _flatten(self.processor.snapshot())
+        if self._leaves is None or self._deltas >= self.fullEvery:
+            size = _writeFull(self.path, leaves)
+            self._deltas = 0
+        else:
+            changed = {key: value for key, value in leaves.items()
+                       if key not in self._leaves or hasDiff(self._leaves[key], value)}
+            removed = [key for key in self._leaves if key not in leaves]
+            if len(changed) == 0 and len(removed) == 0:
+                return 0
+            data = _encode(("delta", changed, removed))
+            with open(self.path, "ab") as f:
+                f.write(data)
+            size = len(data)
+            self._deltas += 1
+        self._leaves = leaves
+        return size
+
+    def restore(self) -> bool:
+        """
+        Restores the processor from the checkpoint file, if it exists. The following checkpoints are deltas of the restored state.
+        @return: True if the processor was restored.
+        """
+        if not os.path.exists(self.path):
+            return False
+        leaves, deltas, end = _loadLeaves(self.path)
+        if end < os.path.getsize(self.path):  # Following deltas are appended after the last complete record
+            os.truncate(self.path, end)
+        self.processor.restore(_unflatten(leaves))
+        self._leaves = leaves
+        self._deltas = deltas
+        return True
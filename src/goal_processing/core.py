@@ -1,35 +1,434 @@
-import uuid
+import itertools
+import os
 import copy
 import time
-from collections.abc import Awaitable
+from collections.abc import Awaitable, Callable
 from typing import Self, Any, Iterator, AsyncIterator
 from abc import ABC, abstractmethod
-from deepdiff import DeepDiff
 import asyncio
-import nest_asyncio
-from threading import Timer
-nest_asyncio.apply()
+import bisect
+import heapq
+import weakref
+import contextlib
+import contextvars
+from threading import Timer, Thread, Lock, Event, current_thread
+import threading
+from .rules import Expression, Priority, RuleNetwork
+
+EntityId = int | str  # Generated ids are integers (see "Entity.genId"). Ids given by users can be strings.
+
+_syncLoops = threading.local()
+
+
+async def _awaitSync(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+def runSync(coro: Awaitable) -> Any:
+    """
+    Runs a coroutine from synchronous code (the "Async" method wrappers).
+    The event loop is created once per thread and reused by the following calls, instead of a new loop per call.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop = getattr(_syncLoops, 'loop', None)
+        if loop is None or loop.is_closed():
+            loop = _syncLoops.loop = asyncio.new_event_loop()
+            weakref.finalize(current_thread(), loop.close)
+        return loop.run_until_complete(loop.create_task(_awaitSync(coro)))
+    if _nestedLoops:
+        return asyncio.run(coro)  # Called inside a running loop (nested, see "enableNestedLoops")
+    return _runInThread(coro)
+
+
+def _runInThread(coro: Awaitable) -> Any:
+    # Called inside a running loop: the coroutine runs in the loop of another thread, with the context of the caller
+    context = contextvars.copy_context()
+    res: dict[str, Any] = {}
+
+    def run() -> None:
+        try:
+            res['value'] = context.run(runSync, coro)
+        except BaseException as e:
+            res['error'] = e
+    thread = Thread(target=run)
+    thread.start()
+    thread.join()
+    if 'error' in res:
+        raise res['error']
+    return res['value']
+
+
+_nestedLoops = False
+
+
+def enableNestedLoops() -> None:
+    """
+    Patches asyncio (with the "nest_asyncio" package) so that synchronous wrappers called inside a running event loop
+    run their coroutines in that loop (nested), instead of in the loop of another thread.
+    Needed when those coroutines use objects bound to the running loop (Ex: in Jupyter notebooks).
+    The patch is global to the process, so it is only applied when requested.
+    """
+    global _nestedLoops
+    if not _nestedLoops:
+        import nest_asyncio
+        nest_asyncio.apply()
+        _nestedLoops = True
+
+
+_plainTypes = (str, int, float, bool, bytes, type(None))
+
+
+def _plainEqual(a: Any, b: Any) -> bool | None:
+    """
+    Compares plain data (atoms, dicts, lists and tuples) with the types of the values, like DeepDiff.
+    @return: None if the values contain other objects.
+    """
+    t = type(a)
+    if t is not type(b):
+        return False
+    if t in _plainTypes:
+        return a == b
+    if t is dict:
+        if len(a) != len(b):
+            return False
+        for key, value in a.items():
+            if key not in b:
+                return False
+            equal = _plainEqual(value, b[key])
+            if equal is not True:
+                return equal
+        return True
+    if t is list or t is tuple:
+        if len(a) != len(b):
+            return False
+        for x, y in zip(a, b):
+            equal = _plainEqual(x, y)
+            if equal is not True:
+                return equal
+        return True
+    return None
+
+
+def hasDiff(a: Any, b: Any) -> bool:
+    """
+    @return: True if two values differ (values or types).
+             Plain data is compared directly. Other objects are compared with DeepDiff, which is only imported when needed.
+    """
+    equal = _plainEqual(a, b)
+    if equal is not None:
+        return not equal
+    from deepdiff import DeepDiff
+    return len(DeepDiff(a, b)) > 0
+
+
+def iterSync(gen: AsyncIterator) -> Iterator:
+    """
+    Iterates an asynchronous generator from synchronous code, in the reused event loop of the thread (see "runSync").
+    """
+    while True:
+        try:
+            yield runSync(gen.__anext__())
+        except StopAsyncIteration:
+            break
+
+
+class EntityRegistry:
+    """
+    Resolves entity ids to entities. Each registry is a scope (Ex: an agent or a tenant of a service):
+    entities created inside "with registry.scope():" are registered in it, instead of the default registry ("Entity.byId").
+    By default, entities are weakly referenced, so they are released when nothing else uses them (Ex: the entities of a removed agent).
+    Each entity also receives an integer handle, unique in the registry.
+    """
+
+    def __init__(self, name: str = "", weak: bool = True):
+        """
+        Constructor:
+        @param name (optional): Registry name. Ex: the agent or tenant name.
+        @param weak (optional): If True, the registry does not keep its entities alive.
+        """
+        self.name = name
+        self.weak = weak
+        self._byId: dict[str, Any] = {}  # Id -> entity (or weak reference to it)
+        self._handles: dict[str, int] = {}  # Id -> handle
+        self._byHandle: dict[int, EntityId] = {}  # Handle -> id
+        self._nextHandle = 0
+        self._relationListeners: list[Any] = []  # Weak references to the listeners (see "addRelationListener")
+
+    def add(self, entity: "Entity") -> int:
+        """
+        Registers an entity. An entity can be registered in several registries.
+        @return: The integer handle of the entity in this registry.
+        """
+        id = entity.id
+        if self.weak:
+            self._byId[id] = weakref.ref(
+                entity, lambda ref, id=id: self._release(id, ref))
+        else:
+            self._byId[id] = entity
+        if not id in self._handles:
+            self._handles[id] = self._nextHandle
+            self._byHandle[self._nextHandle] = id
+            self._nextHandle += 1
+        return self._handles[id]
+
+    def _release(self, id: EntityId, ref: Any) -> None:
+        if self._byId.get(id) is ref:  # Not replaced by another entity with the same id
+            self.remove(id)
+
+    def remove(self, id: EntityId) -> None:
+        self._byId.pop(id, None)
+        handle = self._handles.pop(id, None)
+        if handle is not None:
+            self._byHandle.pop(handle, None)
+
+    def clear(self) -> None:
+        self._byId.clear()
+        self._handles.clear()
+        self._byHandle.clear()
+
+    def get(self, id: EntityId, default: Any = None) -> Any:
+        entity = self._byId.get(id)
+        if entity is not None and self.weak:
+            entity = entity()
+        return entity if entity is not None else default
+
+    def addRelationListener(self, listener: Callable[["Entity", "Attribute"], None]) -> None:
+        """
+        Registers a function called whenever an entity of the registry is related to a new Attribute (see "DataContainer.relate").
+        The listener is weakly referenced (Ex: an explainer does not stay alive because of the registry).
+        """
+        self._relationListeners.append(weakref.WeakMethod(listener) if hasattr(
+            listener, '__self__') else weakref.ref(listener))
+
+    def _notifyRelation(self, entity: "Entity", attr: "Attribute") -> None:
+        alive = []
+        for ref in self._relationListeners:
+            listener = ref()
+            if listener is not None:
+                listener(entity, attr)
+                alive.append(ref)
+        if len(alive) != len(self._relationListeners):
+            self._relationListeners = alive
+
+    def handle(self, id: EntityId) -> int:
+        return self._handles[id]
+
+    def byHandle(self, handle: int) -> "Entity | None":
+        return self.get(self._byHandle.get(handle, ""))
+
+    @contextlib.contextmanager
+    def scope(self) -> Iterator[Self]:
+        """
+        Entities created inside "with registry.scope():" are registered in this registry.
+        """
+        token = _currentRegistry.set(self)
+        try:
+            yield self
+        finally:
+            _currentRegistry.reset(token)
+
+    def __getitem__(self, id: EntityId) -> "Entity":
+        entity = self.get(id)
+        if entity is None:
+            raise KeyError(id)
+        return entity
+
+    def __setitem__(self, id: EntityId, entity: "Entity") -> None:
+        self.add(entity)
+
+    def __delitem__(self, id: EntityId) -> None:
+        self.remove(id)
+
+    def __contains__(self, id: EntityId) -> bool:
+        return self.get(id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([id for id in list(self._byId) if id in self])
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def __copy__(self) -> Self:  # Copies of entities share their registry
+        return self
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self
+
+
+# Ids are integers: the node prefix (high bits) identifies the process, and a counter the entity in the process.
+# Integers are cheaper than strings to generate, hash, compare and store in every State.
+# Ids given by users can still be strings.
+# Random nodes are 64 bits wide, so that processes writing to the same persistent history (shards, restarts) do not draw the same node.
+_idNodeBits = 64
+_idCounterBits = 40
+_idNode = 0
+_idCounter = itertools.count(1)
+
+
+def setIdNode(node: int | None = None) -> None:
+    """
+    Sets the prefix of the ids generated in this process ("Entity.genId"). Generated ids are unique among processes with different nodes.
+    @param node (optional): A number between 0 and 2^64 - 1. If not specified, a random node is chosen
+                            (from the random source of the operating system: not affected by "random.seed").
+    """
+    global _idNode, _idCounter
+    if node is None:
+        node = int.from_bytes(os.urandom(_idNodeBits // 8), "big")
+    _idNode = (node & ((1 << _idNodeBits) - 1)) << _idCounterBits
+    _idCounter = itertools.count(1)
+
+
+def _reserveIds(ids: Iterator[EntityId]) -> None:
+    """
+    Moves the counter of the ids generated in this process past the given ids that have the node of this process
+    (Ex: ids restored from a snapshot taken by a process with the same fixed node), so that new ids do not repeat them.
+    """
+    global _idCounter
+    node = _idNode >> _idCounterBits
+    last = 0
+    for id in ids:
+        if isinstance(id, int) and id >> _idCounterBits == node:
+            last = max(last, id & ((1 << _idCounterBits) - 1))
+    if last > 0:
+        _idCounter = itertools.count(max(last + 1, next(_idCounter)))
+
+
+setIdNode()
+os.register_at_fork(after_in_child=setIdNode)  # A forked process (Ex: a shard) has its own node
+
+
+_defaultRegistry = EntityRegistry("default")
+_currentRegistry: contextvars.ContextVar = contextvars.ContextVar(
+    "currentRegistry", default=_defaultRegistry)
+
+
+def currentRegistry() -> EntityRegistry:
+    """
+    @return: The registry of the current scope ("EntityRegistry.scope"), or the default registry ("Entity.byId").
+    """
+    return _currentRegistry.get()
+
+
+def resolveEntity(id: EntityId, registry: EntityRegistry | None = None) -> "Entity | None":
+    """
+    Looks up an entity in the given registry, in the registry of the current scope and in the default registry, in that order.
+    """
+    if registry is not None:
+        entity = registry.get(id)
+        if entity is not None:
+            return entity
+    entity = _currentRegistry.get().get(id)
+    if entity is None:
+        entity = _defaultRegistry.get(id)
+    return entity
+
+
+class Clock:
+    """
+    Source of the times of the states (and of goal deadlines).
+    Monotonic (not affected by changes of the system clock), anchored to the wall clock when it is created.
+    Processors use their own clock (see "AbstractProcessor"). Other code uses the clock of the current scope ("currentClock").
+    """
+
+    def __init__(self):
+        self._wallAnchor = time.time()
+        self._monotonicAnchor = time.monotonic()
+
+    def now(self) -> float:
+        """
+        @return: Seconds since the epoch.
+        """
+        return self._wallAnchor + (time.monotonic() - self._monotonicAnchor)
+
+    def peek(self) -> float:
+        """
+        Reads the time without side effects (a VirtualClock is not advanced). Used for times that are not saved in states.
+        """
+        return self.now()
+
+    @contextlib.contextmanager
+    def scope(self) -> Iterator[Self]:
+        """
+        Inside "with clock.scope():", "currentClock" returns this clock.
+        """
+        token = _currentClock.set(self)
+        try:
+            yield self
+        finally:
+            _currentClock.reset(token)
+
+
+class VirtualClock(Clock):
+    """
+    Clock that only moves when it is told to (Ex: replays, see the module "replay").
+    Each reading advances it by a tiny "step", so that states are strictly ordered and every run produces the same times.
+    """
+
+    def __init__(self, start: float = 0, step: float = 1e-6):
+        """
+        Constructor:
+        @param start (optional): Initial time (seconds since the epoch).
+        @param step (optional): Seconds added after each reading.
+        """
+        self._time = start
+        self.step = step
+
+    def now(self) -> float:
+        res = self._time
+        self._time += self.step
+        return res
+
+    def peek(self) -> float:
+        return self._time
+
+    def set(self, t: float) -> None:
+        """
+        Moves the clock to "t" (never backwards).
+        """
+        if t > self._time:
+            self._time = t
+
+    def advance(self, seconds: float) -> None:
+        self._time += seconds
+
+
+_defaultClock = Clock()
+_currentClock: contextvars.ContextVar = contextvars.ContextVar(
+    "currentClock", default=_defaultClock)
+
+
+def currentClock() -> Clock:
+    """
+    @return: The clock of the current scope ("Clock.scope"), or the default (real) clock.
+    """
+    return _currentClock.get()
 
 
 class Entity (ABC):
     """
     Parent class of classes that represent goal processing entities.
     """
-    byId: dict[str, Self] = {}
+    byId: EntityRegistry = _defaultRegistry  # Default registry, used outside of registry scopes
 
-    def __init__(self, desc: str = "", id: str = ""):
+    def __init__(self, desc: str = "", id: EntityId = ""):
         self.desc = desc
         if (id == ""):
             id = Entity.genId()
         self.id = id
-        Entity.byId[id] = self
+        self.registry: EntityRegistry = _currentRegistry.get()
+        self.registry.add(self)
 
     def className(self):
         return self.__class__.__name__ + (": " + self.name if 'name' in self.__dict__ else "")
 
     @staticmethod
-    def genId() -> str:
-        return uuid.uuid4().hex
+    def genId() -> int:
+        """
+        @return: A new id, unique in the process and (with a high probability) among processes. See "setIdNode".
+        """
+        return _idNode | next(_idCounter)
 
     def __eq__(self, other: Self):
         return self.id == other.id
@@ -40,7 +439,7 @@ class State:
     This class represents a state value, for a given entity at a given time.
     """
 
-    def __init__(self, fromId: str = "", toId: str = "", time: float = 0, activationTime: float = 0, value: dict = {}, id: str = Entity.genId()):
+    def __init__(self, fromId: EntityId = "", toId: EntityId = "", time: float = 0, activationTime: float = 0, value: dict = {}, id: EntityId = "", cycleId: EntityId = "", parentIds: tuple[EntityId, ...] | None = None):
         """
         Constructor:
         @param fromId: Entity that had the change of state.
@@ -49,13 +448,18 @@ class State:
 
         @param activationTime: There is where the change of state started.
         @param time: Has the state change completed.
+        @param cycleId: Processing cycle (deliberation or goal execution) of the state. Set by history transactions.
+        @param parentIds: Ids of the states that caused this state, recorded when it is written (provenance).
+                          None if unknown: explainers then search the history for the causes.
         """
         self.fromId = fromId
         self.toId = toId
         self.time = time
         self.activationTime = activationTime
         self.value = value
-        self.id = id
+        self.id = id if id != "" else Entity.genId()
+        self.cycleId = cycleId
+        self.parentIds = parentIds
 
     def __str__(self) -> str:
         """
@@ -64,15 +468,22 @@ class State:
         """
         return str({
             'id': self.id,
-            'from': Entity.byId[self.fromId].className() if self.fromId in Entity.byId else "",
+            'from': self._className(self.fromId),
             'fromId': self.fromId,
-            'to': Entity.byId[self.toId].className() if self.toId in Entity.byId else "",
+            'to': self._className(self.toId),
             'toId': self.toId,
             'time': self.time,
             'activationTime': self.activationTime,
-            'value': self.value
+            'value': self.value,
+            'cycleId': self.cycleId,
+            'parentIds': self.parentIds
         })
 
+    @staticmethod
+    def _className(id: EntityId) -> str:
+        entity = resolveEntity(id)
+        return entity.className() if entity is not None else ""
+
     def __lt__(self, other: Self) -> bool:  # reverse order
         """
         Important for sorting algorithms.
@@ -86,7 +497,7 @@ class Attribute(Entity):
     This class represents a Enviroment Attribute or Belief.
     """
 
-    def __init__(self, name: str, desc: str = "", id: str = ""):
+    def __init__(self, name: str, desc: str = "", id: EntityId = ""):
         """
         Constructor:
         @param name: A string. Enviroment Attribute name.
@@ -95,13 +506,27 @@ class Attribute(Entity):
         """
         super().__init__(desc, id)
         self.name = name
-        self.relations: list[Entity] = list()
+        # Weak, so that a shared container (Ex: the channel) does not keep the entities of removed agents alive
+        self._relations: list[weakref.ref] = list()
+
+    @property
+    def relations(self) -> list[Entity]:
+        """
+        Entities that read or write the attribute.
+        """
+        return [entity for entity in (ref() for ref in self._relations) if entity is not None]
+
+    def addRelation(self, entity: Entity) -> None:
+        self._relations = [ref for ref in self._relations if ref() is not None]
+        self._relations.append(weakref.ref(entity))
 
 
 class AbstractExecutionHistory(ABC):
     """
     This class represents a way to save inference states.
     """
+    readOnly = False  # True for views that cannot save states (Ex: ShardedExecutionHistory). Processors do not accept them
+
     @abstractmethod
     def __init__(self, params: dict = {}):
         """
@@ -134,6 +559,7 @@ class AbstractExecutionHistory(ABC):
                             'maxTime': Upper limit for time,
                             'minActivationTime': Lower limit for activation time,
                             'maxActivationTime': Upper limit for activation time,
+                            'cycleId': Processing cycle of the states,
                             'limit': Maximum number of states to return,
                             'order': 'asc' or 'desc'. If history is a time-ordered vector, traverse the vector from beginning to end (asc) or end to beginning (desc)
                             ...
@@ -141,17 +567,145 @@ class AbstractExecutionHistory(ABC):
         """
         pass
 
+    async def getLatestAsync(self, fromIds: set[EntityId], toIds: set[EntityId], maxTime: float, minTime: float | None = None) -> dict[EntityId, State]:
+        """
+        Returns, for each of the "fromIds", its most recent state to one of the "toIds", at or before "maxTime" (and at or after "minTime").
+        Used by the explainers to find the causes of a state in a single query.
+        Implementations should override it with an indexed lookup. The default implementation makes a single "getAsync" call.
+        @return: A dict: fromId -> State. fromIds without such a state are not included.
+        """
+        filters = {'fromIds': set(fromIds), 'toIds': set(toIds),
+                   'maxTime': maxTime, 'order': 'desc'}
+        if minTime is not None:
+            filters['minTime'] = minTime
+        res: dict[EntityId, State] = {}
+        for state in await self.getAsync(filters):
+            if not state.fromId in res:
+                res[state.fromId] = state
+                if len(res) == len(filters['fromIds']):
+                    break
+        return res
+
+    async def getByIdsAsync(self, ids: tuple[EntityId, ...]) -> list[State]:
+        """
+        Returns the states with the given ids (Ex: the "parentIds" of a state). Missing ids are ignored.
+        Implementations should override it with an indexed lookup. The default implementation uses the 'id' filter of "getAsync".
+        """
+        res: list[State] = []
+        for id in ids:
+            res.extend(await self.getAsync({'id': id, 'limit': 1}))
+        return res
+
+    async def addManyAsync(self, states: list[State]) -> None:
+        """
+        Save several states at once (Ex: the states of a transaction).
+        Implementations should override it to save all states in a single write.
+        @param states: List of instances of class State.
+        """
+        for state in states:
+            await self.addAsync(state)
+
+    def transaction(self, cycleId: EntityId = "") -> "HistoryTransaction":
+        """
+        Opens a transaction. Use: "async with history.transaction() as hist: await hist.addAsync(...)".
+        @param cycleId (optional): Id shared by the states of the transaction. If not specified, one will be generated.
+        """
+        return HistoryTransaction(self, cycleId)
+
     def add(self, state: State) -> None:
         """
         Wraps the "addAsync" method for synchronous calls
         """
-        return asyncio.run(self.addAsync(state))
+        return runSync(self.addAsync(state))
 
     def get(self, filters: dict) -> list[State]:
         """
         Wraps the "getAsync" method for synchronous calls
         """
-        return asyncio.run(self.getAsync(filters))
+        return runSync(self.getAsync(filters))
+
+    def getLatest(self, fromIds: set[EntityId], toIds: set[EntityId], maxTime: float, minTime: float | None = None) -> dict[EntityId, State]:
+        """
+        Wraps the "getLatestAsync" method for synchronous calls
+        """
+        return runSync(self.getLatestAsync(fromIds, toIds, maxTime, minTime))
+
+
+_currentTransaction: contextvars.ContextVar = contextvars.ContextVar(
+    "currentTransaction", default=None)
+
+
+class HistoryTransaction(AbstractExecutionHistory):
+    """
+    Buffers the states of a processing cycle and saves them in a single batch ("addManyAsync"), with a shared cycle id.
+    Readers of the history do not see a half-finished cycle: states are only visible after the commit.
+    While the transaction is open (in "async with"), "currentHistory" returns it.
+    """
+
+    def __init__(self, history: AbstractExecutionHistory, cycleId: EntityId = ""):
+        """
+        Constructor:
+        @param history: The executionHistory where the states are saved on commit.
+        @param cycleId (optional): Id shared by the states of the transaction. If not specified, one will be generated.
+        """
+        self.history = history
+        self.cycleId = cycleId if cycleId != "" else Entity.genId()
+        self._states: list[State] = []
+        self._token = None
+
+    async def addAsync(self, state: State) -> None:
+        state.cycleId = self.cycleId
+        self._states.append(state)
+
+    async def getAsync(self, filters: dict) -> list[State]:
+        """
+        Reads committed states only.
+        """
+        return await self.history.getAsync(filters)
+
+    async def getLatestAsync(self, fromIds: set[EntityId], toIds: set[EntityId], maxTime: float, minTime: float | None = None) -> dict[EntityId, State]:
+        return await self.history.getLatestAsync(fromIds, toIds, maxTime, minTime)
+
+    async def getByIdsAsync(self, ids: tuple[EntityId, ...]) -> list[State]:
+        return await self.history.getByIdsAsync(ids)
+
+    async def commitAsync(self) -> None:
+        states = self._states
+        self._states = []
+        if len(states) > 0:
+            await self.history.addManyAsync(states)
+
+    def rollback(self) -> None:
+        self._states = []
+
+    async def __aenter__(self) -> Self:
+        self._token = _currentTransaction.set(self)
+        return self
+
+    async def __aexit__(self, excType, exc, excTb) -> None:
+        _currentTransaction.reset(self._token)
+        if excType is None:
+            await self.commitAsync()
+        else:
+            self.rollback()
+
+
+def currentCycleId() -> EntityId:
+    """
+    @return: The cycle id of the open transaction in the current context, or "" if there is none.
+    """
+    transaction = _currentTransaction.get()
+    return transaction.cycleId if transaction is not None else ""
+
+
+def currentHistory(history: AbstractExecutionHistory) -> AbstractExecutionHistory:
+    """
+    @return: The open transaction of the history in the current context, or the history itself.
+    """
+    transaction = _currentTransaction.get()
+    if transaction is not None and transaction.history is history:
+        return transaction
+    return history
 
 
 class DataContainer:
@@ -159,14 +713,22 @@ class DataContainer:
     Agent's beliefs/enviroment
     """
 
-    def __init__(self, name: str = "", data: dict = {}):
+    def __init__(self, name: str = "", data: dict | None = None, registry: EntityRegistry | None = None):
         """
         Constructor:
         @param data: Agent's initial beliefs/enviroment, in a dict structure.
+        @param registry (optional): Registry used to resolve the ids received by "createGet"/"createSet".
+                                    The default is the registry of the current scope.
         """
-        self.data = data
+        self.data = data if data is not None else {}  # Each container has its own dict
         self.name = name
-        self.attrs: dict[str, Entity] = {}
+        self.registry = registry if registry is not None else currentRegistry()
+        # Attribute entities by name. Weak, so that the attributes of removed agents (Ex: in a shared channel) are released:
+        # they are kept alive by the entities that read or write them
+        self.attrs: weakref.WeakValueDictionary[str, Attribute] = weakref.WeakValueDictionary()
+        # Functions called with the changed path after each change (Ex: RuleNetwork)
+        self.listeners: list[Callable[[str], None]] = []
+        self._lastWrites: dict[EntityId, EntityId] = {}  # Attribute id -> id of the state of its last write ("createSet")
 
     def set(self, path: str, value: Any) -> None:
         """
@@ -177,9 +739,10 @@ class DataContainer:
         """
         hasChange = False
         if path == "":
-            if (len(DeepDiff(self.data, value)) > 0):
+            if (hasDiff(self.data, value)):
                 hasChange = True
                 self.data = copy.deepcopy(value)
+                self._notify(path)
             return hasChange
         else:
             d = self.data
@@ -191,14 +754,38 @@ class DataContainer:
                     d[key] = {}
                 d = d[key]
             if (keys[-1] in d):
-                if (len(DeepDiff(d[keys[-1]], value)) > 0):
+                if (hasDiff(d[keys[-1]], value)):
                     hasChange = True
             else:
                 hasChange = True
             if (hasChange):
                 d[keys[-1]] = copy.deepcopy(value)
+                self._notify(path)
             return hasChange
 
+    def _notify(self, path: str) -> None:
+        for listener in self.listeners:
+            listener(path)
+
+    def relate(self, path: str, entity: Entity) -> Attribute:
+        """
+        Returns the Attribute entity of a path, related to the entity that reads or writes it.
+        These relations are the possible causes used by the explainers.
+        @param path: Path of beliefs/enviroment. Ex; 'attr1.subAttr2'.
+        @param entity: Entity that reads or writes the path (Ex: a BeliefReviewFunction, a GoalPromotion).
+        """
+        attrName = self.name + "." + path
+        attr = self.attrs.get(attrName)
+        if (attr is None):
+            attr = Attribute(name=attrName)
+            self.attrs[attrName] = attr
+        if (not attr in entity.attrs):
+            entity.attrs.append(attr)
+            attr.addRelation(entity)
+            entity.registry.add(attr)  # Resolvable in the scope of the entity
+            entity.registry._notifyRelation(entity, attr)
+        return attr
+
     def get(self, path: str) -> Any:
         """
         @param path: Path of beliefs/enviroment. Ex; 'attr1.subAttr2'.
@@ -213,41 +800,85 @@ class DataContainer:
                 d = d[key]
         return d
 
-    def createSet(self, hist: AbstractExecutionHistory, fromId: str) -> Awaitable:
+    def createSet(self, hist: AbstractExecutionHistory, fromId: EntityId, reads: dict[EntityId, EntityId] | None = None) -> Awaitable:
         """
         Creates the asynchronous function "list". This function is used to change beliefs/env.
         @param hist: AbstractExecutionHistory implementation.
+        @param reads (optional): Read states of the writer (see "createGet"), saved as the causes (parentIds) of its writes.
         """
         async def set(path: str, value: Any) -> Any:
             hasChange = self.set(path, value)
             if hasChange:
-                attrName = self.name + "." + path
-                if (not attrName in self.attrs):
-                    self.attrs[attrName] = Attribute(name=attrName)
-                if (not self.attrs[attrName] in Entity.byId[fromId].attrs):
-                    Entity.byId[fromId].attrs.append(self.attrs[attrName])
-                    self.attrs[attrName].relations.append(Entity.byId[fromId])
-                await hist.addAsync(State(fromId, self.attrs[attrName].id, time.time(), time.time(), copy.deepcopy(value)))
+                attr = self.relate(path, resolveEntity(fromId, self.registry))
+                now = currentClock().now()
+                state = State(fromId, attr.id, now, now, copy.deepcopy(value),
+                              parentIds=tuple(reads.values()) if reads is not None else None)
+                self._lastWrites[attr.id] = state.id
+                await hist.addAsync(state)
         return set
 
-    def createGet(self, hist: AbstractExecutionHistory, toId: str, lastVal: Any = None) -> Awaitable:
+    def createGet(self, hist: AbstractExecutionHistory, toId: EntityId, lastVal: Any = None, reads: dict[EntityId, EntityId] | None = None, context: dict[str, Any] | None = None) -> Awaitable:
         """
         Creates the asynchronous function "get". This function is used to access beliefs/env.
         @param hist: AbstractExecutionHistory implementation.
+        @param reads (optional): A dict where the id of the last saved read state of each attribute is kept (attribute id -> state id).
+        @param context (optional): A dict where a copy of the value read of each path is kept (path -> value).
         """
         async def get(path: str) -> Any:
-            attrName = self.name + "." + path
-            if (not attrName in self.attrs):
-                self.attrs[attrName] = Attribute(name=attrName)
-            if (not self.attrs[attrName] in Entity.byId[toId].attrs):
-                Entity.byId[toId].attrs.append(self.attrs[attrName])
-                self.attrs[attrName].relations.append(Entity.byId[toId])
+            attr = self.relate(path, resolveEntity(toId, self.registry))
             value = self.get(path)
-            if (len(DeepDiff(value, lastVal)) > 0):
-                await hist.addAsync(State(self.attrs[attrName].id, toId, time.time(), time.time(), copy.deepcopy(value)))
+            if context is not None:
+                context[path] = copy.deepcopy(value)
+            if (hasDiff(value, lastVal)):
+                now = currentClock().now()
+                state = State(attr.id, toId, now, now, copy.deepcopy(value),
+                              parentIds=self.lastWriteOf(attr.id))
+                if reads is not None:
+                    reads[attr.id] = state.id
+                await hist.addAsync(state)
             return value
         return get
 
+    def lastWriteOf(self, attrId: EntityId) -> tuple[EntityId, ...] | None:
+        """
+        @return: The id of the state of the last write of an attribute (in a tuple), or None if it was not written by "createSet".
+        """
+        stateId = self._lastWrites.get(attrId)
+        return (stateId,) if stateId is not None else None
+
+    def snapshot(self) -> dict:
+        """
+        @return: The data, the Attribute entities (name -> (attribute id, ids of the related entities)) and the last writes of the container.
+        """
+        return {
+            'data': copy.deepcopy(self.data),
+            'attrs': {name: (attr.id, [entity.id for entity in attr.relations]) for name, attr in self.attrs.items()},
+            'lastWrites': dict(self._lastWrites)
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """
+        Restores a snapshot (see "snapshot"). Attributes take their saved ids (the ids in the states of the history),
+        and are related again to the entities that read or write them.
+        """
+        for name, (attrId, entityIds) in snapshot['attrs'].items():
+            attr = self.attrs.get(name)
+            if attr is None or attr.id != attrId:
+                with self.registry.scope():
+                    attr = Attribute(name=name, id=attrId)
+                self.attrs[name] = attr
+            for entityId in entityIds:
+                entity = resolveEntity(entityId, self.registry)
+                if entity is None or attr in entity.attrs:
+                    continue
+                entity.attrs[:] = [a for a in entity.attrs if a.name != name] + [attr]  # Replaces an attribute created before the restore
+                attr.addRelation(entity)
+                entity.registry.add(attr)
+                entity.registry._notifyRelation(entity, attr)
+        self.data = copy.deepcopy(snapshot['data'])
+        self._lastWrites = dict(snapshot['lastWrites'])
+        self._notify("")
+
 
 class BeliefReviewFunction(Entity):
     """
@@ -256,7 +887,7 @@ class BeliefReviewFunction(Entity):
     The important thing in separating the belief review into several functions is to separate the responsibilities in these functions in a coherent way.
     """
 
-    def __init__(self, f: Awaitable, desc: str = "", id: str = ""):
+    def __init__(self, f: Awaitable, desc: str = "", id: EntityId = ""):
         """
         Constructor:
         @param f: Belief revision function. It is a reference to a function. 
@@ -278,11 +909,14 @@ class Action(Entity):
     """
     Represents an action by an agent.
     @param f: Reference to a function/method that will be called to complete the action.
+    @param timeout (optional): Maximum duration of the action in seconds. The action is cancelled after that.
+                               Only asynchronous waits can be cancelled (Ex: "await asyncio.sleep", not "time.sleep").
     """
 
-    def __init__(self, f: Awaitable, desc: str = "", id: str = ""):
+    def __init__(self, f: Awaitable, desc: str = "", id: EntityId = "", timeout: float | None = None):
         super().__init__(desc, id)
         self.f = f
+        self.timeout = timeout
         self.plans: list[Plan] = list()
 
 
@@ -291,7 +925,7 @@ class GoalPromotion(Entity):
     This class represents a promotion of a goal.
     """
 
-    def __init__(self, name: str, f: Awaitable, desc: str = "", id: str = ""):
+    def __init__(self, name: str, f: Awaitable | None = None, desc: str = "", id: EntityId = "", batchF: Callable | None = None, paths: list[str] | None = None, rule: Expression | None = None, priorityRule: Expression | None = None):
         """
         Constructor:
         @param name: A string. Contains the name of the goal promotion.
@@ -302,13 +936,41 @@ class GoalPromotion(Entity):
                   The priority value returned will be the goal's new priority.
         @param desc (optional): Textual description of what the belief revision function does.
         @param id (optional): Entity identifier in the form of a string. If not specified, one will be generated.
+        @param batchF (optional): Batched promotion function, used by processors of fleets of homogeneous agents (FleetProcessor).
+                                  Its input is a dict {path: NumPy array with the belief value of each agent} and a NumPy array with the priority of the goal of each agent.
+                                  Must return a tuple "(priorities, rejected)": the new priorities and a boolean mask of the agents whose goal is not promoted.
+                                  It must be equivalent to "f". Example:
+                                  def batchF(columns, priority):
+                                      return priority + 1, columns['resources.battery'] != 'low'
+        @param paths (optional): Belief paths read by "batchF". Required if "batchF" is specified.
+        @param rule (optional): Declarative promotion condition (see module "rules"), instead of "f". Ex:
+                                (Belief("accident.risk") == "high") & ~Belief("resources.battery.low")
+                                Processors evaluate rules in a RuleNetwork, so conditions shared across goals are evaluated once.
+        @param priorityRule (optional): Declarative new priority, used with "rule". Ex: Priority + 1. The default keeps the priority.
         """
         super().__init__(desc, id)
         self.name = name
+        if f is None and rule is None:
+            raise ValueError("A promotion function (f) or rule is required")
+        self.rule = rule
+        self.priorityRule = priorityRule if priorityRule is not None else Priority
+        if f is None:
+            f = self._ruleF
         self.f = f
+        if batchF is not None and not paths:
+            raise ValueError("The belief paths of batchF must be specified")
+        self.batchF = batchF
+        self.paths = list(paths) if paths else []
         self.goals: list[Goal] = list()
         self.attrs: list[Attribute] = list()
 
+    async def _ruleF(self, get: Callable, priority: int) -> int | None:
+        """
+        Promotion function of a declarative rule, for processors that do not use a RuleNetwork.
+        """
+        if await self.rule.evaluateAsync(get, priority):
+            return await self.priorityRule.evaluateAsync(get, priority)
+
 
 class Plan(Entity):
     """
@@ -317,13 +979,19 @@ class Plan(Entity):
         @param actions: List of instances of the Action class.
         @param desc (optional): Textual description of what the belief revision function does.
         @param id (optional): Entity identifier in the form of a string. If not specified, one will be generated.
+        @param guard (optional): Declarative condition over beliefs. If specified, the plan is only chosen when it holds.
+        @param expectedDuration (optional): Expected duration of the plan actions, in seconds.
+                                            A goal is dropped if the plan cannot be completed before the goal deadline.
     """
 
-    def __init__(self, priority: int, actions: list[Action], desc: str = "", id: str = ""):
+    def __init__(self, priority: int, actions: list[Action], desc: str = "", id: EntityId = "", guard: Expression | None = None, expectedDuration: float = 0):
         super().__init__(desc, id)
         self.priority = priority
+        self.expectedDuration = expectedDuration
         self.actions = list(actions)
         self.goals = list()
+        self.guard = guard  # Declarative condition for the plan to be chosen (see module "rules")
+        self.attrs: list[Attribute] = list()  # Beliefs read by the guard
         for action in self.actions:
             action.plans.append(self)
 
@@ -333,7 +1001,7 @@ class Goal(Entity):
     This class represents a goal.
     """
 
-    def __init__(self, promotions: list[GoalPromotion], plans: list[Plan], desc: str = "", id: str = ""):
+    def __init__(self, promotions: list[GoalPromotion], plans: list[Plan], desc: str = "", id: EntityId = "", deadline: float | None = None, expectedDuration: float = 0):
         """
         Constructor:
         @param promotions: A list of instances of the GoalPromotion class. They are the target promotions.
@@ -341,8 +1009,14 @@ class Goal(Entity):
         @param plans: List of instances of the Plan class.
         @param desc (optional): Textual description of what the belief revision function does.
         @param id (optional): Entity identifier in the form of a string. If not specified, one will be generated.
+        @param deadline (optional): Seconds, after the deliberation that creates a goal instance, for the goal to be completed.
+                                    Goals that miss their deadline are dropped.
+        @param expectedDuration (optional): Expected duration of the goal in seconds. Used to drop goals that can no longer meet their deadline.
         """
         super().__init__(desc, id)
+        self.deadline = deadline
+        self.expectedDuration = expectedDuration
+        self.deadlineTime: float | None = None  # Absolute deadline of a goal instance (clone)
         self.promotions = list(promotions)
         for promotion in self.promotions:
             promotion.goals.append(self)
@@ -352,7 +1026,7 @@ class Goal(Entity):
         self.initialState()
         self.conflicts: list[Conflict] = list()
         self.agents: list[Agent] = list()
-        self.cloneId: str = ""
+        self.cloneId: EntityId = ""
 
     def __lt__(self, other: Self) -> bool:  # reverse order
         """
@@ -365,14 +1039,28 @@ class Goal(Entity):
         return len(self.promotions) == len(self.status)
 
     def getClone(self) -> Self:
-        clone = copy.deepcopy(self)
+        # Only the instance state (priority, status, cloneId) is per clone.
+        # Promotions, plans and conflicts are shared, so the agent graph (beliefs, channel...) is not copied.
+        clone = copy.copy(self)
         clone.initialState()
         clone.cloneId = Entity.genId()
+        if self.deadline is not None:
+            clone.deadlineTime = currentClock().now() + self.deadline
         return clone
 
+    def missesDeadline(self, now: float, duration: float = 0) -> bool:
+        """
+        @param now: Current time.
+        @param duration: Time still needed to complete the goal.
+        @return: True if a goal instance cannot be completed before its deadline.
+        """
+        return self.deadlineTime is not None and now + duration > self.deadlineTime
+
     def initialState(self) -> None:
         self.priority = 0
         self.status = list()
+        self.stateIds: list[EntityId] = list()  # States that caused this goal instance (Ex: its promotions)
+        self.context: dict[str, Any] = dict()  # Values of the beliefs read by the promotions of this goal instance (path -> value)
 
     def promote(self, status: str, priority: int) -> None:
         if (not status in self.status):
@@ -385,7 +1073,7 @@ class Conflict(Entity):
     This class represents a conflict between goals.
     """
 
-    def __init__(self, goals: list[Goal], desc: str = "", id: str = ""):
+    def __init__(self, goals: list[Goal], desc: str = "", id: EntityId = ""):
         """
         Constructor:
         @param goals: List of goals that cannot be performed together.
@@ -401,12 +1089,146 @@ class Conflict(Entity):
             goal.conflicts.append(self)
 
 
+class IntentionQueue:
+    """
+    Ordered queue of goals (intentions), sorted by priority.
+    Optionally bounded, and able to coalesce duplicate instances of the same goal.
+    """
+
+    def __init__(self, maxSize: int = 0, mergePolicy: str = "none", overflowPolicy: str = "drop", mergeKey: Callable[[Goal], Any] | None = None, blockInterval: float = 0.01, order: str = "priority"):
+        """
+        Constructor:
+        @param maxSize (optional): Maximum number of goals in the queue. 0 means unbounded.
+        @param mergePolicy (optional): What to do when an instance of a goal with the same merge key is already queued:
+                                       'none': keep both (the same goal can be contained several times in the queue);
+                                       'newest': replace the queued instance with the new one;
+                                       'priority': keep the instance with the highest priority.
+        @param overflowPolicy (optional): What to do when the queue is full:
+                                          'block': wait until the goal processing frees space. Requires goals to be processed
+                                                   concurrently with the deliberation ("runInLoop" or "runOnChange"):
+                                                   otherwise a full queue raises a RuntimeError (see "onBlock").
+                                                   A goal waiting when the loop stops is dropped;
+                                          'drop': reject the new goal;
+                                          'shed': remove the lowest priority goal (which may be the new one).
+        @param mergeKey (optional): Function that receives a goal and returns its merge key. The default is the goal id.
+                                    Use it to merge goal instances by context: the beliefs read by their promotions
+                                    (Ex: lambda g: (g.id, g.context.get('accident.target'))). See "Goal.context".
+        @param blockInterval (optional): Polling interval in seconds of the 'block' policy.
+        @param order (optional): 'priority': goals are ordered only by priority (goals with the same priority in insertion order);
+                                 'edf': goals with the same priority are ordered by deadline (earliest deadline first; goals without deadline last).
+        """
+        if mergePolicy not in ("none", "newest", "priority"):
+            raise ValueError("Invalid mergePolicy: " + str(mergePolicy))
+        if overflowPolicy not in ("block", "drop", "shed"):
+            raise ValueError("Invalid overflowPolicy: " + str(overflowPolicy))
+        if order not in ("priority", "edf"):
+            raise ValueError("Invalid order: " + str(order))
+        self.order = order
+        self.maxSize = maxSize
+        self.mergePolicy = mergePolicy
+        self.overflowPolicy = overflowPolicy
+        self.mergeKey = mergeKey if mergeKey is not None else (
+            lambda goal: goal.id)
+        self.blockInterval = blockInterval
+        self._goals: list[Goal] = []
+        self._byKey: dict[Any, Goal] = {}
+        self.stats = {'admitted': 0, 'coalesced': 0,
+                      'dropped': 0, 'shed': 0, 'blocked': 0}
+        # Set by the processor: called before waiting (policy 'block'). Wakes the goal processing, returns False if it stopped
+        # (the goal is dropped), and raises a RuntimeError if goals are not processed concurrently (the wait would never end)
+        self.onBlock: Callable[[], bool] | None = None
+
+    def __len__(self) -> int:
+        return len(self._goals)
+
+    def __iter__(self) -> Iterator[Goal]:
+        return iter(self._goals)
+
+    def __getitem__(self, index: int) -> Goal:
+        return self._goals[index]
+
+    @staticmethod
+    def _edfKey(goal: Goal) -> tuple:
+        return (-goal.priority, goal.deadlineTime if goal.deadlineTime is not None else float('inf'))
+
+    def _insert(self, goal: Goal) -> None:
+        # ordered is important
+        if self.order == "edf":
+            bisect.insort(self._goals, goal, key=self._edfKey)
+        else:
+            bisect.insort(self._goals, goal)
+        if self.mergePolicy != "none":
+            self._byKey[self.mergeKey(goal)] = goal
+
+    def _forget(self, goal: Goal) -> None:
+        if self.mergePolicy != "none":
+            key = self.mergeKey(goal)
+            if self._byKey.get(key) is goal:
+                del self._byKey[key]
+
+    def pop(self, index: int = 0) -> Goal:
+        """
+        Removes and returns a goal. By default, the highest priority goal.
+        """
+        goal = self._goals.pop(index)
+        self._forget(goal)
+        return goal
+
+    def clear(self) -> None:
+        self._goals = []
+        self._byKey = {}
+
+    def remove(self, goal: Goal) -> None:
+        for i, queued in enumerate(self._goals):
+            if queued is goal:
+                self.pop(i)
+                return
+
+    async def putAsync(self, goal: Goal) -> list[tuple[Goal, str]]:
+        """
+        Admits a goal to the queue, according to the merge and overflow policies.
+        @param goal: A goal instance (clone) in final state.
+        @return: A list of tuples "(goal, reason)" with the goals that left or did not enter the queue.
+                 Reason is 'coalesced', 'dropped' or 'shed'.
+        """
+        rejected: list[tuple[Goal, str]] = []
+        if self.mergePolicy != "none":
+            current = self._byKey.get(self.mergeKey(goal))
+            if current is not None:
+                self.stats['coalesced'] += 1
+                if self.mergePolicy == "priority" and not goal.priority > current.priority:
+                    return [(goal, 'coalesced')]
+                self.remove(current)
+                self._insert(goal)
+                self.stats['admitted'] += 1
+                return [(current, 'coalesced')]
+        if self.maxSize > 0 and len(self._goals) >= self.maxSize:
+            if self.overflowPolicy == "block":
+                self.stats['blocked'] += 1
+                while len(self._goals) >= self.maxSize:
+                    if self.onBlock is not None and not self.onBlock():  # The goal processing stopped
+                        self.stats['dropped'] += 1
+                        return [(goal, 'dropped')]
+                    await asyncio.sleep(self.blockInterval)
+            elif self.overflowPolicy == "drop":
+                self.stats['dropped'] += 1
+                return [(goal, 'dropped')]
+            else:
+                self.stats['shed'] += 1
+                if not goal.priority > self._goals[-1].priority:
+                    return [(goal, 'shed')]
+                rejected.append((self.pop(-1), 'shed'))
+        self._insert(goal)
+        self.stats['admitted'] += 1
+        return rejected
+
+
 class Agent(Entity):
     """
     This class represents a goal.
     """
 
-    def __init__(self, beliefs: DataContainer, channel: DataContainer, brfs: list[BeliefReviewFunction], goals: list[Goal], conflicts: list[Conflict], desc: str = "", id: str = ""):
+    def __init__(self, beliefs: DataContainer, channel: DataContainer, brfs: list[BeliefReviewFunction], goals: list[Goal], conflicts: list[Conflict], desc: str = "", id: EntityId = ""):
         """
         Constructor:
         @param beliefs: Instances of the DataContainer class.
@@ -434,6 +1256,209 @@ class Agent(Entity):
         self.conflicts = list(conflicts)
         for conflict in self.conflicts:
             conflict.agents.append(self)
+        self.executionPlan: ExecutionPlan | None = None
+
+    def compile(self) -> "ExecutionPlan":
+        """
+        Freezes the structure of the agent (goals, promotions, plans, actions and conflicts) into an ExecutionPlan,
+        used by processors and explainers instead of rediscovering this structure at run time.
+        Must be called again if the structure of the agent changes after that.
+        """
+        self.executionPlan = ExecutionPlan(self)
+        return self.executionPlan
+
+    def snapshot(self) -> dict:
+        """
+        Runtime state of the agent: its beliefs and channel (see "DataContainer.snapshot"),
+        and the ids of the entities of its structure (see "ExecutionPlan"), which the states of the history refer to.
+        """
+        plan = self.executionPlan if self.executionPlan is not None else self.compile()
+        return {
+            'entities': [(type(entity).__name__, entity.id) for entity in plan.entities],
+            'beliefs': self.beliefs.snapshot(),
+            'channel': self.channel.snapshot()
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """
+        Restores a snapshot (see "snapshot") in an agent built like the saved one (Ex: by the same code, after a restart).
+        Entities are matched by their position in the structure of the agent, and take the saved ids,
+        so that the states already saved in the history keep referring to them.
+        @raise ValueError: If the structure of the agent is different.
+        """
+        plan = self.compile()
+        saved = snapshot['entities']
+        if [type(entity).__name__ for entity in plan.entities] != [name for name, _ in saved]:
+            raise ValueError("The snapshot does not match the structure of the agent")
+        renamed = False
+        for entity, (_, id) in zip(plan.entities, saved):
+            if entity.id != id:
+                entity.registry.remove(entity.id)
+                entity.id = id
+                entity.registry.add(entity)
+                renamed = True
+        if renamed:
+            for conflict in self.conflicts:
+                conflict.goalsIds = [goal.id for goal in conflict.goals]
+            self.compile()
+        self.beliefs.restore(snapshot['beliefs'])
+        self.channel.restore(snapshot['channel'])
+
+
+class ExecutionPlan:
+    """
+    Compact, frozen view of the static structure of an agent. Built by "Agent.compile".
+    """
+
+    def __init__(self, agent: Agent):
+        """
+        Constructor:
+        @param agent: A instance of the class Agent.
+        """
+        self.agentId = agent.id
+        # Integer indexes of the entities
+        self.entities: list[Entity] = []
+        self.index: dict[EntityId, int] = {}
+        self._add(agent)
+        for brf in agent.brfs:
+            self._add(brf)
+        for goal in agent.goals:
+            self._add(goal)
+        for goal in agent.goals:
+            for promotion in goal.promotions:
+                self._add(promotion)
+            for plan in goal.plans:
+                self._add(plan)
+                for action in plan.actions:
+                    self._add(action)
+        for conflict in agent.conflicts:
+            self._add(conflict)
+        self.goalIndex: dict[EntityId, int] = {
+            goal.id: i for i, goal in enumerate(agent.goals)}
+        # Promotion chain of each goal (by goal index)
+        self.promotions: list[tuple[GoalPromotion, ...]] = [
+            tuple(goal.promotions) for goal in agent.goals]
+        # Plans of each goal sorted by minimum priority (stable), for plan selection by bisection
+        self.plans: list[tuple[Plan, ...]] = []
+        self.planPriorities: list[list[int]] = []
+        self.hasGuards: list[bool] = []
+        for goal in agent.goals:
+            plans = sorted(goal.plans, key=lambda plan: plan.priority)
+            self.plans.append(tuple(plans))
+            self.planPriorities.append([plan.priority for plan in plans])
+            self.hasGuards.append(
+                any(plan.guard is not None for plan in plans))
+        # Conflicts of each goal, and goal x goal adjacency matrix.
+        # A goal of a conflict is in conflict with itself: its instances in the goal queue compete with each other.
+        self.conflicts: list[tuple[Conflict, ...]] = [
+            () for _ in agent.goals]
+        self.conflictMatrix: list[bytearray] = [
+            bytearray(len(agent.goals)) for _ in agent.goals]
+        for conflict in agent.conflicts:
+            goalIndexes = [self.goalIndex[goal.id]
+                           for goal in conflict.goals if goal.id in self.goalIndex]
+            for i in goalIndexes:
+                self.conflicts[i] = self.conflicts[i] + (conflict,)
+                for j in goalIndexes:
+                    self.conflictMatrix[i][j] = 1
+        # Possible causes of the entities whose relations do not change at run time (see SequentialExplainer)
+        self.causes: dict[EntityId, tuple[EntityId, ...]] = {}
+        for entity in self.entities:
+            if isinstance(entity, Action):
+                self.causes[entity.id] = tuple(
+                    plan.id for plan in entity.plans)
+            elif isinstance(entity, Goal):
+                self.causes[entity.id] = tuple(
+                    e.id for e in entity.conflicts + entity.promotions)
+            elif isinstance(entity, Conflict):
+                self.causes[entity.id] = tuple(
+                    goal.id for goal in entity.goals)
+
+    def _add(self, entity: Entity) -> None:
+        if not entity.id in self.index:
+            self.index[entity.id] = len(self.entities)
+            self.entities.append(entity)
+
+    def inConflict(self, goalId1: EntityId, goalId2: EntityId) -> bool:
+        """
+        @return: True if both goals are in a same conflict (for the same goal: if the goal is in a conflict).
+        """
+        return self.conflictMatrix[self.goalIndex[goalId1]][self.goalIndex[goalId2]] == 1
+
+    def candidatePlans(self, goal: Goal) -> Iterator[Plan]:
+        """
+        Plans of a goal in order of preference: first the plans with the highest minimum priority reached by the goal priority
+        (in their definition order), then the other plans in definition order.
+        """
+        goalIndex = self.goalIndex[goal.id]
+        plans = self.plans[goalIndex]
+        priorities = self.planPriorities[goalIndex]
+        end = bisect.bisect_right(priorities, goal.priority)
+        while end > 0:
+            start = bisect.bisect_left(priorities, priorities[end - 1])
+            for plan in plans[start:end]:
+                yield plan
+            end = start
+        for plan in goal.plans:
+            if goal.priority < plan.priority:
+                yield plan
+
+
+class Instrument:
+    """
+    Receives hooks around the work of a processor (see "AbstractProcessor.addInstrument").
+    Kinds of work: 'deliberate' and 'intention' (processing cycles), 'processIntentions' (the drain of the goal queue),
+    'brf', 'promotion', 'conflicts' (conflict detection), 'planSelection', 'action', 'history.add', 'history.get' and 'history.commit'.
+    Work is nested: hooks of the work done inside another (Ex: the BRFs of a deliberation) are called between its "begin" and "end".
+    Hooks are called in the thread of the processor, so they must be fast.
+    """
+
+    def begin(self, kind: str, entityId: EntityId) -> Any:
+        """
+        Called before a unit of work.
+        @param kind: Kind of work.
+        @param entityId: Id of the entity that does the work (Ex: the BRF), or "" for history calls.
+        @return: A token, passed to "end".
+        """
+        return None
+
+    def end(self, token: Any, error: BaseException | None) -> None:
+        """
+        Called after the unit of work of the token.
+        @param error: The exception raised by the work, if any.
+        """
+        pass
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Called when a measured quantity changes (Ex: 'intentions', the size of the goal queue).
+        """
+        pass
+
+
+class _InstrumentedHistory(AbstractExecutionHistory):
+    """
+    Executionhistory (or open transaction) seen by a processor with instruments: reads and writes are reported to them.
+    """
+
+    def __init__(self, history: AbstractExecutionHistory, processor: "AbstractProcessor"):
+        self.history = history
+        self._processor = processor
+
+    async def addAsync(self, state: State) -> None:
+        return await self._processor._probe("history.add", "", self.history.addAsync)(state)
+
+    async def addManyAsync(self, states: list[State]) -> None:
+        return await self._processor._probe("history.add", "", self.history.addManyAsync)(states)
+
+    async def getAsync(self, filters: dict) -> list[State]:
+        return await self._processor._probe("history.get", "", self.history.getAsync)(filters)
+
+    async def getLatestAsync(self, fromIds: set[EntityId], toIds: set[EntityId], maxTime: float, minTime: float | None = None) -> dict[EntityId, State]:
+        return await self._processor._probe("history.get", "", self.history.getLatestAsync)(fromIds, toIds, maxTime, minTime)
+
+    async def getByIdsAsync(self, ids: tuple[EntityId, ...]) -> list[State]:
+        return await self._processor._probe("history.get", "", self.history.getByIdsAsync)(ids)
 
 
 class AbstractProcessor(ABC):
@@ -443,19 +1468,50 @@ class AbstractProcessor(ABC):
     Each call of "deliberate" is an iteration.
     """
 
-    def __init__(self, agent: Agent, executionHistory: AbstractExecutionHistory):
+    def __init__(self, agent: Agent, executionHistory: AbstractExecutionHistory, intentions: IntentionQueue | None = None, clock: Clock | None = None):
         """
         Constructor:
         @param agent: A instance of the class Agent.
         @param executionHistory: A instance of the type AbstractExecutionHistory subclass.
+        @param intentions (optional): A instance of the class IntentionQueue. Defines limits and merge policies of the goal queue.
+                                      The default is an unbounded queue.
+        @param clock (optional): Clock of the states saved by the processor. The default is the clock of the current scope (real time).
         """
+        if executionHistory.readOnly:
+            raise TypeError(type(executionHistory).__name__ + " is read-only: processors need a history where states can be saved")
         self.agent = agent
+        self.clock = clock if clock is not None else currentClock()
+        if agent.executionPlan is None:
+            agent.compile()
         self._enviroment = DataContainer()
+        # Reused in every deliberation, so its Attribute entities are created once
+        self._envContainer = DataContainer("env", registry=agent.registry)
         # PrioriryQueue cannot be used in the self._intentions, as the array needs to be traversed non-destructively in the conflict detection method.
-        self._intentions: list[Goal] = []  # Ordered queue of goals
+        self._intentions: IntentionQueue = intentions if intentions is not None else IntentionQueue()  # Ordered queue of goals
+        self._intentions.onBlock = self._onQueueBlocked
         self._deliberateTimer = None
         self._intentionsTimer = None
+        self._looping = False  # True while "runInLoop" runs
+        self._loopDelay = 0.5
+        self._loopStopped = False  # True after "stopLoop"
         self.executionHistory = executionHistory
+        # Event-driven execution (see "runOnChange")
+        self._inbox: dict | None = None  # Pending environment updates, coalesced
+        self._inboxLock = Lock()
+        self._inboxEvent: asyncio.Event | None = None
+        self._intentionsEvent: asyncio.Event | None = None
+        self._eventLoop: asyncio.AbstractEventLoop | None = None
+        self._eventTask: asyncio.Task | None = None
+        self._eventThread: Thread | None = None
+        self._eventStarted = Event()
+        self.coalescedUpdates = 0  # Number of updates merged into an already pending deliberation
+        # Declarative rules (see module "rules")
+        self._ruleNetwork: RuleNetwork | None = None
+        self._rulesPlan: ExecutionPlan | None = None  # ExecutionPlan from which the rules were compiled
+        self._ruleNodes: dict[EntityId, tuple] = {}  # Entity id -> compiled nodes
+        self._ruleReads: dict[tuple[EntityId, str], tuple[int, EntityId, EntityId]] = {}  # (Entity id, path) -> (version, attribute id, state id) of the last saved read
+        self._instruments: list[Instrument] = []  # See "addInstrument"
+        self.inputListeners: list[Callable[[str, float, Any], None]] = []  # Called with (operation, time, data) for each input (see "_notifyInput")
 
     @abstractmethod
     async def deliberateAsync(self, data: dict) -> None:
@@ -489,6 +1545,344 @@ class AbstractProcessor(ABC):
         """
         pass
 
+    @property
+    def _history(self) -> AbstractExecutionHistory:
+        """
+        Where the processor saves states: the open transaction of the current cycle, if any.
+        """
+        history = currentHistory(self.executionHistory)
+        if self._instruments:
+            return _InstrumentedHistory(history, self)
+        return history
+
+    def addInstrument(self, instrument: Instrument) -> None:
+        """
+        Adds hooks around each BRF, promotion, plan selection, action, history call and processing cycle.
+        Without instruments, the hooks cost a single check per call.
+        @param instrument: A instance of a subclass of the class Instrument (Ex: StatsCollector).
+        """
+        self._instruments = self._instruments + [instrument]  # Copy: running cycles keep their list
+
+    def removeInstrument(self, instrument: Instrument) -> None:
+        self._instruments = [i for i in self._instruments if i is not instrument]
+
+    def _begin(self, kind: str, entityId: EntityId) -> list[tuple[Instrument, Any]] | None:
+        if not self._instruments:
+            return None
+        return [(instrument, instrument.begin(kind, entityId)) for instrument in self._instruments]
+
+    @staticmethod
+    def _end(tokens: list[tuple[Instrument, Any]] | None, error: BaseException | None) -> None:
+        if tokens is None:
+            return
+        for instrument, token in reversed(tokens):
+            instrument.end(token, error)
+
+    def _notifyInput(self, operation: str, data: Any = None) -> None:
+        """
+        Reports an input of the processor to the input listeners (Ex: the InputRecorder of the module "replay").
+        @param operation: 'deliberate' (with the environment data) or 'processIntentions'.
+        """
+        if self.inputListeners:
+            now = self.clock.peek()
+            for listener in self.inputListeners:
+                listener(operation, now, data)
+
+    def _gauge(self, name: str, value: float) -> None:
+        for instrument in self._instruments:
+            instrument.gauge(name, value)
+
+    def _probe(self, kind: str, entityId: EntityId, f: Callable) -> Callable:
+        """
+        @return: The async function "f", wrapped by the hooks of the instruments (if any).
+        """
+        if not self._instruments:
+            return f
+
+        async def probed(*args: Any) -> Any:
+            tokens = self._begin(kind, entityId)
+            try:
+                res = await f(*args)
+            except BaseException as e:
+                self._end(tokens, e)
+                raise
+            self._end(tokens, None)
+            return res
+        return probed
+
+    @contextlib.asynccontextmanager
+    async def _cycle(self, kind: str = "cycle", entityId: EntityId = "") -> AsyncIterator[HistoryTransaction]:
+        """
+        Opens the history transaction of a processing cycle (a deliberation or a goal execution),
+        in the registry scope of the agent (entities are resolved and created in the agent registry).
+        @param kind (optional): Kind of cycle reported to the instruments ('deliberate' or 'intention').
+        @param entityId (optional): Entity processed by the cycle (Ex: the goal of an 'intention').
+        """
+        with self.agent.registry.scope(), self.clock.scope():
+            async with self.executionHistory.transaction() as transaction:
+                tokens = self._begin(kind, entityId)
+                if tokens is None:
+                    yield transaction
+                    return
+                try:
+                    yield transaction
+                    await self._probe("history.commit", "", transaction.commitAsync)()  # Inside the cycle (the exit commit is then empty)
+                except BaseException as e:
+                    self._end(tokens, e)
+                    raise
+                self._end(tokens, None)
+
+    def _onQueueBlocked(self) -> bool:
+        """
+        Called by the goal queue before waiting for free space (overflow policy 'block').
+        Wakes the goal processing of the event-driven loop, which otherwise only runs after the deliberation.
+        @return: False if the loop was stopped.
+        @raise RuntimeError: If goals are not processed concurrently with the deliberation (Ex: "deliberate" called directly).
+        """
+        if self._looping:
+            if self._intentionsTimer is None:  # First deliberation of "runInLoop": the goal processing starts now
+                self._intentionsTimer = Timer(0, self._runProcessIntentionsTimer, [self._loopDelay])
+                self._intentionsTimer.start()
+            return True
+        loop = self._eventLoop
+        if loop is not None and self._intentionsEvent is not None:
+            loop.call_soon_threadsafe(self._intentionsEvent.set)
+            return True
+        if self._loopStopped:
+            return False
+        raise RuntimeError("The goal queue is full, and goals are not processed concurrently with the deliberation. "
+                           "The 'block' overflow policy requires 'runInLoop' or 'runOnChange'")
+
+    @property
+    def intentionsStats(self) -> dict:
+        """
+        Counters of the goal queue: admitted, coalesced, dropped, shed and blocked goals.
+        """
+        return dict(self._intentions.stats, size=len(self._intentions))
+
+    def snapshot(self) -> dict:
+        """
+        Runtime state of the processor, to be restored after a restart (see "restore" and the module "checkpoint"):
+        the state of the agent ("Agent.snapshot"), the Attribute entities of the environment,
+        the goal queue (goal instances with their priorities, promotions, cloneIds and deadlines) and the time of a VirtualClock.
+        Must be taken between processing cycles (Ex: not while "runInLoop" is running).
+        """
+        return {
+            'agent': self.agent.snapshot(),
+            'env': self._envContainer.snapshot(),
+            'intentions': [{'id': goal.id, 'cloneId': goal.cloneId, 'priority': goal.priority, 'status': list(goal.status),
+                            'stateIds': list(goal.stateIds), 'deadlineTime': goal.deadlineTime,
+                            'context': copy.deepcopy(goal.context)} for goal in self._intentions],
+            'queueStats': dict(self._intentions.stats),
+            'clock': self.clock.peek() if isinstance(self.clock, VirtualClock) else None
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """
+        Restores a snapshot (see "snapshot") in a processor whose agent is built like the saved one (see "Agent.restore").
+        The goal queue is replaced by the saved goal instances.
+        New ids do not repeat the restored ones. With a fixed node ("setIdNode"), they can repeat ids saved in the history
+        after the snapshot: restarted processes should use a new node (the default is a random node).
+        @raise ValueError: If the structure of the agent is different.
+        """
+        self.agent.restore(snapshot['agent'])
+        self._dropRules()  # Compiled with the previous ids: compiled again when needed
+        self._envContainer.restore(snapshot['env'])
+        self._enviroment = copy.deepcopy(snapshot['env']['data'])  # Base of the updates pushed after the restore (see "_takeInbox")
+        goals = {goal.id: goal for goal in self.agent.goals}
+        self._intentions.clear()
+        for item in snapshot['intentions']:
+            clone = copy.copy(goals[item['id']])
+            clone.initialState()
+            clone.cloneId = item['cloneId']
+            clone.priority = item['priority']
+            clone.status = list(item['status'])
+            clone.stateIds = list(item['stateIds'])
+            clone.deadlineTime = item['deadlineTime']
+            clone.context = copy.deepcopy(item['context'])
+            self._intentions._insert(clone)
+        self._intentions.stats.update(snapshot['queueStats'])
+        if snapshot['clock'] is not None and isinstance(self.clock, VirtualClock):
+            self.clock.set(snapshot['clock'])
+        _reserveIds(self._snapshotIds(snapshot))
+
+    @staticmethod
+    def _snapshotIds(snapshot: dict) -> Iterator[EntityId]:
+        """
+        @return: The entity, attribute, state and goal instance ids of a snapshot.
+        """
+        agent = snapshot['agent']
+        for _, id in agent['entities']:
+            yield id
+        for container in (agent['beliefs'], agent['channel'], snapshot['env']):
+            for attrId, _ in container['attrs'].values():
+                yield attrId
+            yield from container['lastWrites'].values()
+        for item in snapshot['intentions']:
+            yield item['cloneId']
+            yield from item['stateIds']
+
+    async def _admitIntentionAsync(self, goal: Goal) -> None:
+        """
+        Inserts a goal (in final state) in the goal queue.
+            -- Save state changes that represent goals that left or did not enter the queue
+        """
+        for rejected, reason in await self._intentions.putAsync(goal):
+            now = self.clock.now()
+            await self._history.addAsync(State(rejected.id, "", now, now, {'cloneId': rejected.cloneId, 'priority': rejected.priority, 'rejected': reason}, parentIds=tuple(rejected.stateIds)))
+        if self._instruments:
+            self._gauge("intentions", len(self._intentions))
+
+    @property
+    def executionPlan(self) -> ExecutionPlan:
+        """
+        Compiled structure of the agent (see "Agent.compile").
+        """
+        return self.agent.executionPlan
+
+    def _goalIndex(self, goal: Goal) -> int:
+        """
+        @return: The index of a goal in the ExecutionPlan. The agent is compiled again if the goal was added after "Agent.compile".
+        """
+        i = self.agent.executionPlan.goalIndex.get(goal.id)
+        if i is None:
+            i = self.agent.compile().goalIndex[goal.id]
+        return i
+
+    def _dropRules(self) -> None:
+        """
+        Drops the compiled declarative rules, compiled again when needed.
+        """
+        if self._ruleNetwork is not None:
+            if self._ruleNetwork._onChange in self.agent.beliefs.listeners:
+                self.agent.beliefs.listeners.remove(self._ruleNetwork._onChange)
+            self._ruleNetwork = None
+        self._rulesPlan = None
+        self._ruleNodes = {}
+        self._ruleReads = {}
+
+    def _compileRules(self) -> RuleNetwork:
+        """
+        Compiles the declarative rules of the agent (promotion rules and plan guards) into a single RuleNetwork.
+        The beliefs read by the rules are related to promotions/plans, so explainers find them as possible causes.
+        The rules are compiled again when the agent is compiled again.
+        """
+        if self._rulesPlan is not self.executionPlan:
+            self._dropRules()
+        if self._ruleNetwork is None:
+            network = RuleNetwork(self.agent.beliefs)
+            executionPlan = self.executionPlan
+            for goalIndex, goal in enumerate(self.agent.goals):
+                for promotion in executionPlan.promotions[goalIndex]:
+                    if promotion.rule is not None:
+                        self._ruleNodes[promotion.id] = (network.compile(
+                            promotion.rule), network.compile(promotion.priorityRule))
+                        for path in promotion.rule.paths() | promotion.priorityRule.paths():
+                            self.agent.beliefs.relate(path, promotion)
+                if not executionPlan.hasGuards[goalIndex]:
+                    continue
+                for plan in executionPlan.plans[goalIndex]:
+                    if plan.guard is not None:
+                        self._ruleNodes[plan.id] = (
+                            network.compile(plan.guard),)
+                        for path in plan.guard.paths():
+                            self.agent.beliefs.relate(path, plan)
+            self._ruleNetwork = network
+            self._rulesPlan = executionPlan
+        return self._ruleNetwork
+
+    async def _saveRuleReadsAsync(self, entity: Entity, paths: set[str], reads: dict[EntityId, EntityId] | None = None) -> None:
+        """
+        Saves the belief reads of a rule, as "createGet" does. Only beliefs that changed since the last save are saved.
+        @param reads (optional): A dict where the read states (saved now or before) are kept, as in "createGet".
+        """
+        for path in sorted(paths):
+            version = self._ruleNetwork.version(path)
+            if self._ruleReads.get((entity.id, path), (None,))[0] != version:
+                attr = self.agent.beliefs.relate(path, entity)
+                now = self.clock.now()
+                state = State(attr.id, entity.id, now, now, copy.deepcopy(
+                    self.agent.beliefs.get(path)), parentIds=self.agent.beliefs.lastWriteOf(attr.id))
+                self._ruleReads[(entity.id, path)] = (version, attr.id, state.id)
+                await self._history.addAsync(state)
+            if reads is not None:
+                _, attrId, stateId = self._ruleReads[(entity.id, path)]
+                reads[attrId] = stateId
+
+    async def _promoteByRuleAsync(self, promotion: GoalPromotion, priority: int, reads: dict[EntityId, EntityId] | None = None, context: dict[str, Any] | None = None) -> int | None:
+        """
+        Evaluates a promotion rule.
+        @param reads (optional): A dict where the read states of the rule are kept, as in "createGet".
+        @param context (optional): A dict where a copy of the beliefs read by the rule is kept, as in "createGet".
+        @return: The new priority, or None if the goal is not promoted.
+        """
+        network = self._compileRules()
+        condition, newPriority = self._ruleNodes[promotion.id]
+        paths = promotion.rule.paths() | promotion.priorityRule.paths()
+        await self._saveRuleReadsAsync(promotion, paths, reads)
+        if context is not None:
+            for path in paths:
+                context[path] = copy.deepcopy(self.agent.beliefs.get(path))
+        if network.evaluate(condition, priority):
+            return network.evaluate(newPriority, priority)
+        return None
+
+    async def _isPlanApplicableAsync(self, plan: Plan, reads: dict[EntityId, EntityId] | None = None) -> bool:
+        if plan.guard is None:
+            return True
+        network = self._compileRules()
+        await self._saveRuleReadsAsync(plan, plan.guard.paths(), reads)
+        return bool(network.evaluate(self._ruleNodes[plan.id][0]))
+
+    async def _dropIfMissesDeadlineAsync(self, goal: Goal, plan: Plan | None = None) -> bool:
+        """
+        Drops a goal that cannot be completed before its deadline (considering the expected duration of the goal or of the chosen plan).
+            -- Save state change that represents the dropped goal
+        @return: True if the goal was dropped.
+        """
+        now = self.clock.now()
+        duration = plan.expectedDuration if plan is not None else goal.expectedDuration
+        if not goal.missesDeadline(now, duration):
+            return False
+        await self._history.addAsync(State(goal.id, plan.id if plan is not None else "", now, now, {'cloneId': goal.cloneId, 'priority': goal.priority, 'deadlineMissed': True, 'deadline': goal.deadlineTime}, parentIds=tuple(goal.stateIds)))
+        return True
+
+    async def _runActionAsync(self, goal: Goal, action: Action, *args: Any) -> Any:
+        """
+        Runs an action, cancelling it after its timeout or the goal deadline (the earliest).
+        @raise TimeoutError: If the action is cancelled.
+        """
+        timeout = action.timeout
+        if goal.deadlineTime is not None:
+            remaining = max(0, goal.deadlineTime - self.clock.now())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        f = self._probe("action", action.id, action.f)
+        if timeout is None:
+            return await f(*args)
+        try:
+            return await asyncio.wait_for(f(*args), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Action timed out after " +
+                               str(round(timeout, 6)) + "s")
+
+    async def _choosePlanAsync(self, goal: Goal, reads: dict[EntityId, EntityId] | None = None) -> Plan | None:
+        """
+        Chooses the plan with the highest minimum priority that the goal priority reaches, among plans whose guard holds.
+        If the goal priority does not reach any plan, the first applicable plan is chosen.
+        @param reads (optional): A dict where the read states of the guard of the chosen plan are kept, as in "createGet".
+        @return: The chosen plan, or None if no plan is applicable.
+        """
+        goalIndex = self._goalIndex(goal)
+        if not self.executionPlan.hasGuards[goalIndex]:  # The first candidate plan is applicable
+            return next(self.executionPlan.candidatePlans(goal), None)
+        for plan in self.executionPlan.candidatePlans(goal):
+            planReads: dict[EntityId, EntityId] = {}
+            if await self._isPlanApplicableAsync(plan, planReads):
+                if reads is not None:
+                    reads.update(planReads)
+                return plan
+        return None
+
     def _detectConflicts(self) -> dict:
         """
         Detect conflicts.
@@ -503,31 +1897,36 @@ class AbstractProcessor(ABC):
         This method needs to return a global view of conflicts, as not all "processors" are sequential.
         """
         res = {}
-        for conflict in self.agent.conflicts:
-            resItem = {}
-            for goal in self._intentions:  # Use ordered _intentions, prioritize those with higher priority
-                if goal.id in conflict.goalsIds:
-                    if not 'chosen' in resItem:
-                        resItem['chosen'] = goal.cloneId
-                    else:
-                        if not 'toRemove' in resItem:
-                            resItem['toRemove'] = set()
-                        resItem['toRemove'].add(goal.cloneId)
-            if 'chosen' in resItem and 'toRemove' in resItem:
-                res[conflict.id] = resItem
+        goalIndex = self.executionPlan.goalIndex
+        goalConflicts = self.executionPlan.conflicts
+        conflictMatrix = self.executionPlan.conflictMatrix
+        chosen = {}
+        now = self.clock.now()
+        for goal in self._intentions:  # Use ordered _intentions, prioritize those with higher priority
+            i = goalIndex.get(goal.id)
+            if i is None or not conflictMatrix[i][i] or goal.missesDeadline(now):  # Goals without conflicts are skipped
+                continue
+            for conflict in goalConflicts[i]:
+                if not conflict.id in chosen:
+                    chosen[conflict.id] = goal.cloneId
+                else:
+                    if not conflict.id in res:
+                        res[conflict.id] = {
+                            'chosen': chosen[conflict.id], 'toRemove': set()}
+                    res[conflict.id]['toRemove'].add(goal.cloneId)
         return res
 
     def deliberate(self, data: dict) -> None:
         """
         Wraps the "deliberateAsync" method for synchronous calls.
         """
-        return asyncio.run(self.deliberateAsync(data))
+        return runSync(self.deliberateAsync(data))
 
     def processIntentions(self) -> None:
         """
         Wraps the "processIntentionsAsync" method for synchronous calls.
         """
-        return asyncio.run(self.processIntentionsAsync())
+        return runSync(self.processIntentionsAsync())
 
     def _runDeliberateTimer(self, data: dict, delay: float = 0.5) -> None:
         """
@@ -536,6 +1935,8 @@ class AbstractProcessor(ABC):
         @param delay: Delay between each inference iteration in seconds. The default is 0.5.
         """
         self.deliberate(data)
+        if not self._looping:  # Stopped during the deliberation
+            return
         self._deliberateTimer = Timer(
             delay, self._runDeliberateTimer, [data, delay])
         self._deliberateTimer.start()
@@ -547,6 +1948,8 @@ class AbstractProcessor(ABC):
         @param delay: Delay between each inference iteration in seconds. The default is 0.5.
         """
         self.processIntentions()
+        if not self._looping:
+            return
         self._intentionsTimer = Timer(
             delay, self._runProcessIntentionsTimer, [delay])
         self._intentionsTimer.start()
@@ -557,19 +1960,172 @@ class AbstractProcessor(ABC):
         @param data: A Structure of type Dict. Contains the environment data.
         @param delay: Delay between each inference iteration in seconds. The default is 0.5.
         """
+        self._looping = True
+        self._loopStopped = False
+        self._loopDelay = delay
+        self._intentionsTimer = None
         self._runDeliberateTimer(data, delay)
-        self._runProcessIntentionsTimer(delay)
+        if self._intentionsTimer is None:  # Not started by a blocked first deliberation (see "_onQueueBlocked")
+            self._runProcessIntentionsTimer(delay)
+
+    def _enqueue(self, data: dict) -> None:
+        """
+        Merges an environment update into the inbox.
+        Updates that arrive before the pending deliberation starts are coalesced into it (the newest value of each key wins).
+        """
+        with self._inboxLock:
+            if self._inbox is None:
+                self._inbox = dict(data)
+            else:
+                self._inbox.update(data)
+                self.coalescedUpdates += 1
+            loop = self._eventLoop
+        if loop is not None and self._inboxEvent is not None:
+            loop.call_soon_threadsafe(self._inboxEvent.set)
+
+    def _takeInbox(self) -> dict | None:
+        """
+        Empties the inbox.
+        @return: The current environment with the pending updates applied, or None if there are no pending updates.
+        """
+        with self._inboxLock:
+            updates = self._inbox
+            self._inbox = None
+        if updates is None:
+            return None
+        enviroment = dict(self._enviroment) if isinstance(
+            self._enviroment, dict) else {}
+        enviroment.update(updates)
+        return enviroment
+
+    def hasPendingUpdates(self) -> bool:
+        """
+        @return: True if there are environment updates waiting for a deliberation.
+        """
+        return self._inbox is not None
+
+    async def pushAsync(self, data: dict) -> None:
+        """
+        Pushes an environment update to the inbox of the event-driven loop.
+        @param data: A Structure of type Dict. Contains only the environment keys that changed.
+        """
+        self._enqueue(data)
+
+    def push(self, data: dict) -> None:
+        """
+        Wraps the "pushAsync" method for synchronous calls.
+        Safe to call from any thread.
+        """
+        self._enqueue(data)
+
+    async def _deliberateOnChangeAsync(self) -> None:
+        """
+        Waits for environment updates and deliberates once for each burst of updates.
+        """
+        while True:
+            await self._inboxEvent.wait()
+            self._inboxEvent.clear()
+            enviroment = self._takeInbox()
+            if enviroment is None:
+                continue
+            await self.deliberateAsync(enviroment)
+            self._intentionsEvent.set()
+
+    async def _processIntentionsOnChangeAsync(self) -> None:
+        """
+        Processes the goal queue whenever a deliberation has inserted new intentions.
+        """
+        while True:
+            await self._intentionsEvent.wait()
+            self._intentionsEvent.clear()
+            if len(self._intentions) > 0:
+                await self.processIntentionsAsync()
+
+    async def runOnChangeAsync(self, data: dict | None = None) -> None:
+        """
+        Runs event-driven inference, until "stopLoop" is called.
+        Instead of deliberating every "delay" seconds, the processor idles until an update is pushed
+        (methods "push"/"pushAsync") and deliberates immediately after that.
+        Deliberation and goal processing run in parallel, as in "runInLoop".
+        @param data (optional): A Structure of type Dict. Contains the initial environment data.
+        """
+        self._inboxEvent = asyncio.Event()
+        self._intentionsEvent = asyncio.Event()
+        self._eventLoop = asyncio.get_running_loop()
+        self._eventTask = asyncio.current_task()
+        self._loopStopped = False
+        if data is not None:
+            with self._inboxLock:  # Updates pushed before the loop started are newer than the initial data
+                self._inbox = {**data, **(self._inbox or {})}
+        if self._inbox is not None:
+            self._inboxEvent.set()
+        self._eventStarted.set()
+        try:
+            await asyncio.gather(self._deliberateOnChangeAsync(), self._processIntentionsOnChangeAsync())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._eventLoop = None
+            self._eventTask = None
+            self._eventStarted.clear()
+
+    def runOnChange(self, data: dict | None = None) -> None:
+        """
+        Runs event-driven inference in a thread, without blocking program execution.
+        @param data (optional): A Structure of type Dict. Contains the initial environment data.
+        """
+        self._eventThread = Thread(target=asyncio.run, args=[
+                                   self.runOnChangeAsync(data)], daemon=True)
+        self._eventThread.start()
 
     def stopLoop(self) -> None:
         """
         Stop loop inference.
         """
+        self._looping = False
+        self._loopStopped = True
         if self._deliberateTimer is not None:
             self._deliberateTimer.cancel()
             self._deliberateTimer = None
         if self._intentionsTimer is not None:
             self._intentionsTimer.cancel()
             self._intentionsTimer = None
+        if self._eventThread is not None and self._eventThread.is_alive():
+            self._eventStarted.wait(1)
+        if self._eventLoop is not None and self._eventTask is not None:
+            self._eventLoop.call_soon_threadsafe(self._eventTask.cancel)
+        if self._eventThread is not None and self._eventThread is not current_thread():
+            self._eventThread.join()
+            self._eventThread = None
+
+
+class _NotSearch:
+    """
+    State of a "why not" search (see "AbstractExplainer.xNotAsync"): budgets, visited entities and memoized node expansions.
+    """
+
+    def __init__(self, maxDepth: int = 0, maxNodes: int = 0, timeBudget: float = 0):
+        self.maxDepth = maxDepth
+        self.maxNodes = maxNodes
+        self.deadline = time.perf_counter() + timeBudget if timeBudget > 0 else None
+        self.nodes = 0  # Expanded nodes
+        self.past: set[EntityId] = set()
+        # (entity, effect, activation time) -> (found causes, possible causes, unexplained causes)
+        self.memo: dict[tuple, tuple[int, int, tuple[EntityId, ...]]] = {}
+
+    def exhausted(self) -> bool:
+        """
+        True if the node or time budget is over.
+        """
+        if self.maxNodes > 0 and self.nodes >= self.maxNodes:
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def allows(self, r: int) -> bool:
+        """
+        True if a node at depth "r" can be expanded.
+        """
+        return not (self.maxDepth > 0 and r > self.maxDepth) and not self.exhausted()
 
 
 class AbstractExplainer(ABC):
@@ -577,17 +2133,22 @@ class AbstractExplainer(ABC):
     Represents an explanation generator.
     """
 
-    def __init__(self, executionHistory: AbstractExecutionHistory):
+    def __init__(self, executionHistory: AbstractExecutionHistory, registry: EntityRegistry | None = None, useProvenance: bool = True):
         """
         Constructor:
         @param executionHistory: Object responsible for saving inference states.
+        @param registry (optional): Registry of the explained entities. The default is the registry of the current scope.
+        @param useProvenance (optional): If True, "xHistory" follows the causes recorded in the states ("parentIds"),
+                                         instead of searching the history. States without recorded causes are still searched.
         """
         self._executionHistory = executionHistory
+        self.registry = registry if registry is not None else currentRegistry()
+        self.useProvenance = useProvenance
     # The "ExecutionHistory" interface already has its functionality supplied by the "executionHistory" object.
     # The "Description" interface is already supplied by the "desc" property of entities.
 
     @abstractmethod
-    async def causalFunction(self, state: State) -> list[str]:
+    async def causalFunction(self, id: EntityId) -> tuple[EntityId, ...]:
         """
         Associates possible causes to certain effects.
         For example, every belief is a possible cause for a goal.
@@ -596,80 +2157,214 @@ class AbstractExplainer(ABC):
         """
         pass
 
-    async def xHistoryAsync(self, effectHistEntry: State, r: int = 1, past: list[str] = set()) -> AsyncIterator[tuple[State, int]]:
+    async def xHistoryAsync(self, effectHistEntry: State, r: int = 1, past: set[EntityId] | None = None) -> AsyncIterator[tuple[State, int]]:
         """
         Why did state X (eg: Goal Promotion) happen?.
         @param effectHistEntry: instance of a subclass of the State class.
         """
+        if (past is None):
+            past = set()
         if (effectHistEntry.fromId in past):
             pass  # return
         else:
             past.add(effectHistEntry.fromId)
-        causes: list[State] = []
-        for c in await self.causalFunction(effectHistEntry.fromId):
-            hist = await self._executionHistory.getAsync(
-                {'fromIds': {c}, 'toIds': {effectHistEntry.fromId, ""}, 'maxTime': effectHistEntry.activationTime, 'limit': 1, 'order': 'desc'})
-            if (len(hist) > 0):
-                causes.append(hist[0])
-        causes.sort()
-        for causeHist in causes:
+        for causeHist in await self._causesAsync(effectHistEntry):
             yield [causeHist, r]
             async for nestedCause in self.xHistoryAsync(causeHist, r+1, past):
                 yield nestedCause
 
-    async def xNotAsync(self, effectHistEntry: State, r: int = 1, past: list[str] = set()) -> AsyncIterator[tuple[State, float, int]]:
+    async def _causesAsync(self, effectHistEntry: State) -> list[State]:
         """
-        Explains why state Z did not occur.
-        @param effectHistEntry: instance of a subclass of the State class.
-        @params inContrast: iterable tuples "[histEntry, r]"
+        @return: The states that caused a state (most recent first): the recorded ones ("parentIds"), or the latest state of each possible cause.
         """
-        if (effectHistEntry.fromId in past):
-            return
-        else:
-            past.add(effectHistEntry.fromId)
         causes: list[State] = []
-        toExplore: list[str] = []
+        if (self.useProvenance and effectHistEntry.parentIds is not None):
+            if (len(effectHistEntry.parentIds) > 0):
+                causes = await self._executionHistory.getByIdsAsync(effectHistEntry.parentIds)
+        else:
+            possibleCauses = await self.causalFunction(effectHistEntry.fromId)
+            if (len(possibleCauses) > 0):
+                latest = await self._executionHistory.getLatestAsync(set(possibleCauses), {effectHistEntry.fromId, ""}, effectHistEntry.activationTime)
+                causes = list(latest.values())
+        causes.sort()
+        return causes
+
+    async def _xHistoryTreeAsync(self, effectHistEntry: State, memo: dict[EntityId, asyncio.Future], limit: asyncio.Semaphore) -> list[tuple[State, int]]:
+        """
+        Same result as "xHistoryAsync", as a list. The explanation of each state is computed once per memo (shared by a batch),
+        and the causes of sibling states are looked up concurrently (at most "limit" queries at a time).
+        """
+        if (effectHistEntry.id in memo):
+            return await memo[effectHistEntry.id]
+        future = memo[effectHistEntry.id] = asyncio.get_running_loop().create_future()
+        try:
+            async with limit:
+                causes = await self._causesAsync(effectHistEntry)
+            trees = await asyncio.gather(*[self._xHistoryTreeAsync(cause, memo, limit) for cause in causes])
+            res = []
+            for cause, tree in zip(causes, trees):
+                res.append([cause, 1])
+                res.extend([[state, r+1] for state, r in tree])
+            future.set_result(res)
+            return res
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: other waiters (if any) get it too
+            raise
+
+    async def explainManyAsync(self, effectHistEntries: list[State], kind: str = "xHistory", concurrency: int = 16) -> AsyncIterator[tuple[int, list]]:
+        """
+        Explains many states at once (Ex: every failed action of the last hour).
+        Sub-explanations shared by several states are computed once, and history queries run concurrently.
+        @param effectHistEntries: instances of a subclass of the State class.
+        @param kind (optional): 'xHistory' or 'xNot'.
+        @param concurrency (optional): Maximum number of concurrent history queries ('xHistory') or explanations ('xNot').
+        @return: Tuples (index of the state in "effectHistEntries", explanation), in the order they complete.
+                 An explanation is the list of the items of "xHistoryAsync" or "xNotAsync".
+        """
+        if (kind not in ("xHistory", "xNot")):
+            raise ValueError("Invalid kind: " + str(kind))
+        limit = asyncio.Semaphore(max(1, concurrency))
+        historyMemo: dict[EntityId, asyncio.Future] = {}
+        notMemo: dict[tuple, tuple[int, int, tuple[EntityId, ...]]] = {}
+
+        async def explain(index: int, state: State) -> tuple[int, list]:
+            if (kind == "xHistory"):
+                return index, await self._xHistoryTreeAsync(state, historyMemo, limit)
+            async with limit:
+                search = _NotSearch()
+                search.memo = notMemo  # Node expansions do not depend on the query
+                return index, [item async for item in self._xNotAsync(state, 1, search)]
+        for completed in asyncio.as_completed([explain(index, state) for index, state in enumerate(effectHistEntries)]):
+            yield await completed
+
+    async def _expandNotAsync(self, effectHistEntry: State, search: _NotSearch) -> tuple[int, int, tuple[EntityId, ...]]:
+        """
+        Finds which possible causes of a state that did not occur have occurred, in the time window of the state.
+        @return: (Number of causes found, number of possible causes, possible causes not found).
+        """
+        key = (effectHistEntry.fromId, effectHistEntry.toId,
+               effectHistEntry.activationTime)
+        if key in search.memo:
+            return search.memo[key]
+        search.nodes += 1
         nanoSecond = 1e-6
         minTime = 0
-        score = 0
         lastSimilarHist = await self._executionHistory.getAsync({'toIds': {effectHistEntry.toId}, 'maxActivationTime': effectHistEntry.activationTime - nanoSecond, 'limit': 1, 'order': 'desc'})
         if (len(lastSimilarHist) > 0):
             minTime = lastSimilarHist[0].activationTime + nanoSecond
         possibleCauses = await self.causalFunction(effectHistEntry.fromId)
+        latest = {}
+        if (len(possibleCauses) > 0):
+            latest = await self._executionHistory.getLatestAsync(set(possibleCauses), {effectHistEntry.fromId, ""}, effectHistEntry.activationTime, minTime)
+        found = 0
+        toExplore: list[EntityId] = []
         for c in possibleCauses:
-            hist = await self._executionHistory.getAsync({'fromIds': {c}, 'toIds': {effectHistEntry.fromId, ""}, 'minTime': minTime, 'maxTime': effectHistEntry.activationTime, 'limit': 1, 'order': 'desc'})
-            if (len(hist) > 0):
-                causes.append(hist[0])
+            if (c in latest):
+                found += 1
             else:
                 toExplore.append(c)
-        score = 1/(r)*(len(causes)/(len(possibleCauses)+1))
+        res = search.memo[key] = (found, len(possibleCauses), tuple(toExplore))
+        return res
+
+    async def xNotAsync(self, effectHistEntry: State, r: int = 1, past: set[EntityId] | None = None, maxDepth: int = 0, maxNodes: int = 0, timeBudget: float = 0) -> AsyncIterator[tuple[State, float, int]]:
+        """
+        Explains why state Z did not occur.
+        Causes that did not occur are explained recursively (depth first). Each entity is explained once.
+        @param effectHistEntry: instance of a subclass of the State class.
+        @param maxDepth (optional): Maximum depth ("r") of the explored causes. 0 means no limit.
+        @param maxNodes (optional): Maximum number of explored states. 0 means no limit.
+        @param timeBudget (optional): Maximum search time, in seconds. 0 means no limit.
+        """
+        search = _NotSearch(maxDepth, maxNodes, timeBudget)
+        if past is not None:
+            search.past = past
+        async for resTuple in self._xNotAsync(effectHistEntry, r, search):
+            yield resTuple
+
+    async def _xNotAsync(self, effectHistEntry: State, r: int, search: _NotSearch) -> AsyncIterator[tuple[State, float, int]]:
+        if (effectHistEntry.fromId in search.past):
+            return
+        else:
+            search.past.add(effectHistEntry.fromId)
+        found, possible, toExplore = await self._expandNotAsync(effectHistEntry, search)
+        score = 1/(r)*(found/(possible+1))
         for c in toExplore:
+            if (not search.allows(r+1)):
+                break
             possibleHist = State(fromId=c, toId=effectHistEntry.fromId,
                                  activationTime=effectHistEntry.activationTime)
-            async for resTuple in self.xNotAsync(possibleHist, r+1):
+            async for resTuple in self._xNotAsync(possibleHist, r+1, search):
                 score += resTuple[1]
                 yield resTuple
-            past.add(effectHistEntry.fromId)
         yield [effectHistEntry, score, r]
 
+    async def xNotTopAsync(self, effectHistEntry: State, k: int = 0, maxDepth: int = 0, maxNodes: int = 0, timeBudget: float = 0) -> AsyncIterator[tuple[State, float, int]]:
+        """
+        Explains why state Z did not occur, returning the most relevant explanation sections first (best-first search).
+        Unlike "xNotAsync", the score of each section is only its own: 1/(r)*(len(causes)/(len(possibleCauses)+1)).
+        A section is returned as soon as no unexplored cause can have a higher score (a cause at depth r scores less than 1/r),
+        so the first results are available before the search ends.
+        @param effectHistEntry: instance of a subclass of the State class.
+        @param k (optional): Maximum number of returned sections. 0 means no limit.
+        @param maxDepth (optional): Maximum depth ("r") of the explored causes. 0 means no limit.
+        @param maxNodes (optional): Maximum number of explored states. 0 means no limit.
+        @param timeBudget (optional): Maximum search time, in seconds. 0 means no limit.
+        """
+        search = _NotSearch(maxDepth, maxNodes, timeBudget)
+        order = itertools.count()
+        frontier = [(-1.0, next(order), 1, effectHistEntry)]  # (-score upper bound, order, r, state)
+        results: list[tuple[float, int, list]] = []
+        returned = 0
+        while len(frontier) > 0:
+            _, _, r, state = heapq.heappop(frontier)
+            if (state.fromId in search.past):
+                continue
+            if (r > 1 and not search.allows(r)):
+                if (search.exhausted()):
+                    break
+                continue
+            search.past.add(state.fromId)
+            found, possible, toExplore = await self._expandNotAsync(state, search)
+            score = 1/(r)*(found/(possible+1))
+            heapq.heappush(results, (-score, next(order), [state, score, r]))
+            for c in toExplore:
+                heapq.heappush(frontier, (-1/(r+1), next(order), r+1, State(
+                    fromId=c, toId=state.fromId, activationTime=state.activationTime)))
+            bound = -frontier[0][0] if len(frontier) > 0 else 0
+            while len(results) > 0 and -results[0][0] >= bound:
+                yield heapq.heappop(results)[2]
+                returned += 1
+                if (k > 0 and returned >= k):
+                    return
+        while len(results) > 0:
+            yield heapq.heappop(results)[2]
+            returned += 1
+            if (k > 0 and returned >= k):
+                return
+
     def xHistory(self, effectHistEntry: State) -> Iterator[tuple[State, int]]:
         """
         Wraps the "whyAsync" method for synchronous calls.
         """
-        gen = self.xHistoryAsync(effectHistEntry)
-        while True:
-            try:
-                yield asyncio.run(gen.__anext__())
-            except StopAsyncIteration:
-                break
+        return iterSync(self.xHistoryAsync(effectHistEntry))
 
-    def xNot(self, effectHistEntry: State) -> AsyncIterator[tuple[State, float, int]]:
+    def xNot(self, effectHistEntry: State, maxDepth: int = 0, maxNodes: int = 0, timeBudget: float = 0) -> Iterator[tuple[State, float, int]]:
         """
         Wraps the "whyInsteadOfAsync" method for synchronous calls.
         """
-        gen = self.xNotAsync(effectHistEntry)
-        while True:
-            try:
-                yield asyncio.run(gen.__anext__())
-            except StopAsyncIteration:
-                break
+        return iterSync(self.xNotAsync(effectHistEntry, maxDepth=maxDepth,
+                                       maxNodes=maxNodes, timeBudget=timeBudget))
+
+    def explainMany(self, effectHistEntries: list[State], kind: str = "xHistory", concurrency: int = 16) -> Iterator[tuple[int, list]]:
+        """
+        Wraps the "explainManyAsync" method for synchronous calls.
+        """
+        return iterSync(self.explainManyAsync(effectHistEntries, kind, concurrency))
+
+    def xNotTop(self, effectHistEntry: State, k: int = 0, maxDepth: int = 0, maxNodes: int = 0, timeBudget: float = 0) -> Iterator[tuple[State, float, int]]:
+        """
+        Wraps the "xNotTopAsync" method for synchronous calls.
+        """
+        return iterSync(self.xNotTopAsync(effectHistEntry, k, maxDepth,
+                                          maxNodes, timeBudget))
@@ -1,7 +1,8 @@
-from ..core import AbstractExecutionHistory, State
+from ..core import AbstractExecutionHistory, State, EntityId, runSync, hasDiff
 import copy
 import bisect
-from deepdiff import DeepDiff
+import heapq
+from threading import Lock
 
 
 class InMemoryExecutionHistory(AbstractExecutionHistory):
@@ -13,6 +14,11 @@ class InMemoryExecutionHistory(AbstractExecutionHistory):
     def __init__(self, params={}):
         super().__init__(params)
         self.states: list[State] = []
+        # Index for "getLatestAsync": fromId -> states and their times, in ascending time order
+        self._fromTimes: dict[EntityId, list[float]] = {}
+        self._fromStates: dict[EntityId, list[State]] = {}
+        self._byId: dict[EntityId, State] = {}  # Index for "getByIdsAsync"
+        self._lock = Lock()  # Writers can run in different threads (Ex: the deliberate and process timers of "runInLoop")
 
     async def getAsync(self, filters: dict) -> list[State]:
         res: list[State] = []
@@ -20,7 +26,7 @@ class InMemoryExecutionHistory(AbstractExecutionHistory):
         if ('order' in filters):
             if (filters['order'] == 'asc'):
                 arr = arr[::-1]  # reversing using list slicing
-        for state in self.states:
+        for state in arr:
             satisfyConditions = True
             if ('id' in filters):
                 if (state.id != filters['id']):
@@ -31,11 +37,14 @@ class InMemoryExecutionHistory(AbstractExecutionHistory):
             if ('toIds' in filters):
                 if (not state.toId in filters['toIds']):
                     satisfyConditions = False
+            if ('cycleId' in filters):
+                if (state.cycleId != filters['cycleId']):
+                    satisfyConditions = False
             if ('time' in filters):
                 if (state.time != filters['time']):
                     satisfyConditions = False
             if ('value' in filters):
-                if (len(DeepDiff(state.value, filters['value'])) > 0):
+                if (hasDiff(state.value, filters['value'])):
                     satisfyConditions = False
             if ('minTime' in filters):
                 if (state.time < filters['minTime']):
@@ -57,6 +66,86 @@ class InMemoryExecutionHistory(AbstractExecutionHistory):
                 res.append(state)
         return res
 
+    def _index(self, state: State) -> None:
+        # Called with the lock held: "times" and "states" must stay aligned
+        self._byId[state.id] = state
+        times = self._fromTimes.setdefault(state.fromId, [])
+        states = self._fromStates.setdefault(state.fromId, [])
+        if len(times) == 0 or times[-1] <= state.time:  # Usual case: the most recent state
+            times.append(state.time)
+            states.append(state)
+        else:
+            i = bisect.bisect_right(times, state.time)
+            times.insert(i, state.time)
+            states.insert(i, state)
+
+    async def getByIdsAsync(self, ids: tuple[EntityId, ...]) -> list[State]:
+        return [self._byId[id] for id in ids if id in self._byId]
+
+    async def getLatestAsync(self, fromIds: set[EntityId], toIds: set[EntityId], maxTime: float, minTime: float | None = None) -> dict[EntityId, State]:
+        res: dict[EntityId, State] = {}
+        for fromId in fromIds:
+            times = self._fromTimes.get(fromId)
+            if times is None:
+                continue
+            states = self._fromStates[fromId]
+            i = bisect.bisect_right(times, maxTime) - 1
+            while i >= 0 and (minTime is None or times[i] >= minTime):
+                if states[i].toId in toIds:
+                    res[fromId] = states[i]
+                    break
+                i -= 1
+        return res
+
     async def addAsync(self, state: State) -> None:
         # Insert order is essential
-        bisect.insort(self.states, copy.deepcopy(state))
+        state = copy.deepcopy(state)
+        with self._lock:
+            bisect.insort(self.states, state)
+            self._index(state)
+
+    async def addManyAsync(self, states: list[State]) -> None:
+        # A single write: states become visible to readers all at once
+        batch = sorted(copy.deepcopy(states))
+        if len(batch) == 0:
+            return
+        with self._lock:
+            for state in reversed(batch):
+                self._index(state)
+            if len(self.states) == 0 or not self.states[0].time > batch[-1].time:
+                self.states[0:0] = batch  # Usual case: all states are the most recent
+            else:
+                self.states[:] = list(heapq.merge(batch, self.states))
+
+    async def discardBeforeAsync(self, minTime: float) -> int:
+        """
+        Retention: removes the states older than "minTime" (Ex: when memory is short, see MemoryInspector).
+        Explanations of the remaining states no longer reach the removed ones.
+        @return: Number of removed states.
+        """
+        with self._lock:
+            end = len(self.states)
+            while end > 0 and self.states[end - 1].time < minTime:  # States are in descending time order
+                end -= 1
+            removed = self.states[end:]
+            if len(removed) == 0:
+                return 0
+            del self.states[end:]
+            for state in removed:
+                self._byId.pop(state.id, None)
+            for fromId in {state.fromId for state in removed}:
+                times = self._fromTimes[fromId]
+                i = bisect.bisect_left(times, minTime)
+                if i == len(times):
+                    del self._fromTimes[fromId]
+                    del self._fromStates[fromId]
+                else:
+                    del times[:i]
+                    del self._fromStates[fromId][:i]
+        return len(removed)
+
+    def discardBefore(self, minTime: float) -> int:
+        """
+        Wraps the "discardBeforeAsync" method for synchronous calls.
+        """
+        return runSync(self.discardBeforeAsync(minTime))
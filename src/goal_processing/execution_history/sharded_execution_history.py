@@ -0,0 +1,43 @@
+from ..core import AbstractExecutionHistory, HistoryTransaction, State, EntityId
+import asyncio
+
+
+class ShardedExecutionHistory(AbstractExecutionHistory):
+    """
+    A read-only executionHistory that merges the histories of the shards of a ShardedRuntime.
+    Each query is sent to all shards concurrently, and the results are merged by time.
+    States are saved by the shards themselves (the processes that own the agents), so this view cannot save states:
+    "addAsync", "addManyAsync" and "transaction" raise a TypeError, and processors do not accept it.
+    Use it to read and explain (Ex: with an explainer).
+    """
+    readOnly = True
+
+    def __init__(self, params={}):
+        """
+        Constructor:
+        @param params: {'runtime': A instance of the class ShardedRuntime}
+        """
+        super().__init__(params)
+        self.runtime = params['runtime']
+
+    async def getAsync(self, filters: dict) -> list[State]:
+        results = await asyncio.gather(*[self.runtime.getShardHistoryAsync(shard, filters) for shard in range(self.runtime.shards)])
+        res: list[State] = [state for states in results for state in states]
+        res.sort()  # Same order as the shards: most recent first
+        if (filters.get('order') == 'asc'):
+            res.reverse()
+        if ('limit' in filters):
+            res = res[:filters['limit']]
+        return res
+
+    async def addAsync(self, state: State) -> None:
+        raise TypeError(_readOnlyMessage)
+
+    async def addManyAsync(self, states: list[State]) -> None:
+        raise TypeError(_readOnlyMessage)
+
+    def transaction(self, cycleId: EntityId = "") -> HistoryTransaction:
+        raise TypeError(_readOnlyMessage)
+
+
+_readOnlyMessage = "ShardedExecutionHistory is read-only: states are saved by the shards of the runtime"
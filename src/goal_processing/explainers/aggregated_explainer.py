@@ -0,0 +1,124 @@
+from ..core import State, AbstractExecutionHistory, EntityId, ExecutionPlan, EntityRegistry, runSync
+from .sequential_explainer import SequentialExplainer
+from collections.abc import Callable
+
+
+class AggregatedExplainer(SequentialExplainer):
+    """
+    Explains all the states of a time window at once (Ex: why did the Rescue goal fail 10,000 times today).
+    Effect states are grouped by entity, and their causal trees (the items of "xHistory") are merged into weighted cause frequencies.
+    The history is read in a single pass, in ascending time: the causes of each state are found when it is read,
+    from the latest state of each possible cause read so far (the same causal graph as SequentialExplainer).
+    """
+
+    def __init__(self, executionHistory: AbstractExecutionHistory, executionPlans: list[ExecutionPlan] | None = None, registry: EntityRegistry | None = None, useProvenance: bool = True):
+        """
+        Constructor:
+        @param executionHistory: Object responsible for saving inference states.
+        @param executionPlans (optional): Compiled agents ("Agent.compile"). Their static causes are used instead of inspecting the entities.
+        @param registry (optional): Registry of the explained entities. The default is the registry of the current scope.
+        @param useProvenance (optional): If True, the causes recorded in the states ("parentIds") are followed.
+        """
+        super().__init__(executionHistory, executionPlans, registry, useProvenance)
+
+    @staticmethod
+    def _entityOf(state: State) -> EntityId:
+        return state.toId if state.toId != "" else state.fromId
+
+    async def _directCausesAsync(self, state: State, latest: dict[tuple[EntityId, EntityId], State], byId: dict[EntityId, State]) -> tuple[State, ...]:
+        """
+        Same causes as "_causesAsync", from the states already read.
+        """
+        if (self.useProvenance and state.parentIds is not None):
+            return tuple(byId[id] for id in state.parentIds if id in byId)
+        causes = []
+        for c in await self.causalFunction(state.fromId):
+            candidates = [cause for cause in (latest.get((c, state.fromId)), latest.get((c, "")))
+                          if cause is not None and cause.time <= state.activationTime]
+            if (len(candidates) > 0):
+                causes.append(max(candidates, key=lambda cause: cause.time))
+        return tuple(causes)
+
+    @staticmethod
+    def _tree(id: EntityId, causes: dict[EntityId, tuple[State, ...]], memo: dict[EntityId, dict[tuple[EntityId, int], int]], maxDepth: int) -> dict[tuple[EntityId, int], int]:
+        """
+        Causal tree of a state: number of occurrences of each (cause entity, depth "r"), up to "maxDepth" (0 for no limit).
+        Trees are computed once per state and shared by the effects that have the state as a cause.
+        Causes are always older states, so the tree is built without recursion (long histories have long causal chains).
+        """
+        stack = [id]
+        while len(stack) > 0:
+            current = stack[-1]
+            if (current in memo):
+                stack.pop()
+                continue
+            pending = [cause.id for cause in causes.get(current, ()) if cause.id not in memo]
+            if (len(pending) > 0):
+                stack.extend(pending)
+                continue
+            stack.pop()
+            res: dict[tuple[EntityId, int], int] = {}
+            for cause in causes.get(current, ()):
+                key = (cause.fromId, 1)
+                res[key] = res.get(key, 0) + 1
+                for (entityId, r), n in memo[cause.id].items():
+                    if (maxDepth > 0 and r + 1 > maxDepth):
+                        continue
+                    key = (entityId, r + 1)
+                    res[key] = res.get(key, 0) + n
+            memo[current] = res
+        return memo[id]
+
+    async def aggregateAsync(self, minTime: float, maxTime: float, effects: Callable[[State], bool] | None = None, groupBy: Callable[[State], EntityId] | None = None, lookback: float = 0, maxDepth: int = 0) -> dict[EntityId, dict]:
+        """
+        Why did the states of a time window happen?
+        @param minTime: Start of the window (time of the states).
+        @param maxTime: End of the window (time of the states).
+        @param effects (optional): Function that selects the effect states of the window. The default is every state.
+        @param groupBy (optional): Function that returns the group of an effect state.
+                                   The default is the entity the state leads to ("toId"), or its origin ("fromId") when "toId" is empty.
+        @param lookback (optional): Seconds read before "minTime", so that causes older than the window are found.
+        @param maxDepth (optional): Maximum depth ("r") of the causes. The default (0) is no limit.
+        @return: For each group: {'effects': number of effect states,
+                                  'causes': {entity id: {'count': number of effects caused by the entity,
+                                                         'frequency': count / effects,
+                                                         'weight': mean of the sum of 1/r over the causal tree of each effect}}},
+                 with causes sorted by weight (highest first).
+        """
+        if (groupBy is None):
+            groupBy = self._entityOf
+        latest: dict[tuple[EntityId, EntityId], State] = {}
+        byId: dict[EntityId, State] = {}
+        causes: dict[EntityId, tuple[State, ...]] = {}
+        memo: dict[EntityId, dict[tuple[EntityId, int], int]] = {}
+        groups: dict[EntityId, dict] = {}
+        for state in await self._executionHistory.getAsync({'minTime': minTime - lookback, 'maxTime': maxTime, 'order': 'asc'}):
+            direct = await self._directCausesAsync(state, latest, byId)
+            if (len(direct) > 0):
+                causes[state.id] = direct
+            byId[state.id] = state
+            latest[(state.fromId, state.toId)] = state
+            if (state.time < minTime or (effects is not None and not effects(state))):
+                continue
+            group = groups.setdefault(groupBy(state), {'effects': 0, 'causes': {}})
+            group['effects'] += 1
+            weights: dict[EntityId, float] = {}
+            for (entityId, r), n in self._tree(state.id, causes, memo, maxDepth).items():
+                weights[entityId] = weights.get(entityId, 0) + n / r
+            for entityId, weight in weights.items():
+                cause = group['causes'].setdefault(entityId, {'count': 0, 'weight': 0})
+                cause['count'] += 1
+                cause['weight'] += weight
+        for group in groups.values():
+            for cause in group['causes'].values():
+                cause['frequency'] = cause['count'] / group['effects']
+                cause['weight'] = cause['weight'] / group['effects']
+            group['causes'] = dict(sorted(group['causes'].items(),
+                                          key=lambda item: item[1]['weight'], reverse=True))
+        return groups
+
+    def aggregate(self, minTime: float, maxTime: float, effects: Callable[[State], bool] | None = None, groupBy: Callable[[State], EntityId] | None = None, lookback: float = 0, maxDepth: int = 0) -> dict[EntityId, dict]:
+        """
+        Wraps the "aggregateAsync" method for synchronous calls.
+        """
+        return runSync(self.aggregateAsync(minTime, maxTime, effects, groupBy, lookback, maxDepth))
@@ -1,25 +1,57 @@
-from ..core import AbstractExplainer, State, AbstractExecutionHistory, Entity, Action
+from ..core import AbstractExplainer, State, AbstractExecutionHistory, Entity, EntityId, Attribute, BeliefReviewFunction, Action, Plan, Goal, Conflict, GoalPromotion, ExecutionPlan, EntityRegistry, resolveEntity
 
 
 class SequentialExplainer(AbstractExplainer):
-    def __init__(self, executionHistory: AbstractExecutionHistory):
-        super().__init__(executionHistory)
+    def __init__(self, executionHistory: AbstractExecutionHistory, executionPlans: list[ExecutionPlan] | None = None, registry: EntityRegistry | None = None, useProvenance: bool = True):
+        """
+        Constructor:
+        @param executionHistory: Object responsible for saving inference states.
+        @param executionPlans (optional): Compiled agents ("Agent.compile"). Their static causes are used instead of inspecting the entities.
+        @param registry (optional): Registry of the explained entities. The default is the registry of the current scope.
+        @param useProvenance (optional): If True, "xHistory" follows the causes recorded in the states ("parentIds").
+        """
+        super().__init__(executionHistory, registry, useProvenance)
+        # Causal graph: possible causes of each entity id.
+        # Filled on the first lookup of each entity, and kept up to date when attributes are related to entities.
+        self._causes: dict[EntityId, tuple[EntityId, ...]] = {}
+        self.executionPlans: list[ExecutionPlan] = list(executionPlans) if executionPlans is not None else []
+        for executionPlan in self.executionPlans:
+            self._causes.update(executionPlan.causes)
+        self.registry.addRelationListener(self._onRelation)
+        if self.registry is not Entity.byId:
+            Entity.byId.addRelationListener(self._onRelation)
 
-    async def causalFunction(State, id: str) -> list[str]:
-        if (not id in Entity.byId):
-            return []
-        if (Entity.byId[id].className() == "BeliefReviewFunction"):
-            return list(map(lambda e: e.id, Entity.byId[id].attrs))
-        if (Entity.byId[id].className() == "Action"):
-            return list(map(lambda e: e.id, Entity.byId[id].plans))
-        if (Entity.byId[id].className() == "Plan"):
-            return list(map(lambda e: e.id, Entity.byId[id].goals))
-        if (Entity.byId[id].className() == "Goal"):
-            return list(map(lambda e: e.id, Entity.byId[id].conflicts + Entity.byId[id].promotions))
-        if (Entity.byId[id].className() == "Conflict"):
-            return list(map(lambda e: e.id, Entity.byId[id].goals))
-        if ("Attribute" in Entity.byId[id].className()):
-            return list(map(lambda e: e.id, Entity.byId[id].relations))
-        if ("GoalPromotion" in Entity.byId[id].className()):
-            return list(map(lambda e: e.id, Entity.byId[id].attrs))
-        return []
+    def _onRelation(self, entity: Entity, attr: Attribute) -> None:
+        if entity.id in self._causes:  # Entities whose causes include their attributes (brfs, promotions and plans)
+            self._causes[entity.id] = self._causes[entity.id] + (attr.id,)
+        if attr.id in self._causes:
+            self._causes[attr.id] = self._causes[attr.id] + (entity.id,)
+
+    @staticmethod
+    def _computeCauses(entity: Entity) -> tuple[EntityId, ...]:
+        if isinstance(entity, BeliefReviewFunction):
+            related = entity.attrs
+        elif isinstance(entity, Action):
+            related = entity.plans
+        elif isinstance(entity, Plan):
+            related = entity.goals + entity.attrs
+        elif isinstance(entity, Goal):
+            related = entity.conflicts + entity.promotions
+        elif isinstance(entity, Conflict):
+            related = entity.goals
+        elif isinstance(entity, Attribute):
+            related = entity.relations
+        elif isinstance(entity, GoalPromotion):
+            related = entity.attrs
+        else:
+            related = []
+        return tuple(e.id for e in related)
+
+    async def causalFunction(self, id: EntityId) -> tuple[EntityId, ...]:
+        causes = self._causes.get(id)
+        if (causes is None):
+            entity = resolveEntity(id, self.registry)
+            if (entity is None):
+                return ()
+            causes = self._causes[id] = self._computeCauses(entity)
+        return causes
@@ -0,0 +1,252 @@
+from ..core import AbstractProcessor, AbstractExecutionHistory, Agent, IntentionQueue
+from ..processors.sequential_processor import SequentialProcessor
+from collections import deque
+from threading import Thread, Event
+import asyncio
+import time
+import traceback as tb
+
+
+class LatencyStats:
+    """
+    Latency statistics of a kind of work (Ex: deliberations of an agent).
+    Percentiles are computed over the most recent samples.
+    """
+
+    def __init__(self, maxSamples: int = 1024):
+        """
+        Constructor:
+        @param maxSamples (optional): Number of recent samples kept for the percentiles.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: deque[float] = deque(maxlen=maxSamples)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """
+        @param p: Percentile, between 0 and 100.
+        """
+        if len(self._samples) == 0:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count > 0 else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+
+class _HostedAgent:
+    """
+    Scheduling state of an agent registered in an AgentHost.
+    """
+
+    def __init__(self, processor: AbstractProcessor, weight: int):
+        self.processor = processor
+        self.weight = weight
+        self.queued = False  # True if it is in the ready queue
+        self.pushedAt: float | None = None  # Time of the first pending update
+        self.deliberateStats = LatencyStats()
+        self.processStats = LatencyStats()
+        self.reactionStats = LatencyStats()
+        self.errors = 0
+        self.lastError = ""
+
+    def hasWork(self) -> bool:
+        return self.processor.hasPendingUpdates() or len(self.processor._intentions) > 0
+
+
+class AgentHost:
+    """
+    Runs many agents in a single asyncio scheduler (a single thread),
+    instead of a pair of timer threads for each processor.
+    Agents are event-driven: they only deliberate when updates are pushed, and only process goals when their goal queue is not empty.
+    """
+
+    def __init__(self, executionHistory: AbstractExecutionHistory, processorClass: type[AbstractProcessor] = SequentialProcessor, scheduling: str = "round-robin"):
+        """
+        Constructor:
+        @param executionHistory: A instance of the type AbstractExecutionHistory subclass. Shared by all agents.
+        @param processorClass (optional): Processor used for each registered agent. The default is SequentialProcessor.
+        @param scheduling (optional): 'round-robin': each agent with pending work performs one unit of work (a deliberation or a goal queue processing) per turn.
+                                      'weighted': each agent performs up to "weight" units of work per turn.
+        """
+        if scheduling not in ("round-robin", "weighted"):
+            raise ValueError("Invalid scheduling: " + str(scheduling))
+        self.executionHistory = executionHistory
+        self.processorClass = processorClass
+        self.scheduling = scheduling
+        self._agents: dict[str, _HostedAgent] = {}
+        self._ready: deque[_HostedAgent] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeEvent: asyncio.Event | None = None
+        self._thread: Thread | None = None
+        self._started = Event()
+
+    def register(self, agent: Agent, data: dict | None = None, weight: int = 1, intentions: IntentionQueue | None = None) -> AbstractProcessor:
+        """
+        Registers an agent.
+        @param agent: A instance of the class Agent.
+        @param data (optional): A Structure of type Dict. Contains the initial environment data.
+        @param weight (optional): Units of work per turn, with 'weighted' scheduling.
+        @param intentions (optional): A instance of the class IntentionQueue for the agent's processor.
+        @return: The processor created for the agent.
+        @raise ValueError: If the goal queue has the overflow policy 'block': the scheduler processes the goals of an agent
+                           between its deliberations, so a deliberation cannot wait for free space.
+        """
+        if intentions is not None and intentions.overflowPolicy == "block":
+            raise ValueError("The 'block' overflow policy is not supported by AgentHost: use 'drop' or 'shed'")
+        processor = self.processorClass(
+            agent, self.executionHistory, intentions)
+        self._agents[agent.id] = _HostedAgent(processor, max(1, int(weight)))
+        if data is not None:
+            self.push(agent.id, data)
+        return processor
+
+    def unregister(self, agentId: str) -> None:
+        hosted = self._agents.pop(agentId, None)
+        if hosted is not None and hosted.queued:
+            self._ready.remove(hosted)
+
+    def processor(self, agentId: str) -> AbstractProcessor:
+        return self._agents[agentId].processor
+
+    def _markReady(self, hosted: _HostedAgent) -> None:
+        if not hosted.queued and hosted.processor.agent.id in self._agents:
+            hosted.queued = True
+            self._ready.append(hosted)
+            if self._wakeEvent is not None:
+                self._wakeEvent.set()
+
+    def push(self, agentId: str, data: dict) -> None:
+        """
+        Pushes an environment update to an agent. Safe to call from any thread.
+        @param agentId: Id of a registered agent.
+        @param data: A Structure of type Dict. Contains only the environment keys that changed.
+        """
+        hosted = self._agents[agentId]
+        if hosted.pushedAt is None:
+            hosted.pushedAt = time.perf_counter()
+        hosted.processor.push(data)
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._markReady, hosted)
+        else:
+            self._markReady(hosted)
+
+    async def pushAsync(self, agentId: str, data: dict) -> None:
+        self.push(agentId, data)
+
+    async def _stepAsync(self, hosted: _HostedAgent) -> bool:
+        """
+        Performs one unit of work of an agent.
+        @return: False if the agent had no pending work.
+        """
+        processor = hosted.processor
+        start = time.perf_counter()
+        try:
+            if processor.hasPendingUpdates():
+                pushedAt = hosted.pushedAt
+                hosted.pushedAt = None
+                await processor.deliberateAsync(processor._takeInbox())
+                end = time.perf_counter()
+                hosted.deliberateStats.add(end - start)
+                if pushedAt is not None:
+                    hosted.reactionStats.add(end - pushedAt)
+            elif len(processor._intentions) > 0:
+                await processor.processIntentionsAsync()
+                hosted.processStats.add(time.perf_counter() - start)
+            else:
+                return False
+        except Exception as e:
+            hosted.errors += 1
+            hosted.lastError = ''.join(
+                tb.format_exception(None, e, e.__traceback__))
+        return True
+
+    async def runAsync(self) -> None:
+        """
+        Runs the scheduler, until "stop" is called.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._wakeEvent = asyncio.Event()
+        for hosted in self._agents.values():
+            if hosted.hasWork():
+                self._markReady(hosted)
+        self._started.set()
+        try:
+            while True:
+                while len(self._ready) == 0:
+                    self._wakeEvent.clear()
+                    await self._wakeEvent.wait()
+                hosted = self._ready.popleft()
+                hosted.queued = False
+                units = hosted.weight if self.scheduling == "weighted" else 1
+                for _ in range(units):
+                    if not await self._stepAsync(hosted):
+                        break
+                if hosted.hasWork():
+                    self._markReady(hosted)
+                await asyncio.sleep(0)  # let pushes and other tasks in
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop = None
+            self._task = None
+            self._wakeEvent = None
+            self._started.clear()
+
+    def run(self) -> None:
+        """
+        Runs the scheduler in a thread, without blocking program execution.
+        """
+        self._thread = Thread(target=asyncio.run, args=[
+                              self.runAsync()], daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the scheduler.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._started.wait(1)
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self, agentId: str | None = None) -> dict:
+        """
+        Latency statistics (in seconds) of each agent.
+        'reaction' is the time between the first pushed update and the end of the deliberation that consumed it.
+        @param agentId (optional): Returns only the statistics of this agent.
+        """
+        if agentId is not None:
+            hosted = self._agents[agentId]
+            return {
+                'deliberate': hosted.deliberateStats.summary(),
+                'process': hosted.processStats.summary(),
+                'reaction': hosted.reactionStats.summary(),
+                'coalescedUpdates': hosted.processor.coalescedUpdates,
+                'intentions': hosted.processor.intentionsStats,
+                'errors': hosted.errors,
+                'lastError': hosted.lastError
+            }
+        return {id: self.stats(id) for id in self._agents}
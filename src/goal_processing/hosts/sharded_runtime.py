@@ -0,0 +1,250 @@
+from ..core import AbstractProcessor, AbstractExecutionHistory, DataContainer, Agent, State
+from ..processors.sequential_processor import SequentialProcessor
+from ..execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from ..execution_history.sharded_execution_history import ShardedExecutionHistory
+from ..explainers.sequential_explainer import SequentialExplainer
+from .agent_host import AgentHost
+from collections.abc import Callable
+from threading import Lock
+from typing import Any
+import multiprocessing
+import asyncio
+import copy
+import zlib
+import os
+import traceback as tb
+
+
+class SharedDataContainer(DataContainer):
+    """
+    DataContainer whose data is shared between processes (Ex: the agents channel in a ShardedRuntime).
+    The data lives in a multiprocessing manager, reached through a local IPC transport.
+    Each top-level key is read and written as a whole, under a lock shared by all processes.
+    """
+
+    def __init__(self, name: str, shared: Any, lock: Any):
+        """
+        Constructor:
+        @param name: Container name.
+        @param shared: A dict proxy created by a multiprocessing manager.
+        @param lock: A lock proxy created by the same multiprocessing manager.
+        """
+        self._shared = shared
+        self._lock = lock
+        super().__init__(name, shared.copy())
+
+    @property
+    def data(self) -> dict:
+        return self._shared.copy()
+
+    @data.setter
+    def data(self, value: dict) -> None:
+        with self._lock:
+            if self._shared.copy() != value:
+                self._shared.clear()
+                self._shared.update(value)
+
+    def set(self, path: str, value: Any) -> bool:
+        if path == "":
+            return super().set(path, value)
+        key = path.split('.')[0]
+        with self._lock:
+            local = DataContainer(
+                self.name, {key: self._shared[key]} if key in self._shared else {})
+            hasChange = local.set(path, value)
+            if hasChange:
+                self._shared[key] = local.data[key]
+        if hasChange:
+            self._notify(path)
+        return hasChange
+
+    def get(self, path: str) -> Any:
+        key = path.split('.')[0]
+        root = self._shared.get(key, None)
+        if root is None and not key in self._shared:
+            return False
+        return DataContainer(self.name, {key: root}).get(path)
+
+
+def _runShard(conn, channelName: str, channelData: Any, channelLock: Any, historyClass: type[AbstractExecutionHistory], processorClass: type[AbstractProcessor], scheduling: str) -> None:
+    """
+    Main function of a shard process. Hosts its agents in an AgentHost and answers the runtime commands.
+    """
+    channel = SharedDataContainer(channelName, channelData, channelLock)
+    host = AgentHost(historyClass(), processorClass, scheduling)
+    host.run()
+    host._started.wait()
+    agentIds: dict[str, str] = {}
+    pushErrors = {'count': 0, 'last': ""}  # Pushes are not answered (see "ShardedRuntime.push"): their errors are reported by "stats"
+
+    def call(coro) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, host._loop).result()
+
+    async def explain(state: State, kind: str) -> list:
+        explainer = SequentialExplainer(host.executionHistory)
+        if kind == "xNot":
+            return [item async for item in explainer.xNotAsync(state, 1, set())]
+        return [item async for item in explainer.xHistoryAsync(state, 1, set())]
+
+    while True:
+        command = conn.recv()
+        op = command[0]
+        if op == "push":
+            try:
+                host.push(agentIds[command[1]], command[2])
+            except Exception as e:
+                pushErrors['count'] += 1
+                pushErrors['last'] = ''.join(tb.format_exception(None, e, e.__traceback__))
+            continue
+        try:
+            if op == "register":
+                key, factory, data, weight = command[1:]
+                agent = factory(channel)
+                agentIds[key] = agent.id
+                host.register(agent, data, weight)
+                res = agent.id
+            elif op == "get":
+                res = call(host.executionHistory.getAsync(command[1]))
+            elif op == "explain":
+                res = call(explain(command[1], command[2]))
+            elif op == "stats":
+                res = dict(host.stats(agentIds[command[1]]), shardPushErrors=pushErrors['count'], shardLastPushError=pushErrors['last'])
+            elif op == "stop":
+                host.stop()
+                conn.send(("ok", None))
+                break
+            else:
+                raise ValueError("Unknown command: " + str(op))
+            conn.send(("ok", res))
+        except Exception as e:
+            conn.send(("error", ''.join(
+                tb.format_exception(None, e, e.__traceback__))))
+    conn.close()
+
+
+class ShardedRuntime:
+    """
+    Partitions agents across worker processes (shards), so CPU-bound belief revision and promotion functions use several cores.
+    Each shard runs an AgentHost with its own execution history.
+    Agents are assigned to shards by a stable hash of their key.
+    """
+
+    def __init__(self, shards: int = 0, historyClass: type[AbstractExecutionHistory] = InMemoryExecutionHistory, processorClass: type[AbstractProcessor] = SequentialProcessor, scheduling: str = "round-robin", channelName: str = "channel", context: str | None = None):
+        """
+        Constructor:
+        @param shards (optional): Number of worker processes. The default (0) is the number of CPU cores.
+        @param historyClass (optional): Execution history of each shard. The default is InMemoryExecutionHistory.
+        @param processorClass (optional): Processor of each agent. The default is SequentialProcessor.
+        @param scheduling (optional): Scheduling of the AgentHost of each shard ('round-robin' or 'weighted').
+        @param channelName (optional): Name of the channel shared by all agents.
+        @param context (optional): multiprocessing start method ('fork', 'spawn', 'forkserver'). The default is the platform default.
+                                   With 'spawn', agent factories must be importable module-level functions.
+        """
+        self._context = multiprocessing.get_context(context)
+        self.shards = shards if shards > 0 else (os.cpu_count() or 1)
+        self._manager = self._context.Manager()
+        channelData = self._manager.dict()
+        channelLock = self._manager.Lock()
+        self.channel = SharedDataContainer(
+            channelName, channelData, channelLock)
+        self._connections = []
+        self._locks: list[Lock] = []
+        self._processes = []
+        for _ in range(self.shards):
+            parentConn, childConn = self._context.Pipe()
+            process = self._context.Process(target=_runShard, args=[
+                childConn, channelName, channelData, channelLock, historyClass, processorClass, scheduling], daemon=True)
+            process.start()
+            childConn.close()
+            self._connections.append(parentConn)
+            self._locks.append(Lock())
+            self._processes.append(process)
+        self._agentIds: dict[str, str] = {}
+
+    def shardOf(self, key: str) -> int:
+        """
+        Stable assignment of an agent key to a shard (the same in every run and every process).
+        """
+        return zlib.crc32(key.encode()) % self.shards
+
+    def _send(self, shard: int, command: tuple) -> None:
+        with self._locks[shard]:
+            self._connections[shard].send(command)
+
+    def _request(self, shard: int, command: tuple) -> Any:
+        with self._locks[shard]:
+            self._connections[shard].send(command)
+            status, res = self._connections[shard].recv()
+        if status == "error":
+            raise RuntimeError("Shard " + str(shard) + " failed:\n" + res)
+        return res
+
+    def register(self, key: str, factory: Callable[[DataContainer], Agent], data: dict | None = None, weight: int = 1) -> str:
+        """
+        Creates an agent in its shard.
+        @param key: Unique agent key. Used to assign the agent to a shard.
+        @param factory: Function that receives the shared channel and returns a new Agent.
+                        It is sent to the shard process, so it must be picklable (Ex: a module-level function).
+        @param data (optional): A Structure of type Dict. Contains the initial environment data.
+        @param weight (optional): Units of work per turn, with 'weighted' scheduling.
+        @return: Id of the created agent.
+        """
+        agentId = self._request(self.shardOf(key),
+                                ("register", key, factory, data, weight))
+        self._agentIds[key] = agentId
+        return agentId
+
+    def push(self, key: str, data: dict) -> None:
+        """
+        Delivers an environment update to the shard of the agent.
+        The shard does not answer pushes: errors in the shard are counted in "stats" ('shardPushErrors').
+        @param key: Agent key.
+        @param data: A Structure of type Dict. Contains only the environment keys that changed.
+        @raise KeyError: If no agent was registered with the key.
+        """
+        if not key in self._agentIds:
+            raise KeyError("Unknown agent key: " + str(key))
+        self._send(self.shardOf(key), ("push", key, copy.deepcopy(data)))
+
+    async def pushAsync(self, key: str, data: dict) -> None:
+        self.push(key, data)
+
+    def history(self) -> ShardedExecutionHistory:
+        """
+        @return: A read-only execution history that merges the histories of all shards.
+        """
+        return ShardedExecutionHistory({'runtime': self})
+
+    async def getShardHistoryAsync(self, shard: int, filters: dict) -> list[State]:
+        return await asyncio.to_thread(self._request, shard, ("get", filters))
+
+    def xHistory(self, key: str, effectHistEntry: State) -> list[tuple[State, int]]:
+        """
+        Runs "xHistory" in the shard of the agent, where its entities live.
+        """
+        return self._request(self.shardOf(key), ("explain", effectHistEntry, "xHistory"))
+
+    def xNot(self, key: str, effectHistEntry: State) -> list[tuple[State, float, int]]:
+        """
+        Runs "xNot" in the shard of the agent, where its entities live.
+        """
+        return self._request(self.shardOf(key), ("explain", effectHistEntry, "xNot"))
+
+    def stats(self, key: str) -> dict:
+        """
+        Latency statistics of an agent (see AgentHost.stats), and the number of failed pushes of its shard
+        ('shardPushErrors', with the last error in 'shardLastPushError').
+        """
+        return self._request(self.shardOf(key), ("stats", key))
+
+    def stop(self) -> None:
+        """
+        Stops all shards.
+        """
+        for shard, process in enumerate(self._processes):
+            if process.is_alive():
+                self._request(shard, ("stop",))
+            process.join()
+        for conn in self._connections:
+            conn.close()
+        self._manager.shutdown()
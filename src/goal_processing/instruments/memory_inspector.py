@@ -0,0 +1,234 @@
+from ..core import AbstractProcessor, AbstractExecutionHistory, EntityRegistry, DataContainer, Entity
+from collections import deque
+from collections.abc import Callable
+from threading import Timer, Lock
+from typing import Any
+import itertools
+import sys
+import time
+
+_atoms = (str, bytes, int, float, bool, complex, type(None))
+
+
+def approximateSize(obj: Any, sampleSize: int = 100, _seen: set[int] | None = None) -> int:
+    """
+    Approximate deep size of an object, in bytes.
+    Collections with more than "sampleSize" elements are measured on an evenly spaced sample of their elements, and extrapolated.
+    Entities are measured shallowly (they belong to the registries), and objects shared by several parts are counted once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, _atoms) or isinstance(obj, type) or callable(obj):
+        return size
+    if isinstance(obj, Entity):
+        return size + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+    if isinstance(obj, dict):
+        items = list(obj.items())  # A copy: the object can change in another thread
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        items = list(obj)
+    elif hasattr(obj, "__dict__"):
+        _seen.add(id(obj.__dict__))
+        return size + sys.getsizeof(obj.__dict__) + approximateSize(list(obj.__dict__.values()), sampleSize, _seen) - sys.getsizeof([])
+    elif hasattr(obj, "__slots__"):
+        return size + sum(approximateSize(getattr(obj, slot), sampleSize, _seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    else:
+        return size
+    if len(items) == 0:
+        return size
+    step = max(1, len(items) // sampleSize)
+    sampled = 0
+    count = 0
+    for item in itertools.islice(items, 0, None, step):
+        sampled += approximateSize(item, sampleSize, _seen)
+        count += 1
+    return size + sampled * len(items) // count
+
+
+class MemoryInspector:
+    """
+    Reports the approximate size (bytes) and element counts of the structures that grow with the execution:
+    execution histories (states, indexes and state values), entity registries, DataContainers (attributes and data)
+    and goal queues (cloned goals). Reports can be sampled periodically, and callbacks can be called when thresholds are crossed
+    (Ex: to discard old states of the history, or to shed goals).
+    """
+
+    def __init__(self, processors: list[AbstractProcessor] | None = None, histories: list[AbstractExecutionHistory] | None = None, registries: list[EntityRegistry] | None = None, containers: list[DataContainer] | None = None, sampleSize: int = 100, maxSamples: int = 1000):
+        """
+        Constructor:
+        @param processors (optional): Processors whose history, registry, containers (beliefs, channel, environment) and goal queue are inspected.
+        @param histories (optional): Other histories. Their sizes are reported if they keep their states in a "states" list (Ex: InMemoryExecutionHistory).
+        @param registries (optional): Other registries. The default registry ("Entity.byId") is always inspected.
+        @param containers (optional): Other DataContainers.
+        @param sampleSize (optional): Number of elements measured in each large collection (see "approximateSize").
+        @param maxSamples (optional): Number of periodic reports kept.
+        """
+        processors = list(processors) if processors is not None else []
+        self.processors = processors
+        self.sampleSize = sampleSize
+        self.histories = self._unique([processor.executionHistory for processor in processors] + list(histories or []))
+        self.registries = self._unique([Entity.byId] + [processor.agent.registry for processor in processors] + list(registries or []))
+        self.containers = self._unique([c for processor in processors for c in (processor.agent.beliefs, processor.agent.channel, processor._envContainer)] + list(containers or []))
+        self.samples: deque[tuple[float, dict]] = deque(maxlen=maxSamples)
+        self._thresholds: list[dict] = []
+        self._timer: Timer | None = None
+        self._running = False
+        self._lock = Lock()
+
+    @staticmethod
+    def _unique(objs: list) -> list:
+        res = []
+        for obj in objs:
+            if not any(obj is other for other in res):
+                res.append(obj)
+        return res
+
+    def _historyReport(self, history: AbstractExecutionHistory) -> dict:
+        states = getattr(history, "states", None)
+        res = {'name': type(history).__name__, 'states': None, 'bytes': None, 'valueBytes': None, 'indexBytes': None}
+        if states is None:
+            return res
+        states = list(states)
+        seen: set[int] = set()
+        res['states'] = len(states)
+        res['bytes'] = approximateSize(states, self.sampleSize, seen)
+        values = [state.value for state in itertools.islice(states, 0, None, max(1, len(states) // self.sampleSize))]
+        res['valueBytes'] = approximateSize(values, self.sampleSize, set()) * len(states) // len(values) if len(values) > 0 else 0
+        indexBytes = 0
+        for name in ("_fromTimes", "_fromStates", "_byId"):  # Indexes of InMemoryExecutionHistory (references to the states)
+            index = getattr(history, name, None)
+            if index is not None:
+                indexBytes += sys.getsizeof(index) + sum(sys.getsizeof(v) for v in list(index.values()) if isinstance(v, list))
+        res['indexBytes'] = indexBytes
+        return res
+
+    def _registryReport(self, registry: EntityRegistry) -> dict:
+        ids = list(registry._byId)
+        entities = [registry.get(id) for id in itertools.islice(ids, 0, None, max(1, len(ids) // self.sampleSize))]
+        entityBytes = sum(approximateSize(entity, self.sampleSize) for entity in entities if entity is not None)
+        return {
+            'name': registry.name,
+            'entities': len(ids),
+            'bytes': sys.getsizeof(registry._byId) + sys.getsizeof(registry._handles) + sys.getsizeof(registry._byHandle) +
+            (entityBytes * len(ids) // len(entities) if len(entities) > 0 else 0)
+        }
+
+    def _containerReport(self, container: DataContainer) -> dict:
+        attrs = list(container.attrs.values())
+        sample = attrs[::max(1, len(attrs) // self.sampleSize)]
+        return {
+            'name': container.name,
+            'attributes': len(attrs),
+            'bytes': sys.getsizeof(container.attrs) + sys.getsizeof(container._lastWrites) +
+            (sum(approximateSize(attr, self.sampleSize) for attr in sample) * len(attrs) // len(sample) if len(sample) > 0 else 0),
+            'dataBytes': approximateSize(container.data, self.sampleSize)
+        }
+
+    def _intentionsReport(self, processor: AbstractProcessor) -> dict:
+        goals = list(processor._intentions)
+        sample = goals[::max(1, len(goals) // self.sampleSize)]
+        goalBytes = 0
+        for goal in sample:  # Clones share promotions and plans: only their instance state is counted
+            goalBytes += sys.getsizeof(goal) + sys.getsizeof(goal.__dict__) + approximateSize(goal.status, self.sampleSize) + approximateSize(goal.stateIds, self.sampleSize)
+        return {
+            'name': processor.agent.desc or str(processor.agent.id),
+            'goals': len(goals),
+            'bytes': goalBytes * len(goals) // len(sample) if len(sample) > 0 else 0
+        }
+
+    def report(self) -> dict:
+        """
+        @return: {
+                    'time': time of the report,
+                    'histories': [{'name', 'states', 'bytes', 'valueBytes', 'indexBytes'}],
+                    'registries': [{'name', 'entities', 'bytes'}],
+                    'containers': [{'name', 'attributes', 'bytes', 'dataBytes'}],
+                    'intentions': [{'name', 'goals', 'bytes'}],
+                    'totals': {'historyStates', 'historyBytes', 'entities', 'registryBytes', 'attributes', 'containerBytes',
+                               'goals', 'intentionBytes', 'bytes'}
+                 }
+                 Sizes are approximate. "valueBytes" (the values of the states) is included in "bytes".
+        """
+        for attempt in range(3):
+            try:
+                res = {
+                    'time': time.time(),
+                    'histories': [self._historyReport(history) for history in self.histories],
+                    'registries': [self._registryReport(registry) for registry in self.registries],
+                    'containers': [self._containerReport(container) for container in self.containers],
+                    'intentions': [self._intentionsReport(processor) for processor in self.processors]
+                }
+                break
+            except RuntimeError:  # A structure changed during the copy (another thread)
+                if attempt == 2:
+                    raise
+        totals = {
+            'historyStates': sum(h['states'] or 0 for h in res['histories']),
+            'historyBytes': sum((h['bytes'] or 0) + (h['indexBytes'] or 0) for h in res['histories']),
+            'entities': sum(r['entities'] for r in res['registries']),
+            'registryBytes': sum(r['bytes'] for r in res['registries']),
+            'attributes': sum(c['attributes'] for c in res['containers']),
+            'containerBytes': sum(c['bytes'] + c['dataBytes'] for c in res['containers']),
+            'goals': sum(i['goals'] for i in res['intentions']),
+            'intentionBytes': sum(i['bytes'] for i in res['intentions'])
+        }
+        totals['bytes'] = totals['historyBytes'] + totals['registryBytes'] + totals['containerBytes'] + totals['intentionBytes']
+        res['totals'] = totals
+        return res
+
+    def addThreshold(self, key: str, limit: float, callback: Callable[[str, float, dict], None]) -> None:
+        """
+        Calls "callback(key, value, report)" when a total of the report crosses a limit (upwards).
+        The callback is called again only after the total has gone back below the limit.
+        @param key: A key of the 'totals' of the report (Ex: 'historyStates' or 'bytes').
+        @param limit: The limit.
+        @param callback: Function that receives the key, its value and the report. Ex: a retention or shedding function.
+        """
+        self._thresholds.append({'key': key, 'limit': limit, 'callback': callback, 'crossed': False})
+
+    def check(self) -> dict:
+        """
+        Takes a report, keeps it in "samples", and calls the callbacks of the crossed thresholds.
+        @return: The report.
+        """
+        with self._lock:
+            report = self.report()
+            self.samples.append((report['time'], report))
+            for threshold in self._thresholds:
+                value = report['totals'][threshold['key']]
+                if value >= threshold['limit']:
+                    if not threshold['crossed']:
+                        threshold['crossed'] = True
+                        threshold['callback'](threshold['key'], value, report)
+                else:
+                    threshold['crossed'] = False
+        return report
+
+    def _runTimer(self, interval: float) -> None:
+        if not self._running:
+            return
+        self.check()
+        if not self._running:
+            return
+        self._timer = Timer(interval, self._runTimer, [interval])
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self, interval: float = 10) -> None:
+        """
+        Checks the memory periodically, with a Thread timer.
+        @param interval (optional): Seconds between reports. The default is 10.
+        """
+        self._running = True
+        self._timer = Timer(interval, self._runTimer, [interval])
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
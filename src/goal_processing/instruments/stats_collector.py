@@ -0,0 +1,125 @@
+from ..core import Instrument, EntityId
+from threading import Lock
+from typing import Any
+import time
+
+
+class _Timing:
+    """
+    Call counter and latency histogram of an entity.
+    Buckets are powers of two of microseconds: bucket "i" counts the calls that took less than 2^i microseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: list[int] = []
+
+    def add(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        if bucket >= len(self.buckets):
+            self.buckets.extend([0] * (bucket + 1 - len(self.buckets)))
+        self.buckets[bucket] += 1
+
+    def percentile(self, p: float) -> float:
+        """
+        @return: Upper bound (seconds) of the bucket of the percentile "p" (between 0 and 100).
+        """
+        rank = self.count * p / 100
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n > 0:
+                return (2 ** bucket) / 1e6
+        return 0.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total': self.total,
+            'mean': self.total / self.count if self.count > 0 else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'histogram': {(2 ** bucket) / 1e6: n for bucket, n in enumerate(self.buckets) if n > 0}
+        }
+
+
+class StatsCollector(Instrument):
+    """
+    Low-overhead instrument: call counts and latency histograms of each entity (by kind of work),
+    the duration of the processing cycles, and the last/maximum value of the gauges (Ex: the size of the goal queue).
+    Use: "processor.addInstrument(collector)", then "collector.stats()".
+    A collector can be shared by several processors.
+    """
+
+    def __init__(self):
+        self._timings: dict[tuple[str, EntityId], _Timing] = {}
+        self._gauges: dict[str, dict] = {}
+        self._lock = Lock()  # Timer threads of "runInLoop" deliberate and process concurrently
+
+    def begin(self, kind: str, entityId: EntityId) -> Any:
+        return (kind, entityId, time.perf_counter())
+
+    def end(self, token: Any, error: BaseException | None) -> None:
+        seconds = time.perf_counter() - token[2]
+        key = (token[0], token[1])
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = _Timing()
+            timing.add(seconds, error is not None)
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            gauge = self._gauges.get(name)
+            if gauge is None:
+                self._gauges[name] = {'last': value, 'max': value}
+            else:
+                gauge['last'] = value
+                if value > gauge['max']:
+                    gauge['max'] = value
+
+    def stats(self, kind: str | None = None) -> dict:
+        """
+        @param kind (optional): Returns only the statistics of this kind of work (Ex: 'brf').
+        @return: {
+                    'timings': {kind: {entity id: {'count', 'errors', 'total', 'mean', 'max', 'p50', 'p95', 'p99', 'histogram'}}},
+                    'gauges': {name: {'last', 'max'}}
+                 }
+                 Times are in seconds. Percentiles are upper bounds of the histogram buckets ({upper bound: count}).
+                 Cycle durations are the timings of the kinds 'deliberate' (by agent) and 'intention' (by goal).
+                 'processIntentions' (by agent) is the duration of each drain of the goal queue.
+        """
+        timings: dict[str, dict] = {}
+        with self._lock:
+            for (k, entityId), timing in self._timings.items():
+                if kind is None or k == kind:
+                    timings.setdefault(k, {})[entityId] = timing.summary()
+            gauges = {name: dict(gauge) for name, gauge in self._gauges.items()}
+        return {'timings': timings, 'gauges': gauges}
+
+    def slowest(self, n: int = 10) -> list[tuple[str, EntityId, float]]:
+        """
+        @return: The "n" (kind, entity id, total seconds) with the highest total time, excluding cycles and history calls.
+        """
+        with self._lock:
+            res = [(kind, entityId, timing.total) for (kind, entityId), timing in self._timings.items()
+                   if kind not in ("deliberate", "intention", "processIntentions") and not kind.startswith("history.")]
+        res.sort(key=lambda item: item[2], reverse=True)
+        return res[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings = {}
+            self._gauges = {}
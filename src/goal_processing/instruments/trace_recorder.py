@@ -0,0 +1,154 @@
+from ..core import Instrument, EntityId, Entity, currentCycleId, resolveEntity
+from collections import deque
+from threading import Lock
+from typing import Any
+import contextvars
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+_unsampled = object()  # Current span of the work done inside a root span that is not recorded
+
+
+class Span:
+    """
+    A unit of work of a processor (see "Instrument"), with its parent span.
+    """
+
+    __slots__ = ("id", "parentId", "kind", "entityId", "cycleId", "thread", "start", "end", "error", "children")
+
+    def __init__(self, id: int, parentId: int | None, kind: str, entityId: EntityId, cycleId: EntityId, thread: int, start: float):
+        self.id = id
+        self.parentId = parentId
+        self.kind = kind
+        self.entityId = entityId
+        self.cycleId = cycleId
+        self.thread = thread
+        self.start = start  # Seconds (time.perf_counter)
+        self.end: float | None = None
+        self.error: str | None = None
+        self.children: list[Span] = []  # Finished children, until the root span ends
+
+    def toDict(self) -> dict:
+        return {'id': self.id, 'parentId': self.parentId, 'kind': self.kind, 'entityId': self.entityId, 'cycleId': self.cycleId,
+                'thread': self.thread, 'start': self.start, 'end': self.end, 'error': self.error}
+
+
+class TraceRecorder(Instrument):
+    """
+    Records the spans of processing cycles (deliberations and drains of the goal queue) and of the work done inside them
+    (BRFs, promotions, conflict detection, plan selection, actions, history calls), with their parent/child relations and cycle ids.
+    Concurrent cycles (Ex: the deliberate and process ticks of "runInLoop") are recorded in their own threads/tasks.
+    Traces are kept in memory and exported to a Chrome trace-event file ("exportChromeTrace"),
+    which can be loaded in a trace viewer (Ex: chrome://tracing or https://ui.perfetto.dev).
+    """
+
+    def __init__(self, sampleRate: float = 1.0, minDuration: float = 0, maxSpans: int = 100000, kinds: set[str] | None = None):
+        """
+        Constructor:
+        @param sampleRate (optional): Probability of recording a root span (a span without parent) and the spans inside it.
+        @param minDuration (optional): Root spans shorter than this (in seconds) are discarded with the spans inside them,
+                                       so that only slow cycles are kept.
+        @param maxSpans (optional): Number of recent spans kept. Older spans are discarded.
+        @param kinds (optional): Kinds of work recorded (Ex: {'deliberate', 'brf'}). The default is every kind.
+                                 Work of other kinds is not recorded, but the spans inside it are.
+        """
+        self.sampleRate = sampleRate
+        self.minDuration = minDuration
+        self.kinds = kinds
+        self._spans: deque[Span] = deque(maxlen=maxSpans)
+        self._current: contextvars.ContextVar = contextvars.ContextVar(
+            "currentSpan", default=None)  # One per recorder: recorders sample independently
+        self._ids = itertools.count(1)
+        self._lock = Lock()
+        self._origin = time.perf_counter()
+        self._originTime = time.time()
+
+    def begin(self, kind: str, entityId: EntityId) -> Any:
+        parent = self._current.get()
+        if parent is _unsampled:
+            return None
+        if parent is None and self.sampleRate < 1 and random.random() >= self.sampleRate:
+            return (self._current.set(_unsampled), None)
+        if self.kinds is not None and kind not in self.kinds:
+            return None
+        span = Span(next(self._ids), parent.id if parent is not None else None, kind, entityId,
+                    currentCycleId(), threading.get_ident(), time.perf_counter())
+        return (self._current.set(span), span)
+
+    def end(self, token: Any, error: BaseException | None) -> None:
+        if token is None:
+            return
+        contextToken, span = token
+        try:
+            self._current.reset(contextToken)
+        except ValueError:  # Ended in another context
+            pass
+        if span is None:
+            return
+        span.end = time.perf_counter()
+        if error is not None:
+            span.error = type(error).__name__ + ": " + str(error)
+        if span.parentId is not None:
+            parent = self._current.get()
+            if isinstance(parent, Span):
+                parent.children.append(span)
+            return
+        if span.end - span.start < self.minDuration:
+            return
+        spans = [span]
+        with self._lock:
+            while len(spans) > 0:
+                current = spans.pop()
+                self._spans.append(current)
+                spans.extend(current.children)
+                current.children = []
+
+    def spans(self) -> list[dict]:
+        """
+        @return: The recorded spans (as dicts), ordered by start. Times are seconds since the creation of the recorder.
+        """
+        with self._lock:
+            spans = [span.toDict() for span in self._spans]
+        for span in spans:
+            span['start'] -= self._origin
+            span['end'] -= self._origin
+        spans.sort(key=lambda span: span['start'])
+        return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    @staticmethod
+    def _name(kind: str, entityId: EntityId) -> str:
+        entity: Entity | None = resolveEntity(entityId) if entityId != "" else None
+        if entity is None:
+            return kind
+        return kind + ": " + entity.className() + (" - " + entity.desc if entity.desc else "")
+
+    def toChromeTrace(self) -> dict:
+        """
+        @return: The recorded spans in the Chrome trace-event format (complete events, times in microseconds).
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans():
+            args = {'spanId': span['id'], 'parentId': span['parentId'], 'entityId': str(span['entityId']),
+                    'cycleId': str(span['cycleId'])}
+            if span['error'] is not None:
+                args['error'] = span['error']
+            events.append({'name': self._name(span['kind'], span['entityId']), 'cat': span['kind'], 'ph': 'X',
+                           'ts': span['start'] * 1e6, 'dur': (span['end'] - span['start']) * 1e6,
+                           'pid': pid, 'tid': span['thread'], 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'startTime': self._originTime}}
+
+    def exportChromeTrace(self, path: str) -> None:
+        """
+        Writes the recorded spans to a JSON file in the Chrome trace-event format.
+        """
+        with open(path, "w") as f:
+            json.dump(self.toChromeTrace(), f)
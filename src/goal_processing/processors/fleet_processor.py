@@ -0,0 +1,179 @@
+from ..core import AbstractExecutionHistory, Agent, Goal, GoalPromotion, State, IntentionQueue, Instrument, Clock, currentClock, currentHistory, runSync
+from .sequential_processor import SequentialProcessor
+from collections.abc import Callable
+import copy
+import numpy as np
+
+
+class FleetProcessor:
+    """
+    Processes a fleet of homogeneous agents: agents built from the same Goal/GoalPromotion definitions, with different beliefs.
+    Belief revision and goal processing are performed for each agent (by a SequentialProcessor),
+    but promotions that define "batchF" are evaluated for every agent in a single vectorized call.
+    Promotions without "batchF" are evaluated for each agent, as in the SequentialProcessor.
+    The processors of the agents ("processors") report their inputs (Ex: to an InputRecorder) and the hooks of their instruments
+    (see "addInstrument"). The 'deliberate' cycle of each agent covers the deliberation of the whole fleet.
+    """
+
+    def __init__(self, agents: list[Agent], executionHistory: AbstractExecutionHistory, intentions: Callable[[], IntentionQueue] | None = None, recordReads: bool = True, clock: Clock | None = None):
+        """
+        Constructor:
+        @param agents: A list of instances of the class Agent. Goals and promotions must be in the same order in all agents.
+        @param executionHistory: A instance of the type AbstractExecutionHistory subclass. Shared by all agents.
+        @param intentions (optional): Function that returns a new IntentionQueue, for the goal queue of each agent.
+        @param recordReads (optional): If True, the belief reads of batched promotions are saved in the history, as in "createGet".
+                                       Required for explanations that go beyond the promotion.
+        @param clock (optional): Clock of the states saved by the fleet. The default is the clock of the current scope (real time).
+        """
+        if len(agents) == 0:
+            raise ValueError("A fleet must have at least one agent")
+        shape = self._shape(agents[0])
+        for agent in agents:
+            if self._shape(agent) != shape:
+                raise ValueError(
+                    "Agents of a fleet must have the same goals and promotions")
+        self.agents = list(agents)
+        self.executionHistory = executionHistory
+        self.recordReads = recordReads
+        self.clock = clock if clock is not None else currentClock()
+        self.processors = [SequentialProcessor(agent, executionHistory, intentions() if intentions is not None else None, self.clock)
+                           for agent in self.agents]
+
+    @staticmethod
+    def _shape(agent: Agent) -> list[tuple]:
+        return [tuple(promotion.name for promotion in goal.promotions) for goal in agent.goals]
+
+    async def _readColumnsAsync(self, promotions: list[GoalPromotion], active: list[int], reads: list[dict], clones: list[Goal]) -> dict:
+        """
+        Reads the beliefs of a batched promotion for the active agents.
+        If "recordReads", the reads are saved as "createGet" does, in a single write.
+        @return: A dict {path: NumPy array with the belief value of each active agent}.
+        """
+        columns = {}
+        states = []
+        now = self.clock.now()
+        for path in promotions[active[0]].paths:
+            values = [self.agents[k].beliefs.get(path) for k in active]
+            columns[path] = np.array(values)
+            for k, value in zip(active, values):
+                clones[k].context[path] = copy.deepcopy(value)
+                if self.recordReads and value is not None:
+                    beliefs = self.agents[k].beliefs
+                    attr = beliefs.relate(path, promotions[k])
+                    state = State(attr.id, promotions[k].id, now, now, copy.deepcopy(value), parentIds=beliefs.lastWriteOf(attr.id))
+                    reads[k][attr.id] = state.id
+                    states.append(state)
+        if len(states) > 0:
+            await currentHistory(self.executionHistory).addManyAsync(states)
+        return columns
+
+    async def _promoteGoalAsync(self, goalIndex: int) -> None:
+        """
+        Promotes the goal "goalIndex" of every agent.
+        """
+        clones: list[Goal] = [processor.agent.goals[goalIndex].getClone()
+                              for processor in self.processors]
+        chains = [processor.executionPlan.promotions[processor._goalIndex(clone)]
+                  for processor, clone in zip(self.processors, clones)]
+        active = list(range(len(clones)))
+        for promotionIndex in range(len(chains[0])):
+            promotions = [chain[promotionIndex] for chain in chains]
+            stillActive = []
+            reads: list[dict] = [{} for _ in clones]  # Provenance of the promotion of each agent
+            if promotions[0].batchF is not None:
+                columns = await self._readColumnsAsync(promotions, active, reads, clones)
+                priorities = np.array([clones[k].priority for k in active])
+                newPriorities, rejected = promotions[0].batchF(
+                    columns, priorities)
+                newPriorities = np.broadcast_to(newPriorities, len(active))
+                rejected = np.broadcast_to(rejected, len(active))
+                for i, k in enumerate(active):
+                    if not rejected[i]:
+                        stillActive.append((k, newPriorities[i].item()))
+            else:
+                for k in active:
+                    incPriority = await self.processors[k]._probe("promotion", promotions[k].id, promotions[k].f)(self.agents[k].beliefs.createGet(currentHistory(self.executionHistory), promotions[k].id, reads=reads[k], context=clones[k].context), clones[k].priority)
+                    if (incPriority is not None):
+                        stillActive.append((k, incPriority))
+            active = []
+            for k, incPriority in stillActive:
+                clones[k].promote(promotions[k].name, incPriority)
+                now = self.clock.now()
+                state = State(promotions[k].id, clones[k].id, now, now, {'incPriority': incPriority, 'cloneId': clones[k].cloneId}, parentIds=tuple(reads[k].values()) if self.recordReads else None)
+                clones[k].stateIds.append(state.id)
+                await self.processors[k]._history.addAsync(state)
+                active.append(k)
+            if len(active) == 0:
+                break
+        for k in active:
+            if clones[k].isInFinalState():
+                await self.processors[k]._admitIntentionAsync(clones[k])
+
+    async def deliberateAsync(self, datas: list[dict]) -> None:
+        """
+        Deliberates for every agent.
+        @param datas: A list with the environment data (Dict) of each agent, in the order of the agents.
+        """
+        for processor, data in zip(self.processors, datas):
+            processor._notifyInput("deliberate", data)
+        with self.clock.scope():
+            async with self.executionHistory.transaction():  # One history transaction per fleet deliberation
+                tokens = [processor._begin("deliberate", processor.agent.id) for processor in self.processors]
+                try:
+                    for processor, data in zip(self.processors, datas):
+                        with processor.agent.registry.scope():
+                            await processor._reviseBeliefsAsync(data)
+                    for goalIndex in range(len(self.agents[0].goals)):
+                        await self._promoteGoalAsync(goalIndex)
+                except BaseException as e:
+                    for processorTokens in reversed(tokens):
+                        SequentialProcessor._end(processorTokens, e)
+                    raise
+                for processorTokens in reversed(tokens):
+                    SequentialProcessor._end(processorTokens, None)
+
+    async def processIntentionsAsync(self) -> None:
+        """
+        Processes the goal queue of every agent.
+        """
+        for processor in self.processors:
+            await processor.processIntentionsAsync()
+
+    def addInstrument(self, instrument: Instrument) -> None:
+        """
+        Adds an instrument to the processors of every agent (see "AbstractProcessor.addInstrument").
+        """
+        for processor in self.processors:
+            processor.addInstrument(instrument)
+
+    def removeInstrument(self, instrument: Instrument) -> None:
+        for processor in self.processors:
+            processor.removeInstrument(instrument)
+
+    def deliberate(self, datas: list[dict]) -> None:
+        """
+        Wraps the "deliberateAsync" method for synchronous calls.
+        """
+        return runSync(self.deliberateAsync(datas))
+
+    def processIntentions(self) -> None:
+        """
+        Wraps the "processIntentionsAsync" method for synchronous calls.
+        """
+        return runSync(self.processIntentionsAsync())
+
+    def snapshot(self) -> dict:
+        """
+        Runtime state of every agent of the fleet (see "AbstractProcessor.snapshot").
+        """
+        return {'processors': [processor.snapshot() for processor in self.processors]}
+
+    def restore(self, snapshot: dict) -> None:
+        """
+        Restores a snapshot (see "snapshot") in a fleet built like the saved one.
+        @raise ValueError: If the number of agents is different.
+        """
+        if len(snapshot['processors']) != len(self.processors):
+            raise ValueError("The snapshot does not match the number of agents of the fleet")
+        for processor, processorSnapshot in zip(self.processors, snapshot['processors']):
+            processor.restore(processorSnapshot)
@@ -1,60 +1,103 @@
-from ..core import AbstractProcessor, DataContainer, Agent, State, AbstractExecutionHistory, DataContainer
-import time
-import bisect
+from ..core import AbstractProcessor, DataContainer, Agent, State, AbstractExecutionHistory, DataContainer, IntentionQueue, Goal, Clock
 import traceback as tb
 
 
 class SequentialProcessor(AbstractProcessor):
-    def __init__(self, agent: Agent, executionHistory: AbstractExecutionHistory) -> None:
-        super().__init__(agent, executionHistory)
+    def __init__(self, agent: Agent, executionHistory: AbstractExecutionHistory, intentions: IntentionQueue | None = None, clock: Clock | None = None) -> None:
+        super().__init__(agent, executionHistory, intentions, clock)
 
     async def deliberateAsync(self, data) -> None:
+        self._notifyInput("deliberate", data)
+        async with self._cycle("deliberate", self.agent.id):
+            await self._reviseBeliefsAsync(data)
+            await self._promoteGoalsAsync()
+
+    async def _reviseBeliefsAsync(self, data: dict) -> None:
         self._enviroment = data
-        envContainer = DataContainer("env", self._enviroment)
+        envContainer = self._envContainer
+        envContainer.data = data
         for brf in self.agent.brfs:
-            await brf.f(envContainer.createGet(self.executionHistory, brf.id), self.agent.beliefs.createGet(self.executionHistory, brf.id), self.agent.channel.createGet(self.executionHistory, brf.id), self.agent.beliefs.createSet(self.executionHistory, brf.id))
+            reads = {}  # Provenance of the writes of the brf
+            await self._probe("brf", brf.id, brf.f)(envContainer.createGet(self._history, brf.id, reads=reads), self.agent.beliefs.createGet(self._history, brf.id, reads=reads), self.agent.channel.createGet(self._history, brf.id, reads=reads), self.agent.beliefs.createSet(self._history, brf.id, reads))
+
+    async def _promoteGoalsAsync(self) -> None:
         for goal in self.agent.goals:
             # the same goal can be contained several times in the goal queue.
             clone = goal.getClone()
-            for promotion in clone.promotions:
-                incPriority = await promotion.f(self.agent.beliefs.createGet(self.executionHistory, promotion.id), clone.priority)
+            goalIndex = self._goalIndex(goal)
+            for promotion in self.executionPlan.promotions[goalIndex]:
+                reads = {}
+                if (promotion.rule is not None):
+                    incPriority = await self._probe("promotion", promotion.id, self._promoteByRuleAsync)(promotion, clone.priority, reads, clone.context)
+                else:
+                    incPriority = await self._probe("promotion", promotion.id, promotion.f)(self.agent.beliefs.createGet(self._history, promotion.id, reads=reads, context=clone.context), clone.priority)
                 if (incPriority is not None):
                     clone.promote(promotion.name, incPriority)
-                    await self.executionHistory.addAsync(State(promotion.id, clone.id, time.time(), time.time(), {'incPriority': incPriority, 'cloneId': clone.cloneId}))
+                    now = self.clock.now()
+                    state = State(promotion.id, clone.id, now, now, {'incPriority': incPriority, 'cloneId': clone.cloneId}, parentIds=tuple(reads.values()))
+                    clone.stateIds.append(state.id)
+                    await self._history.addAsync(state)
                 else:
                     break
             if clone.isInFinalState():
-                # ordered is important
-                bisect.insort(self._intentions, clone)
+                await self._admitIntentionAsync(clone)
 
     async def processIntentionsAsync(self) -> None:
+        self._notifyInput("processIntentions")
+        if len(self._intentions) > 0:
+            await self._probe("processIntentions", self.agent.id, self._drainIntentionsAsync)()
+
+    async def _drainIntentionsAsync(self) -> None:
         removedByConflict = set()
         while len(self._intentions) > 0:  # Goals in pursuit. sorted by priority
             # Pursue goals
             # Each time goals are removed/inserted, conflicts change.
             # So we need to redetect the conflicts at each iteration of the loop, due to sequential implementation.
+            tokens = self._begin("conflicts", self.agent.id)
             detectedConflicts = self._detectConflicts()
+            self._end(tokens, None)
             goal = self._intentions.pop(0)  # get and remove first ordered
-            if (not goal.cloneId in removedByConflict):
-                for c in goal.conflicts:
-                    if c.id in detectedConflicts:
-                        for removedId in detectedConflicts[c.id]['toRemove']:
-                            removedByConflict.add(removedId)
-                            await self.executionHistory.addAsync(State(c.id, "", time.time(), time.time(), {'chosen': detectedConflicts[c.id]['chosen'], 'removed': removedId}))
-            if (goal.cloneId in removedByConflict):
-                removedByConflict.remove(goal.cloneId)  # clear RAM
-                continue  # skip goal
-            chosenPlan = goal.plans[0]
-            for plan in goal.plans:
-                if (goal.priority >= plan.priority):
-                    if (plan.priority > chosenPlan.priority):
-                        chosenPlan = plan
-            await self.executionHistory.addAsync(State(goal.id, plan.id, time.time(), time.time(), {'cloneId': goal.cloneId, 'priority': goal.priority}))
-            for action in plan.actions:
-                try:
-                    await action.f(DataContainer(self._enviroment).get, self.agent.beliefs.get)
-                    await self.executionHistory.addAsync(State(plan.id, action.id, time.time(), time.time(), {'cloneId': goal.cloneId}))
-                except Exception as e:
-                    exceptionDict = {'cloneId': goal.cloneId, 'error': str(e), 'stack': ''.join(
-                        tb.format_exception(None, e, e.__traceback__))}
-                    await self.executionHistory.addAsync(State(plan.id, action.id, time.time(), time.time(), exceptionDict))
+            if self._instruments:
+                self._gauge("intentions", len(self._intentions))
+            async with self._cycle("intention", goal.id):
+                await self._executeIntentionAsync(goal, detectedConflicts, removedByConflict)
+
+    async def _executeIntentionAsync(self, goal: Goal, detectedConflicts: dict, removedByConflict: set) -> None:
+        if (await self._dropIfMissesDeadlineAsync(goal)):
+            return
+        if (not goal.cloneId in removedByConflict):
+            for c in goal.conflicts:
+                if c.id in detectedConflicts:
+                    for removedId in detectedConflicts[c.id]['toRemove']:
+                        removedByConflict.add(removedId)
+                        now = self.clock.now()
+                        state = State(c.id, "", now, now, {'chosen': detectedConflicts[c.id]['chosen'], 'removed': removedId})
+                        goal.stateIds.append(state.id)
+                        await self._history.addAsync(state)
+        if (goal.cloneId in removedByConflict):
+            removedByConflict.remove(goal.cloneId)  # clear RAM
+            return  # skip goal
+        guardReads = {}
+        plan = await self._probe("planSelection", goal.id, self._choosePlanAsync)(goal, guardReads)
+        if (plan is None):
+            now = self.clock.now()
+            await self._history.addAsync(State(goal.id, "", now, now, {'cloneId': goal.cloneId, 'priority': goal.priority, 'noPlan': True}, parentIds=tuple(goal.stateIds)))
+            return
+        if (await self._dropIfMissesDeadlineAsync(goal, plan)):
+            return
+        now = self.clock.now()
+        planState = State(goal.id, plan.id, now, now, {'cloneId': goal.cloneId, 'priority': goal.priority}, parentIds=tuple(goal.stateIds))
+        await self._history.addAsync(planState)
+        actionParentIds = (planState.id,) + tuple(guardReads.values())
+        for action in plan.actions:
+            try:
+                await self._runActionAsync(goal, action, DataContainer(self._enviroment).get, self.agent.beliefs.get)
+                now = self.clock.now()
+                await self._history.addAsync(State(plan.id, action.id, now, now, {'cloneId': goal.cloneId}, parentIds=actionParentIds))
+            except Exception as e:
+                exceptionDict = {'cloneId': goal.cloneId, 'error': str(e), 'stack': ''.join(
+                    tb.format_exception(None, e, e.__traceback__))}
+                if (isinstance(e, TimeoutError)):
+                    exceptionDict['timeout'] = True
+                now = self.clock.now()
+                await self._history.addAsync(State(plan.id, action.id, now, now, exceptionDict, parentIds=actionParentIds))
@@ -0,0 +1,104 @@
+from .core import AbstractProcessor, State, VirtualClock, EntityId, runSync
+from typing import Any
+import copy
+import pickle
+
+
+class InputRecorder:
+    """
+    Records the inputs of a processor (environment data of each deliberation, and each processing of the goal queue), with their times.
+    A recording can be replayed on a new processor ("replay"), on a virtual clock, as fast as the CPU allows.
+    Inputs are replayed in the order they started: the overlap of concurrent ticks (Ex: "runInLoop") is not reproduced.
+    """
+
+    def __init__(self, processor: AbstractProcessor):
+        """
+        Constructor:
+        @param processor: The recorded processor.
+        """
+        self.processor = processor
+        self.entries: list[tuple[str, float, Any]] = []  # (operation, time, data)
+        processor.inputListeners.append(self._onInput)
+
+    def _onInput(self, operation: str, t: float, data: Any) -> None:
+        self.entries.append((operation, t, copy.deepcopy(data)))  # BRFs may change the data they receive
+
+    def detach(self) -> None:
+        """
+        Stops recording.
+        """
+        if self._onInput in self.processor.inputListeners:
+            self.processor.inputListeners.remove(self._onInput)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self.entries, f)
+
+    @staticmethod
+    def load(path: str) -> list[tuple[str, float, Any]]:
+        """
+        @return: The entries of a recording saved with "save".
+        """
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+async def replayAsync(entries: list[tuple[str, float, Any]], processor: AbstractProcessor) -> None:
+    """
+    Drives a processor with recorded inputs. Before each input, the clock of the processor is moved to the time of the input.
+    The processor must have a new agent (built like the recorded one) and a VirtualClock.
+    Replays of the same recording produce identical histories (see "canonicalHistory").
+    @param entries: "InputRecorder.entries", or the result of "InputRecorder.load".
+    @param processor: A instance of a subclass of AbstractProcessor, created with a VirtualClock.
+    """
+    if not isinstance(processor.clock, VirtualClock):
+        raise ValueError("Replays require a processor with a VirtualClock")
+    for operation, t, data in entries:
+        processor.clock.set(t)
+        if operation == "deliberate":
+            await processor.deliberateAsync(copy.deepcopy(data))
+        elif operation == "processIntentions":
+            await processor.processIntentionsAsync()
+        else:
+            raise ValueError("Unknown operation: " + str(operation))
+
+
+def replay(entries: list[tuple[str, float, Any]], processor: AbstractProcessor) -> None:
+    """
+    Wraps the "replayAsync" method for synchronous calls.
+    """
+    return runSync(replayAsync(entries, processor))
+
+
+_idKeys = ("cloneId", "chosen", "removed")  # Keys of state values that contain ids
+
+
+def canonicalHistory(states: list[State], includeTimes: bool = True) -> list[tuple]:
+    """
+    Comparable form of a history: entity, state and goal instance ids are replaced by their order of first appearance,
+    so histories of different runs (with different generated ids) can be compared.
+    @param states: States of the history, in ascending time order (Ex: "history.get({'order': 'asc'})").
+    @param includeTimes (optional): If False, times are left out (Ex: to compare a replay with a run on the real clock).
+    @return: A list of tuples (fromId, toId, id, parentIds, value[, time, activationTime]).
+    """
+    ids: dict[EntityId, int] = {}
+
+    def canonical(id: EntityId) -> Any:
+        if id == "" or id is None:
+            return id
+        return ids.setdefault(id, len(ids))
+
+    res = []
+    for state in states:
+        value = state.value
+        if isinstance(value, dict) and any(key in value for key in _idKeys):
+            value = dict(value)
+            for key in _idKeys:
+                if key in value:
+                    value[key] = canonical(value[key])
+        item = (canonical(state.fromId), canonical(state.toId), canonical(state.id),
+                tuple(canonical(id) for id in state.parentIds) if state.parentIds is not None else None, value)
+        if includeTimes:
+            item += (state.time, state.activationTime)
+        res.append(item)
+    return res
@@ -0,0 +1,368 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+import operator
+
+
+class Expression(ABC):
+    """
+    Declarative expression over beliefs, used in goal promotion conditions/priorities and plan guards.
+    Expressions are built with Python operators:
+        (Belief("accident.risk") == "high") & ~Belief("resources.battery.low")
+        Priority + 1
+    """
+    __hash__ = object.__hash__
+
+    @abstractmethod
+    def key(self) -> tuple:
+        """
+        Structural key. Expressions with the same key are evaluated once in a RuleNetwork.
+        """
+        pass
+
+    def children(self) -> list["Expression"]:
+        return []
+
+    def paths(self) -> set[str]:
+        """
+        Belief paths read by the expression.
+        """
+        res = set()
+        for child in self.children():
+            res |= child.paths()
+        return res
+
+    def usesPriority(self) -> bool:
+        return any(child.usesPriority() for child in self.children())
+
+    @abstractmethod
+    def evaluate(self, get: Callable[[str], Any], priority: Any = 0) -> Any:
+        """
+        Evaluates the expression without a RuleNetwork.
+        @param get: Function that returns the value of a belief path (Ex: DataContainer.get).
+        @param priority: Current priority of the goal.
+        """
+        pass
+
+    async def evaluateAsync(self, get: Callable, priority: Any = 0) -> Any:
+        """
+        Evaluates the expression with the asynchronous "get" function received by promotion functions.
+        """
+        values = {}
+        for path in sorted(self.paths()):
+            values[path] = await get(path)
+        return self.evaluate(lambda path: values[path], priority)
+
+    def __and__(self, other: Any) -> "Expression":
+        return And(self, _wrap(other))
+
+    def __rand__(self, other: Any) -> "Expression":
+        return And(_wrap(other), self)
+
+    def __or__(self, other: Any) -> "Expression":
+        return Or(self, _wrap(other))
+
+    def __ror__(self, other: Any) -> "Expression":
+        return Or(_wrap(other), self)
+
+    def __invert__(self) -> "Expression":
+        return Not(self)
+
+    def __eq__(self, other: Any) -> "Expression":
+        return Operation("==", self, _wrap(other))
+
+    def __ne__(self, other: Any) -> "Expression":
+        return Operation("!=", self, _wrap(other))
+
+    def __lt__(self, other: Any) -> "Expression":
+        return Operation("<", self, _wrap(other))
+
+    def __le__(self, other: Any) -> "Expression":
+        return Operation("<=", self, _wrap(other))
+
+    def __gt__(self, other: Any) -> "Expression":
+        return Operation(">", self, _wrap(other))
+
+    def __ge__(self, other: Any) -> "Expression":
+        return Operation(">=", self, _wrap(other))
+
+    def __add__(self, other: Any) -> "Expression":
+        return Operation("+", self, _wrap(other))
+
+    def __radd__(self, other: Any) -> "Expression":
+        return Operation("+", _wrap(other), self)
+
+    def __sub__(self, other: Any) -> "Expression":
+        return Operation("-", self, _wrap(other))
+
+    def __rsub__(self, other: Any) -> "Expression":
+        return Operation("-", _wrap(other), self)
+
+    def __mul__(self, other: Any) -> "Expression":
+        return Operation("*", self, _wrap(other))
+
+    def __rmul__(self, other: Any) -> "Expression":
+        return Operation("*", _wrap(other), self)
+
+    def __bool__(self) -> bool:
+        raise TypeError(
+            "Rule expressions cannot be used as Python booleans. Use &, | and ~ instead of and, or and not.")
+
+
+class Belief(Expression):
+    """
+    Value of a belief path (Ex: Belief("accident.risk")). Used alone, it is an atomic boolean belief.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def key(self) -> tuple:
+        return ("belief", self.path)
+
+    def paths(self) -> set[str]:
+        return {self.path}
+
+    def usesPriority(self) -> bool:
+        return False
+
+    def evaluate(self, get: Callable[[str], Any], priority: Any = 0) -> Any:
+        return get(self.path)
+
+
+class Constant(Expression):
+    def __init__(self, value: Any):
+        self.value = value
+
+    def key(self) -> tuple:
+        return ("constant", type(self.value).__name__, repr(self.value))
+
+    def paths(self) -> set[str]:
+        return set()
+
+    def usesPriority(self) -> bool:
+        return False
+
+    def evaluate(self, get: Callable[[str], Any], priority: Any = 0) -> Any:
+        return self.value
+
+
+class PriorityValue(Expression):
+    """
+    Current priority of the goal. Use the "Priority" instance.
+    """
+
+    def key(self) -> tuple:
+        return ("priority",)
+
+    def paths(self) -> set[str]:
+        return set()
+
+    def usesPriority(self) -> bool:
+        return True
+
+    def evaluate(self, get: Callable[[str], Any], priority: Any = 0) -> Any:
+        return priority
+
+
+Priority = PriorityValue()
+
+_operators = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul
+}
+
+
+class CompositeExpression(Expression):
+    """
+    Expression computed from the values of its children (operations and logical connectives).
+    """
+
+    @abstractmethod
+    def compute(self, values: list[Any], priority: Any) -> Any:
+        """
+        Computes the value of the expression from the values of its children.
+        """
+        pass
+
+    def evaluate(self, get: Callable[[str], Any], priority: Any = 0) -> Any:
+        return self.compute([child.evaluate(get, priority) for child in self.children()], priority)
+
+
+class Operation(CompositeExpression):
+    """
+    Comparison or arithmetic between two expressions.
+    """
+
+    def __init__(self, op: str, left: Expression, right: Expression):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def key(self) -> tuple:
+        return (self.op, self.left.key(), self.right.key())
+
+    def children(self) -> list[Expression]:
+        return [self.left, self.right]
+
+    def compute(self, values: list[Any], priority: Any) -> Any:
+        try:
+            return _operators[self.op](values[0], values[1])
+        except TypeError:  # Ex: comparison of a missing belief (False) with a number
+            return False
+
+
+class And(CompositeExpression):
+    def __init__(self, *operands: Expression):
+        self.operands = list(operands)
+
+    def key(self) -> tuple:
+        return ("and",) + tuple(operand.key() for operand in self.operands)
+
+    def children(self) -> list[Expression]:
+        return self.operands
+
+    def compute(self, values: list[Any], priority: Any) -> Any:
+        return all(values)
+
+
+class Or(CompositeExpression):
+    def __init__(self, *operands: Expression):
+        self.operands = list(operands)
+
+    def key(self) -> tuple:
+        return ("or",) + tuple(operand.key() for operand in self.operands)
+
+    def children(self) -> list[Expression]:
+        return self.operands
+
+    def compute(self, values: list[Any], priority: Any) -> Any:
+        return any(values)
+
+
+class Not(CompositeExpression):
+    def __init__(self, operand: Expression):
+        self.operand = operand
+
+    def key(self) -> tuple:
+        return ("not", self.operand.key())
+
+    def children(self) -> list[Expression]:
+        return [self.operand]
+
+    def compute(self, values: list[Any], priority: Any) -> Any:
+        return not values[0]
+
+
+def _wrap(value: Any) -> Expression:
+    return value if isinstance(value, Expression) else Constant(value)
+
+
+class _Node:
+    """
+    Node of a RuleNetwork. Shared by all rules that contain the same (sub)expression.
+    """
+
+    def __init__(self, expression: Expression, children: list["_Node"]):
+        self.expression = expression
+        self.children = children
+        self.parents: list[_Node] = []
+        self.usesPriority = expression.usesPriority()
+        self.dirty = True
+        self.value: Any = None
+
+
+class RuleNetwork:
+    """
+    Discrimination network (Rete-style) of the rules of an agent, bound to a DataContainer (the beliefs).
+    Subexpressions shared by several rules are compiled to a single node, evaluated once.
+    Node values are cached, and only the nodes that depend on changed beliefs are evaluated again.
+    Nodes that depend on the goal priority are not cached (their children are).
+    """
+
+    def __init__(self, container: Any):
+        """
+        Constructor:
+        @param container: A instance of the class DataContainer. Its changes invalidate the nodes that read the changed paths.
+        """
+        self.container = container
+        self._nodes: dict[tuple, _Node] = {}
+        self._byPath: dict[str, list[_Node]] = {}  # Belief nodes by path
+        self._versions: dict[str, int] = {}  # Number of changes of each path
+        self.stats = {'nodes': 0, 'evaluations': 0, 'cached': 0}
+        container.listeners.append(self._onChange)
+
+    def compile(self, expression: Expression) -> _Node:
+        """
+        Adds an expression to the network.
+        @return: The node of the expression.
+        """
+        key = expression.key()
+        if key in self._nodes:
+            return self._nodes[key]
+        node = _Node(expression, [self.compile(child)
+                                  for child in expression.children()])
+        for child in node.children:
+            child.parents.append(node)
+        if isinstance(expression, Belief):
+            self._byPath.setdefault(expression.path, []).append(node)
+            self._versions.setdefault(expression.path, 0)
+        self._nodes[key] = node
+        self.stats['nodes'] += 1
+        return node
+
+    def version(self, path: str) -> int:
+        """
+        @return: A number that changes whenever the belief path (or a parent/child path) changes.
+        """
+        return self._versions.get(path, 0)
+
+    def _invalidate(self, node: _Node) -> None:
+        if node.dirty:
+            return
+        node.dirty = True
+        for parent in node.parents:
+            self._invalidate(parent)
+
+    def _onChange(self, path: str) -> None:
+        for nodePath, nodes in self._byPath.items():
+            if path == "" or nodePath == path or nodePath.startswith(path + ".") or path.startswith(nodePath + "."):
+                self._versions[nodePath] += 1
+                for node in nodes:
+                    self._invalidate(node)
+
+    def evaluate(self, node: _Node, priority: Any = 0) -> Any:
+        """
+        Evaluates a compiled expression, reusing the cached values of unchanged nodes.
+        @param node: Node returned by "compile".
+        @param priority: Current priority of the goal.
+        """
+        if not node.dirty and not node.usesPriority:
+            self.stats['cached'] += 1
+            return node.value
+        self.stats['evaluations'] += 1
+        expression = node.expression
+        if isinstance(expression, Belief):
+            value = self.container.get(expression.path)
+        elif len(node.children) == 0:
+            value = expression.evaluate(self.container.get, priority)
+        elif isinstance(expression, And):
+            value = all(self.evaluate(child, priority)
+                        for child in node.children)
+        elif isinstance(expression, Or):
+            value = any(self.evaluate(child, priority)
+                        for child in node.children)
+        else:
+            value = expression.compute(
+                [self.evaluate(child, priority) for child in node.children], priority)
+        if not node.usesPriority:
+            node.value = value
+            node.dirty = False
+        return value
@@ -0,0 +1,104 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.fleet_processor import FleetProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.explainers.sequential_explainer import SequentialExplainer
+from src.goal_processing.instruments.stats_collector import StatsCollector
+from src.goal_processing.replay import InputRecorder
+
+import random
+
+# Fleet of homogeneous agents: promotions evaluated for every agent in one vectorized call.
+
+recharges = []
+
+# Belief revision functions
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.battery", "low" if await getEnv("battery") < 30 else "high")
+    await set("resources.level", await getEnv("battery"))
+
+# Goal "Recharge"
+# "Recharge" goal promotions
+
+
+async def goalRechargeBatteryToActive(get, priority):
+    if (await get("resources.battery") == "low"):
+        return priority+1
+
+
+def goalRechargeBatteryToActiveBatch(columns, priority):
+    return priority+1, columns["resources.battery"] != "low"
+
+
+async def goalRechargeBatteryToExecutive(get, priority):
+    if (await get("resources.level") < 10):
+        return priority+1
+    return priority
+
+
+def goalRechargeBatteryToExecutiveBatch(columns, priority):
+    return priority + (columns["resources.level"] < 10), False
+
+# "Recharge" plan1 actions
+
+
+async def actionRechargeBattery(getEnv, get):
+    recharges.append(get("resources.level"))
+
+
+def createAgent() -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[
+            BeliefReviewFunction(f=brfAnalyzeBattery,
+                                 desc="Review battery level")
+        ],
+        goals=[
+            Goal(
+                desc="Recharge battery",
+                promotions=[
+                    GoalPromotion(f=goalRechargeBatteryToActive, batchF=goalRechargeBatteryToActiveBatch,
+                                  paths=["resources.battery"], desc="Promote low battery", name="active"),
+                    GoalPromotion(f=goalRechargeBatteryToExecutive, batchF=goalRechargeBatteryToExecutiveBatch,
+                                  paths=["resources.level"], desc="Prioritize critical battery", name="executive")
+                ],
+                plans=[
+                    Plan(desc="Recharge battery in base", priority=0, actions=[
+                        Action(f=actionRechargeBattery, desc="Recharge battery in base")]),
+                    Plan(desc="Emergency landing", priority=2, actions=[
+                        Action(f=actionRechargeBattery, desc="Emergency landing")])
+                ]
+            )
+        ],
+        conflicts=[]
+    )
+
+
+agents = [createAgent() for i in range(500)]
+fleet = FleetProcessor(agents, InMemoryExecutionHistory())
+collector = StatsCollector()
+fleet.addInstrument(collector)
+recorder = InputRecorder(fleet.processors[0])
+random.seed(1)
+levels = [random.randint(0, 100) for agent in agents]
+fleet.deliberate([{'battery': level} for level in levels])
+fleet.processIntentions()
+print("Low battery agents: " + str(len([l for l in levels if l < 30])))
+print("Recharges: " + str(len(recharges)))
+print("Deliberations reported to the instruments: " + str(len(collector.stats('deliberate')['timings']['deliberate'])) +
+      ", inputs recorded for the first agent: " + str([(operation, data) for operation, _, data in recorder.entries]))
+batchedReads = fleet.executionHistory.get({'toIds': {agent.goals[0].promotions[0].id for agent in agents}, 'fromIds': {
+    attr.id for agent in agents for attr in agent.goals[0].promotions[0].attrs}})
+print("Batched reads saved: " + str(len(batchedReads)) + ", in the same cycle: " + str(len({state.cycleId for state in batchedReads}) == 1))
+
+explainer = SequentialExplainer(fleet.executionHistory)
+critical = agents[levels.index(min(levels))]
+lastStates = fleet.executionHistory.get(
+    {'limit': 1, 'toIds': {critical.goals[0].id}})
+for s in lastStates:
+    print("0: " + str(s.value))
+    for st in explainer.xHistory(s):
+        print(str(st[1]) + ": " + str(st[0].value))
@@ -0,0 +1,120 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action
+from src.goal_processing.rules import Belief, Priority
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.explainers.sequential_explainer import SequentialExplainer
+
+import time
+
+
+def printState(s: State, origin=None):
+    ref = s.fromId
+    if origin is not None:
+        ref = origin
+    res = ""
+    res += Entity.byId[ref].className() + (" - " +
+                                           Entity.byId[ref].desc if Entity.byId[ref].desc else "")
+    if Entity.byId[ref].className() == "Goal" and 'priority' in s.value:
+        res += " - Priority: " + str(s.value['priority'])
+    if "GoalPromotion" in Entity.byId[ref].className() and 'incPriority' in s.value:
+        res += " - Priority increment: " + str(s.value['incPriority'])
+    if "Attribute" in Entity.byId[ref].className():
+        res += " - " + str(s.value)
+    if Entity.byId[ref].className() == "Action":
+        res += (" - Error: " +
+                str(s.value['error']) if "error" in s.value else "")
+    res += " - time: " + str(s.time)
+    return res
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    accidents = await getEnv("accidents")
+    await set("accident.found", bool(accidents))
+    await set("accident.highRisk", bool(accidents) and accidents[-1]['risk'] == "high")
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.lowBattery", await getEnv("battery") < 30)
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    pass
+
+
+async def actionRemoteRescue(getEnv, get):
+    pass
+
+
+async def actionRechargeBattery(getEnv, get):
+    pass
+
+# Rules over atomic boolean beliefs. "Belief('accident.found')" is shared by both goals.
+goal1 = Goal(
+    desc="Rescue victim",
+    promotions=[
+        GoalPromotion(name="active", desc="Promote accidents",
+                      rule=Belief("accident.found")),
+        GoalPromotion(name="executive", desc="Promote serious accidents",
+                      rule=Belief("accident.found") & ~Belief("resources.lowBattery"),
+                      priorityRule=Priority + 1)
+    ],
+    plans=[
+        Plan(desc="Rescue victim", priority=0,
+             actions=[Action(f=actionRescue, desc="Rescue victim")]),
+        Plan(desc="Remote rescue", priority=1, guard=Belief("accident.highRisk"),
+             actions=[Action(f=actionRemoteRescue, desc="Remote rescue")])
+    ]
+)
+
+goal2 = Goal(
+    desc="Recharge battery",
+    promotions=[
+        GoalPromotion(name="executive", desc="Promote recharge battery",
+                      rule=Belief("resources.lowBattery") | ~Belief("accident.found"))
+    ],
+    plans=[
+        Plan(desc="Recharge battery in base", priority=0, actions=[
+             Action(f=actionRechargeBattery, desc="Recharge battery in base")])
+    ]
+)
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[
+        BeliefReviewFunction(f=brfAnalyzeAccident,
+                             desc="Review accidents found"),
+        BeliefReviewFunction(f=brfAnalyzeBattery, desc="Review battery level")
+    ],
+    goals=[goal1, goal2],
+    conflicts=[]
+)
+
+processsor = SequentialProcessor(
+    agent=agent,
+    executionHistory=InMemoryExecutionHistory()
+)
+
+enviroment = {
+    'accidents': [{'coordinates': [20, 40], 'risk': 'high'}],
+    'battery': 65
+}
+for i in range(10):
+    processsor.deliberate(enviroment)
+processsor.processIntentions()
+print("Rule network: " + str(processsor._ruleNetwork.stats))
+
+explainer = SequentialExplainer(processsor.executionHistory)
+lastStates = processsor.executionHistory.get(
+    {'limit': 1, 'toIds': {goal1.plans[1].actions[0].id}})
+for s in lastStates:
+    print("top: "+printState(s, s.toId))
+    print("0: "+printState(s))
+for st in explainer.xHistory(lastStates[0]):
+    s = st[0]
+    print(str(st[1]) + ": "+printState(s))
@@ -0,0 +1,80 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action, IntentionQueue
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+import asyncio
+import time
+
+# Deadlines, earliest-deadline-first ordering and action timeouts.
+
+performed = []
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionLocate(getEnv, get):
+    performed.append("Locate")
+
+
+async def actionRescue(getEnv, get):
+    performed.append("Rescue")
+
+
+async def actionCallBase(getEnv, get):
+    await asyncio.sleep(10)  # Base does not answer
+    performed.append("Call base")
+
+
+async def actionReport(getEnv, get):
+    await asyncio.sleep(0.3)
+    performed.append("Report")
+
+locate = Goal(desc="Locate victim", deadline=5, promotions=[
+    GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+    Plan(priority=0, actions=[Action(f=actionLocate, desc="Locate victim")])])
+rescue = Goal(desc="Rescue victim", deadline=1, promotions=[
+    GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+    Plan(priority=0, actions=[Action(f=actionCallBase, desc="Call base", timeout=0.1),
+                              Action(f=actionRescue, desc="Rescue victim")])])
+report = Goal(desc="Report", deadline=0.2, promotions=[
+    GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+    Plan(priority=0, expectedDuration=0.3, actions=[Action(f=actionReport, desc="Report")])])
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[BeliefReviewFunction(f=brfAnalyzeAccident,
+                               desc="Review accidents found")],
+    goals=[locate, report, rescue],
+    conflicts=[]
+)
+
+processsor = SequentialProcessor(
+    agent=agent,
+    executionHistory=InMemoryExecutionHistory(),
+    intentions=IntentionQueue(order="edf")
+)
+processsor.deliberate({'accident': True})
+print("Queue (EDF): " + str([g.desc for g in processsor._intentions]))
+start = time.time()
+processsor.processIntentions()
+print("Performed: " + str(performed) +
+      " in " + str(round(time.time() - start, 1)) + "s")
+for s in processsor.executionHistory.get({}):
+    if isinstance(s.value, dict) and ('timeout' in s.value or 'deadlineMissed' in s.value):
+        print(Entity.byId[s.fromId].className() + " -> " + (Entity.byId[s.toId].desc if s.toId else "") +
+              ": " + ("timeout" if 'timeout' in s.value else "deadline missed"))
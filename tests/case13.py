@@ -0,0 +1,80 @@
+from src.goal_processing.core import Entity, EntityRegistry, DataContainer, BeliefReviewFunction, Goal, State, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.explainers.sequential_explainer import SequentialExplainer
+
+import gc
+
+# Entity registries scoped per tenant, released when the tenant's agent is removed.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+    await set("battery", await getChannel("battery"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    pass
+
+
+def createAgent(channel: DataContainer) -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=channel,
+        brfs=[BeliefReviewFunction(f=brfAnalyzeAccident,
+                                   desc="Review accidents found")],
+        goals=[Goal(desc="Rescue victim", promotions=[
+            GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+            Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+        conflicts=[]
+    )
+
+
+channel = DataContainer("channel", {'battery': 80})  # shared by the tenants
+history = InMemoryExecutionHistory()
+defaultEntities = len(Entity.byId)
+registries = {}
+processors = {}
+for tenant in ["tenant-a", "tenant-b"]:
+    registries[tenant] = EntityRegistry(tenant)
+    with registries[tenant].scope():
+        processors[tenant] = SequentialProcessor(
+            agent=createAgent(channel), executionHistory=history)
+    processors[tenant].deliberate({'accident': True})
+    processors[tenant].processIntentions()
+
+registry = registries["tenant-a"]
+agent = processors["tenant-a"].agent
+print("Entities of tenant-a: " + str(len(registry)) +
+      ". Added to the default registry: " + str(len(Entity.byId) - defaultEntities))
+print("Handle of the agent: " + str(registry.handle(agent.id)) +
+      ", resolves to the agent: " + str(registry.byHandle(registry.handle(agent.id)) is agent))
+
+explainer = SequentialExplainer(history, registry=registry)
+action = agent.goals[0].plans[0].actions[0]
+last = history.get({'limit': 1, 'toIds': {action.id}})[0]
+for st in explainer.xHistory(last):
+    print(str(st[1]) + ": " + registry[st[0].fromId].className())
+
+del agent, action, explainer, processors["tenant-a"]
+gc.collect()
+print("Entities of tenant-a after removing its agent: " +
+      str([registry[id].className() for id in registry]))  # the attribute of the shared channel is still read by tenant-b
+print("Entities of tenant-b: " + str(len(registries["tenant-b"])))
+
+del processors["tenant-b"]
+gc.collect()
+print("Attributes of the shared channel after removing every agent: " + str(list(channel.attrs.keys())) +
+      ", entities of tenant-a: " + str(len(registry)))
@@ -0,0 +1,82 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.explainers.aggregated_explainer import AggregatedExplainer
+
+import time
+
+# Aggregated explanation of the failures of an action over a time window.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+    await set("battery", await getEnv("battery"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    if (get("battery") < 30):
+        raise Exception("Low battery")
+
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[BeliefReviewFunction(f=brfAnalyzeAccident,
+                               desc="Review accidents found")],
+    goals=[Goal(desc="Rescue victim", promotions=[
+        GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+        Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+    conflicts=[]
+)
+action = agent.goals[0].plans[0].actions[0]
+
+history = InMemoryExecutionHistory()
+processor = SequentialProcessor(agent=agent, executionHistory=history)
+start = time.time()
+for i in range(20):
+    processor.deliberate({'accident': True, 'battery': 20 if i % 4 == 0 else 80})
+    processor.processIntentions()
+end = time.time()
+
+
+def failed(state: State) -> bool:
+    return state.toId == action.id and 'error' in state.value
+
+
+def describe(id) -> str:
+    entity = Entity.byId[id]
+    return entity.className() + (" - " + entity.desc if entity.desc else "")
+
+
+for useProvenance in [True, False]:
+    explainer = AggregatedExplainer(history, useProvenance=useProvenance)
+    groups = explainer.aggregate(start, end, failed)
+    group = groups[action.id]
+    print("Provenance: " + str(useProvenance) + ". Failures of " +
+          describe(action.id) + ": " + str(group['effects']))
+    for id, cause in group['causes'].items():
+        print("    " + describe(id) + " - frequency: " + str(cause['frequency']) +
+              " - weight: " + str(round(cause['weight'], 3)))
+    # Same result as merging the explanation of each failure
+    merged = {}
+    failures = [st for st in history.get({'minTime': start, 'maxTime': end}) if failed(st)]
+    for index, explanation in explainer.explainMany(failures):
+        weights = {}
+        for st, r in explanation:
+            weights[st.fromId] = weights.get(st.fromId, 0) + 1/r
+        for id, weight in weights.items():
+            merged[id] = merged.get(id, 0) + weight
+    print("Same weights as explainMany: " + str(all(abs(merged[id] / group['effects'] - cause['weight']) < 1e-9
+                                                    for id, cause in group['causes'].items()) and len(merged) == len(group['causes'])))
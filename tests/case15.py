@@ -0,0 +1,23 @@
+from src.goal_processing.core import Entity
+from src.goal_processing.benchmarks.workload import WorkloadConfig, generateAgent
+from src.goal_processing.benchmarks.suite import runBenchmark, compare
+
+import json
+
+# Synthetic workload and benchmark suite (a small run).
+
+config = WorkloadConfig(brfs=2, goals=4, promotionDepth=2, plans=2, conflicts=1, beliefs=8, seed=1)
+agent = generateAgent(config)
+print("Goals: " + str(len(agent.goals)) + ", promotions per goal: " + str(len(agent.goals[0].promotions)) +
+      ", conflicts: " + str(len(agent.conflicts)) + ", belief path: " + config.beliefPath(5))
+
+entities = len(Entity.byId)
+results = runBenchmark(config, cycles=10, explanations=5)
+results = json.loads(json.dumps(results))  # machine-readable
+for backend, result in results['results'].items():
+    print(backend + " - states: " + str(result['states']))
+    for op, summary in result['operations'].items():
+        print("    " + op + " - count: " + str(summary['count']) + ", has percentiles: " +
+              str(summary['p50'] <= summary['p99']) + ", has peak memory: " + str('peakMemory' in summary))
+print("Comparison with itself: " + str(compare(results, results)))
+print("Entities of the runs released: " + str(len(Entity.byId) == entities))
@@ -0,0 +1,69 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.instruments.stats_collector import StatsCollector
+
+import time
+
+# Per-entity timing statistics collected by an instrument.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    time.sleep(0.002)  # slow
+    await set("battery", await getEnv("battery"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    if (get("battery") < 30):
+        raise Exception("Low battery")
+
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accidents found"),
+          BeliefReviewFunction(f=brfAnalyzeBattery, desc="Review battery")],
+    goals=[Goal(desc="Rescue victim", promotions=[
+        GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+        Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+    conflicts=[]
+)
+
+processor = SequentialProcessor(agent=agent, executionHistory=InMemoryExecutionHistory())
+processor.deliberate({'accident': True, 'battery': 80})  # not collected
+collector = StatsCollector()
+processor.addInstrument(collector)
+for i in range(10):
+    processor.deliberate({'accident': True, 'battery': 20 if i % 5 == 0 else 80})
+    processor.processIntentions()
+
+stats = collector.stats()
+for kind in sorted(stats['timings']):
+    for id, timing in stats['timings'][kind].items():
+        name = Entity.byId[id].className() + " - " + Entity.byId[id].desc if id != "" else ""
+        print(kind + ": " + name + " - count: " + str(timing['count']) + ", errors: " + str(timing['errors']) +
+              ", histogram total: " + str(sum(timing['histogram'].values())))
+print("Gauges: " + str(stats['gauges']))
+kind, id, total = collector.slowest(1)[0]
+print("Slowest: " + kind + " - " + Entity.byId[id].desc)
+
+processor.removeInstrument(collector)
+collector.reset()
+processor.deliberate({'accident': True, 'battery': 80})
+print("After removing the instrument: " + str(collector.stats()))
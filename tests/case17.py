@@ -0,0 +1,78 @@
+from src.goal_processing.core import DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.instruments.trace_recorder import TraceRecorder
+
+import json
+import os
+import tempfile
+import time
+
+# Span tracing of processing cycles, exported to a Chrome trace-event file.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    time.sleep(0.001)
+
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accidents found")],
+    goals=[Goal(desc="Rescue victim", promotions=[
+        GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+        Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+    conflicts=[]
+)
+
+processor = SequentialProcessor(agent=agent, executionHistory=InMemoryExecutionHistory())
+recorder = TraceRecorder(kinds={'deliberate', 'brf', 'promotion', 'processIntentions', 'intention', 'conflicts', 'planSelection', 'action'})
+processor.addInstrument(recorder)
+processor.deliberate({'accident': True})
+processor.processIntentions()
+
+spans = recorder.spans()
+byId = {span['id']: span for span in spans}
+for span in spans:
+    depth = 0
+    parent = span['parentId']
+    while parent is not None:
+        depth += 1
+        parent = byId[parent]['parentId']
+    sameCycle = span['parentId'] is None or byId[span['parentId']]['cycleId'] == span['cycleId'] or span['kind'] in ('intention', 'conflicts')
+    print("    " * depth + span['kind'] + " - same cycle as the parent: " + str(sameCycle))
+
+path = os.path.join(tempfile.mkdtemp(), "trace.json")
+recorder.exportChromeTrace(path)
+with open(path) as f:
+    trace = json.load(f)
+print("Exported events: " + str(len(trace['traceEvents'])) + ". First: " + trace['traceEvents'][0]['name'])
+
+# Sampling: nothing is recorded with rate 0; only slow cycles with "minDuration"
+processor.removeInstrument(recorder)
+sampled = TraceRecorder(sampleRate=0)
+slow = TraceRecorder(minDuration=0.001)
+processor.addInstrument(sampled)
+processor.addInstrument(slow)
+processor.deliberate({'accident': True})
+processor.processIntentions()
+print("Spans with sample rate 0: " + str(len(sampled.spans())))
+roots = [span for span in slow.spans() if span['parentId'] is None]
+print("Slow drain of the goal queue recorded: " + str('processIntentions' in [span['kind'] for span in roots]) +
+      ". Only slow cycles: " + str(all(span['end'] - span['start'] >= 0.001 for span in roots)))
@@ -0,0 +1,72 @@
+from src.goal_processing.core import DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.instruments.memory_inspector import MemoryInspector, approximateSize
+
+import time
+
+# Memory accounting of the history, registries, containers and goal queue, with a retention callback.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    await set("accident", await getEnv("accident"))
+    await set("report", await getEnv("report"))
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident")):
+        return priority
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    pass
+
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accidents found")],
+    goals=[Goal(desc="Rescue victim", promotions=[
+        GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+        Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+    conflicts=[]
+)
+
+history = InMemoryExecutionHistory()
+processor = SequentialProcessor(agent=agent, executionHistory=history)
+inspector = MemoryInspector([processor])
+print("Size of a list of 1000 strings, sampled: " + str(abs(approximateSize(["x" * i for i in range(1000)]) - approximateSize(["x" * i for i in range(1000)], 1000)) < 20000))
+
+
+def retention(key, value, report):
+    print("Threshold crossed: " + key + " >= 300. Removed states: " + str(history.discardBefore(cut)))
+
+
+inspector.addThreshold('historyStates', 300, retention)
+for i in range(60):
+    if i == 30:
+        cut = time.time()
+    processor.deliberate({'accident': True, 'report': "x" * 1000 + str(i)})  # each deliberation writes 5 states
+    inspector.check()
+
+report = inspector.samples[-1][1]
+print("History: " + str(report['histories'][0]['states']) + " states. Values are most of its size: " +
+      str(report['histories'][0]['valueBytes'] > report['histories'][0]['bytes'] / 2))
+print("Goal queue: " + str(report['intentions'][0]['goals']) + " goals")
+print("Containers: " + str([(c['name'], c['attributes']) for c in report['containers']]))
+print("Registries: " + str([r['name'] for r in report['registries']]))
+print("Total bytes is the sum of the parts: " + str(report['totals']['bytes'] == report['totals']['historyBytes'] + report['totals']['registryBytes'] +
+                                                     report['totals']['containerBytes'] + report['totals']['intentionBytes']))
+print("Latest state still explained by the index: " + str(len(history.getLatest({agent.brfs[0].id}, {agent.beliefs.attrs['beliefs.report'].id}, time.time())) == 1))
+
+inspector.start(0.05)
+time.sleep(0.2)
+inspector.stop()
+print("Periodic samples taken: " + str(len(inspector.samples) > 60))
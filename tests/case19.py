@@ -0,0 +1,81 @@
+from src.goal_processing.core import DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action, VirtualClock
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.replay import InputRecorder, replay, canonicalHistory
+
+import os
+import tempfile
+import time
+
+# Deterministic accelerated replay of recorded inputs, on a virtual clock.
+
+# Belief revision functions
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    if (await getEnv("accidents") and len(await getEnv("accidents")) > 0):
+        await set("accident", (await getEnv("accidents")).pop())  # changes the environment data
+    else:
+        await set("accident", None)
+
+# Goal promotions
+
+
+async def goalPromotionToExecutive(get, priority):
+    if (await get("accident") is not None):
+        return priority + 1
+
+# plan actions
+
+
+async def actionRescue(getEnv, get):
+    if (get("accident")['risk'] == "high"):
+        raise Exception("Too risky")
+
+
+def createAgent() -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accidents found")],
+        goals=[Goal(desc="Rescue victim", deadline=1800, promotions=[
+            GoalPromotion(f=goalPromotionToExecutive, name="executive")], plans=[
+            Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+        conflicts=[]
+    )
+
+
+def environment(hour: int) -> dict:
+    return {'accidents': [{'coordinates': [hour, hour], 'risk': "high" if hour % 3 == 0 else "low"}] if hour % 2 == 0 else []}
+
+
+# A day of behavior, simulated on a virtual clock (one deliberation per hour)
+day = VirtualClock(start=1700000000)
+history = InMemoryExecutionHistory()
+processor = SequentialProcessor(createAgent(), history, clock=day)
+recorder = InputRecorder(processor)
+for hour in range(24):
+    processor.deliberate(environment(hour))
+    if hour % 4 != 2:  # some goals wait more than their deadline
+        processor.processIntentions()
+    day.advance(3600)
+path = os.path.join(tempfile.mkdtemp(), "inputs.pickle")
+recorder.save(path)
+original = canonicalHistory(history.get({'order': 'asc'}))
+print("Recorded inputs: " + str(len(recorder.entries)) + ". States: " + str(len(original)) +
+      ". Missed deadlines: " + str(len([s for s in history.get({}) if isinstance(s.value, dict) and 'deadlineMissed' in s.value])))
+
+# Replays with new agents
+replays = []
+for i in range(2):
+    replayHistory = InMemoryExecutionHistory()
+    start = time.perf_counter()
+    replay(InputRecorder.load(path), SequentialProcessor(createAgent(), replayHistory, clock=VirtualClock()))
+    elapsed = time.perf_counter() - start
+    replays.append(canonicalHistory(replayHistory.get({'order': 'asc'})))
+    print("Replay " + str(i + 1) + " faster than a second: " + str(elapsed < 1))
+print("Replays are identical: " + str(replays[0] == replays[1]))
+print("Replay reproduces the recorded run: " + str(replays[0] == original))  # recorded on a virtual clock too
+print("Replay reproduces the recorded run (without times): " + str(
+    [s[:5] for s in replays[0]] == [s[:5] for s in original]))
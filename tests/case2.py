@@ -144,3 +144,7 @@ for sTule in explainer.xNot(possibleHistState):
     s = sTule[0]
     print(str(sTule[2]) + ": "+'Score: '+str(sTule[1]) + ". " + printState(s))
 print("0: "+printState(possibleHistState, possibleHistState.toId))
+print('--- xNot, most relevant sections first ---')
+for sTule in explainer.xNotTop(possibleHistState, k=2, maxDepth=3):
+    s = sTule[0]
+    print(str(sTule[2]) + ": "+'Score: '+str(sTule[1]) + ". " + printState(s))
@@ -0,0 +1,40 @@
+import sys
+import asyncio
+from src.goal_processing.core import hasDiff, runSync, enableNestedLoops
+from src.goal_processing.benchmarks.import_time import measureImportTime
+
+# Lean import: heavy dependencies are loaded on demand, and asyncio is only patched when requested.
+
+print("Heavy modules loaded by the import: " + str([name for name in ("deepdiff", "nest_asyncio", "numpy") if name in sys.modules]))
+print("asyncio patched by the import: " + str(hasattr(asyncio, "_nest_patched")))
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+cases = [(1, 1), (1, 1.0), (1, True), ({'a': [1, 2]}, {'a': [1, 2]}), ({'a': [1, 2]}, {'a': (1, 2)}),
+         ({'a': 1}, {'b': 1}), (None, None), ("on", "off"), (float("nan"), float("nan"))]
+print("Plain comparisons: " + str([hasDiff(a, b) for a, b in cases]))
+print("Heavy modules loaded by plain comparisons: " + str("deepdiff" in sys.modules))
+print("Object comparisons: " + str([hasDiff(Point(1, 2), Point(1, 2)), hasDiff(Point(1, 2), Point(1, 3))]))
+print("DeepDiff loaded on demand: " + str("deepdiff" in sys.modules))
+
+
+async def double(x):
+    await asyncio.sleep(0)
+    return 2 * x
+
+
+async def main():
+    return runSync(double(21))  # A synchronous wrapper called inside a running loop
+
+print("Sync call inside a running loop: " + str(asyncio.run(main())))
+enableNestedLoops()
+print("Sync call inside a running loop (nested loops): " + str(asyncio.run(main())) +
+      ", asyncio patched: " + str(hasattr(asyncio, "_nest_patched")))
+
+res = measureImportTime(runs=2)
+print("Import time measured: " + str(res['seconds']['median'] > 0) + ", heavy modules: " + str(res['heavyModules']))
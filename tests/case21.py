@@ -0,0 +1,118 @@
+from src.goal_processing.core import Entity, State, setIdNode, DataContainer, BeliefReviewFunction, Goal, Conflict, Agent, GoalPromotion, Plan, Action
+from src.goal_processing.rules import Belief, Priority
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.explainers.sequential_explainer import SequentialExplainer
+from src.goal_processing.checkpoint import Checkpointer, loadSnapshot
+
+import gc
+import os
+import tempfile
+import time
+
+# Checkpoint of a processor, and restore in a new agent (as after a restart of the worker).
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    accidents = await getEnv("accidents")
+    await set("accident.found", len(accidents) > 0)
+    await set("accident.highRisk", len(accidents) > 0 and accidents[0]['risk'] == "high")
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.lowBattery", await getEnv("battery") < 30)
+
+
+async def goalPromotionToActive(get, priority):
+    if (await get("accident.found")):
+        return priority + 1
+
+
+async def actionRescue(getEnv, get):
+    pass
+
+
+async def actionRechargeBattery(getEnv, get):
+    pass
+
+
+def createAgent() -> Agent:
+    rescue = Goal(desc="Rescue victim", deadline=3600, promotions=[
+        GoalPromotion(name="active", desc="Promote accidents", f=goalPromotionToActive),
+        GoalPromotion(name="executive", desc="Promote serious accidents",
+                      rule=Belief("accident.highRisk") & ~Belief("resources.lowBattery"), priorityRule=Priority + 1)
+    ], plans=[Plan(desc="Rescue victim", priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])
+    recharge = Goal(desc="Recharge battery", promotions=[
+        GoalPromotion(name="executive", desc="Promote recharge battery", rule=Belief("resources.lowBattery"))
+    ], plans=[Plan(desc="Recharge battery in base", priority=0, actions=[Action(f=actionRechargeBattery, desc="Recharge battery in base")])])
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accidents found"),
+              BeliefReviewFunction(f=brfAnalyzeBattery, desc="Review battery level")],
+        goals=[rescue, recharge],
+        conflicts=[Conflict(goals=[rescue, recharge], desc="Rescue or recharge")]
+    )
+
+
+history = InMemoryExecutionHistory()  # A persistent history in production (Ex: a database), shared by both workers
+path = os.path.join(tempfile.mkdtemp(), "agent.checkpoint")
+
+# First worker
+processor = SequentialProcessor(createAgent(), history)
+checkpointer = Checkpointer(processor, path)
+for battery in (80, 70, 60):
+    processor.deliberate({'accidents': [{'coordinates': [20, 40], 'risk': 'high'}], 'battery': battery})
+full = checkpointer.checkpoint()
+processor.deliberate({'accidents': [], 'battery': 20})
+delta = checkpointer.checkpoint()
+print("Goals in the queue: " + str(len(processor._intentions)) + ". Full checkpoint smaller than 4KB: " + str(full < 4096) +
+      ", incremental checkpoint smaller than the full one: " + str(0 < delta < full) + ", unchanged state: " + str(checkpointer.checkpoint()))
+saved = processor.snapshot()
+with open(path, "ab") as f:
+    f.write(b"\x00\x01")  # The worker stops in the middle of a write
+del processor, checkpointer
+gc.collect()
+
+# Second worker: the agent is built again (with new generated ids), and restored
+processor = SequentialProcessor(createAgent(), history)
+print("New agent has new ids: " + str(processor.agent.id != saved['agent']['entities'][0][1]))
+checkpointer = Checkpointer(processor, path)
+start = time.perf_counter()
+print("Restored: " + str(checkpointer.restore()) + ", in less than a second: " + str(time.perf_counter() - start < 1))
+restored = processor.snapshot()
+print("Entity ids restored: " + str(restored['agent']['entities'] == saved['agent']['entities']))
+print("Beliefs restored: " + str(restored['agent']['beliefs']['data'] == saved['agent']['beliefs']['data']))
+print("Attributes restored: " + str({name: attr[0] for name, attr in restored['agent']['beliefs']['attrs'].items()} ==
+                                    {name: attr[0] for name, attr in saved['agent']['beliefs']['attrs'].items()}) +
+      ", last writes restored: " + str(restored['agent']['beliefs']['lastWrites'] == saved['agent']['beliefs']['lastWrites']))
+print("Goal queue restored: " + str(restored['intentions'] == saved['intentions']) + " - " +
+      str([(Entity.byId[goal.id].desc, goal.priority, goal.cloneId == item['cloneId']) for goal, item in zip(processor._intentions, saved['intentions'])]))
+
+processor.push({'battery': 90})  # Only the keys that changed
+print("Update pushed after the restore keeps the restored environment: " + str(sorted(processor._takeInbox())))
+
+# The restored agent continues where the first one stopped
+processor.processIntentions()
+print("Checkpoint after the restore is incremental: " + str(0 < checkpointer.checkpoint() < full) +
+      ", file equals the processor: " + str(loadSnapshot(path)['intentions'] == processor.snapshot()['intentions']))
+lastAction = history.get({'limit': 1, 'toIds': {processor.agent.goals[0].plans[0].actions[0].id}})[0]
+explainer = SequentialExplainer(history)
+print("Explanation across the restart:")
+for state, depth in explainer.xHistory(lastAction):
+    entity = Entity.byId[state.fromId]
+    print("    " + str(depth) + ": " + entity.className() + (" - " + entity.desc if entity.desc else ""))
+
+# Workers with the same fixed node: new ids do not repeat the restored ones
+setIdNode(7)
+processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory())
+processor.deliberate({'accidents': [{'coordinates': [20, 40], 'risk': 'high'}], 'battery': 80})
+saved = processor.snapshot()
+setIdNode(7)  # Restart
+processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory())
+processor.restore(saved)
+savedIds = set(SequentialProcessor._snapshotIds(saved))
+newIds = {State("brf", "belief", time.time(), time.time(), {}).id for _ in range(50)}
+print("Fixed node - new ids repeat restored ids: " + str(len(savedIds & newIds) > 0))
+setIdNode()
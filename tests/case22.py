@@ -0,0 +1,57 @@
+from src.goal_processing.core import State, runSync
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+import sys
+import threading
+import time
+
+# Transactional history: states of a cycle are saved together, with a shared cycle id.
+
+history = InMemoryExecutionHistory()
+
+
+async def cycle(fail: bool = False) -> str:
+    async with history.transaction() as hist:
+        now = time.time()
+        await hist.addAsync(State("brf", "belief", now, now, {'value': 1}))
+        await hist.addAsync(State("promotion", "goal", now, now, {'incPriority': 1}))
+        print("Visible before the commit: " + str(len(await hist.getAsync({'cycleId': hist.cycleId}))))
+        if fail:
+            raise Exception("Cycle failed")
+    return hist.cycleId
+
+committed = runSync(cycle())
+states = history.get({'cycleId': committed})
+print("Committed states of the cycle: " + str(len(states)) + ", same cycle id: " + str(all(s.cycleId == committed for s in states)))
+try:
+    runSync(cycle(fail=True))
+except Exception as e:
+    print("Rolled back: " + str(e) + ". States in the history: " + str(len(history.states)))
+transaction = history.transaction(cycleId="manual")
+transaction.add(State("brf", "belief", time.time(), time.time(), {}))
+transaction.rollback()
+runSync(transaction.commitAsync())
+print("Commit after rollback saves nothing: " + str(len(history.get({'cycleId': "manual"})) == 0))
+
+# Concurrent commits (Ex: the deliberate and process timers of "runInLoop"), with batches older than committed states
+history = InMemoryExecutionHistory()
+start = time.time()
+runSync(history.addManyAsync([State("old", "a", start - 10 + i / 10000, start - 10 + i / 10000, {}) for i in range(20000)]))
+sys.setswitchinterval(1e-6)  # Frequent thread switches, as under load
+
+
+def commits(name: str) -> None:
+    for i in range(300):
+        t = time.time() - (0.001 if i % 2 == 0 else 0)
+        runSync(history.addManyAsync([State(name, "a", t, t, {}), State(name, "b", t, t, {})]))
+
+threads = [threading.Thread(target=commits, args=[name]) for name in ("deliberate", "process")]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+sys.setswitchinterval(0.005)
+print("States after concurrent commits: " + str(len(history.states) - 20000) + ", indexed: " + str(len(history._byId) - 20000) +
+      ", ordered: " + str(all(history.states[i].time >= history.states[i + 1].time for i in range(len(history.states) - 1))))
+aligned = all(history._fromTimes[fromId] == [s.time for s in history._fromStates[fromId]] for fromId in history._fromTimes)
+print("Indexes aligned: " + str(aligned))
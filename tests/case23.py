@@ -0,0 +1,77 @@
+from src.goal_processing.core import DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action, IntentionQueue
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+from src.goal_processing.hosts.agent_host import AgentHost
+
+import time
+
+# Bounded goal queue with the 'block' overflow policy: deliberations wait for the goal processing.
+
+performed = []
+
+
+async def brfReadTargets(getEnv, get, getChannel, set):
+    await set("targets", await getEnv("targets"))
+
+
+def goalPromotion(index):
+    async def promote(get, priority):
+        if (index in await get("targets")):
+            return priority + 1
+    return promote
+
+
+def goalAction(index):
+    async def act(getEnv, get):
+        performed.append(index)
+    return act
+
+
+def createAgent() -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[BeliefReviewFunction(f=brfReadTargets, desc="Review targets")],
+        goals=[Goal(desc="Visit target " + str(i), promotions=[GoalPromotion(f=goalPromotion(i), name="executive")],
+                    plans=[Plan(priority=0, actions=[Action(f=goalAction(i), desc="Visit target " + str(i))])]) for i in range(3)],
+        conflicts=[]
+    )
+
+
+def waitFor(condition, timeout=5):
+    start = time.time()
+    while not condition() and time.time() - start < timeout:
+        time.sleep(0.01)
+    return condition()
+
+
+enviroment = {'targets': [0, 1, 2]}
+
+# Without concurrent goal processing, waiting for free space would never end
+processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory(), IntentionQueue(maxSize=1, overflowPolicy="block"))
+try:
+    processor.deliberate(enviroment)
+except RuntimeError as e:
+    print("Synchronous deliberation with a full queue: " + str(e))
+
+# Event-driven: the deliberation wakes the goal processing before waiting
+performed.clear()
+processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory(), IntentionQueue(maxSize=1, overflowPolicy="block"))
+processor.runOnChange(enviroment)
+print("runOnChange - every goal performed: " + str(waitFor(lambda: len(performed) == 3)) + ", stats: " + str(processor.intentionsStats))
+processor.stopLoop()
+
+# Timer loop
+performed.clear()
+processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory(), IntentionQueue(maxSize=1, overflowPolicy="block"))
+processor.runInLoop(enviroment, 0.05)
+print("runInLoop - goals performed: " + str(waitFor(lambda: len(performed) >= 3)) + ", blocked: " + str(processor.intentionsStats['blocked'] > 0))
+processor.stopLoop()
+
+# AgentHost runs deliberations and goal processing in a single scheduler
+host = AgentHost(InMemoryExecutionHistory())
+try:
+    host.register(createAgent(), intentions=IntentionQueue(maxSize=1, overflowPolicy="block"))
+except ValueError as e:
+    print("AgentHost: " + str(e))
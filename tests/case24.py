@@ -0,0 +1,77 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, Conflict, Agent, GoalPromotion, Plan, Action
+from src.goal_processing.rules import Belief, Priority
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+# Compiled agents: plan selection by bisection, conflict matrix, and compile again after a change of the goals.
+
+performed = []
+
+
+async def brfReadEnviroment(getEnv, get, getChannel, set):
+    await set("risk", await getEnv("risk"))
+    await set("lowBattery", await getEnv("battery") < 30)
+    await set("blocked", await getEnv("blocked"))
+
+
+def action(desc):
+    async def act(getEnv, get):
+        performed.append(desc)
+    return Action(f=act, desc=desc)
+
+
+def plan(desc, priority, guard=None):
+    return Plan(desc=desc, priority=priority, actions=[action(desc)], guard=guard)
+
+
+rescue = Goal(desc="Rescue victim", promotions=[
+    GoalPromotion(name="executive", rule=Belief("risk") > 0, priorityRule=Priority + Belief("risk"))
+], plans=[plan("Call base", 0), plan("Rescue by air", 3, guard=~Belief("blocked")), plan("Rescue by land", 1), plan("Rescue by road", 3)])
+recharge = Goal(desc="Recharge battery", promotions=[
+    GoalPromotion(name="executive", rule=Belief("lowBattery"), priorityRule=Priority + 5)
+], plans=[plan("Recharge in base", 0)])
+agent = Agent(beliefs=DataContainer("beliefs"), channel=DataContainer("channel"),
+              brfs=[BeliefReviewFunction(f=brfReadEnviroment, desc="Read enviroment")],
+              goals=[rescue, recharge], conflicts=[Conflict(goals=[rescue, recharge], desc="Rescue or recharge")])
+executionPlan = agent.compile()
+print("Plans by minimum priority: " + str([[p.desc for p in plans] for plans in executionPlan.plans]) +
+      ", guards: " + str(executionPlan.hasGuards))
+for priority in (0, 1, 2, 3, 5):
+    rescue.priority = priority
+    print("Candidate plans for priority " + str(priority) + ": " + str([p.desc for p in executionPlan.candidatePlans(rescue)]))
+print("In conflict: " + str(executionPlan.inConflict(rescue.id, recharge.id)) +
+      ", instances of a goal in conflict: " + str(executionPlan.inConflict(rescue.id, rescue.id)))
+
+processor = SequentialProcessor(agent, InMemoryExecutionHistory())
+for enviroment in ({'risk': 2, 'battery': 80, 'blocked': False}, {'risk': 3, 'battery': 80, 'blocked': False},
+                   {'risk': 3, 'battery': 80, 'blocked': True}, {'risk': 3, 'battery': 20, 'blocked': False}):
+    performed.clear()
+    processor.deliberate(enviroment)
+    processor.processIntentions()
+    print(str(enviroment) + " -> " + str(performed))
+
+# A goal added after the compilation: the agent is compiled again when the goal is deliberated
+report = Goal(desc="Report risk", promotions=[GoalPromotion(name="executive", rule=Belief("risk") > 2)],
+              plans=[plan("Send report", 0)])
+report.agents.append(agent)
+agent.goals.append(report)
+agent.conflicts[0].goals.append(report)
+report.conflicts.append(agent.conflicts[0])
+performed.clear()
+processor.deliberate({'risk': 3, 'battery': 80, 'blocked': False})
+processor.processIntentions()
+print("Compiled again: " + str(processor.executionPlan is not executionPlan) + ", goals: " + str(len(processor.executionPlan.goalIndex)) +
+      ", new goal in conflict: " + str(processor.executionPlan.inConflict(report.id, rescue.id)) + " -> " + str(performed))
+
+# A change of the goals that are already compiled requires "agent.compile()"
+agent.conflicts[0].goals.remove(report)
+report.conflicts.remove(agent.conflicts[0])
+rescue.plans.append(plan("Rescue by boat", 4))
+agent.compile()
+performed.clear()
+processor.deliberate({'risk': 4, 'battery': 80, 'blocked': False})
+processor.processIntentions()
+print("After agent.compile(): " + str(performed))
+print("Entity indexes: " + str(all(Entity.byId[e.id] is e for e in processor.executionPlan.entities)) +
+      ", " + str(len(processor.executionPlan.entities)) + " entities")
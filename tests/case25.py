@@ -0,0 +1,56 @@
+from src.goal_processing.core import DataContainer, BeliefReviewFunction, Goal, Agent, GoalPromotion, Plan, Action, IntentionQueue
+from src.goal_processing.rules import Belief, Priority
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+# Goal instances merged by context: the beliefs read by their promotions ("Goal.context").
+
+rescued = []
+
+
+async def brfAnalyzeAccident(getEnv, get, getChannel, set):
+    accident = await getEnv("accident")
+    await set("accident.target", accident['target'])
+    await set("accident.victims", accident['victims'])
+
+
+async def goalPromotionToActive(get, priority):
+    if (await get("accident.target") is not None):
+        return priority + 1
+
+
+async def actionRescue(getEnv, get):
+    rescued.append(get("accident.target"))
+
+
+def createAgent() -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[BeliefReviewFunction(f=brfAnalyzeAccident, desc="Review accident")],
+        goals=[Goal(desc="Rescue victim", promotions=[
+            GoalPromotion(name="active", desc="Promote accidents", f=goalPromotionToActive),
+            GoalPromotion(name="executive", desc="Promote by victims",
+                          rule=Belief("accident.victims") > 0, priorityRule=Priority + Belief("accident.victims"))
+        ], plans=[Plan(priority=0, actions=[Action(f=actionRescue, desc="Rescue victim")])])],
+        conflicts=[]
+    )
+
+
+accidents = [{'target': "bridge", 'victims': 3}, {'target': "tunnel", 'victims': 2}, {'target': "bridge", 'victims': 1}]
+for mergePolicy, mergeKey, desc in (("newest", None, "newest, by goal"),
+                                    ("newest", lambda goal: (goal.id, goal.context['accident.target']), "newest, by goal and target"),
+                                    ("priority", lambda goal: (goal.id, goal.context['accident.target']), "priority, by goal and target")):
+    processor = SequentialProcessor(createAgent(), InMemoryExecutionHistory(), IntentionQueue(mergePolicy=mergePolicy, mergeKey=mergeKey))
+    for accident in accidents:
+        processor.deliberate({'accident': accident})
+    print(desc + " - queue: " + str([(goal.context['accident.target'], goal.priority) for goal in processor._intentions]) +
+          ", stats: " + str(processor.intentionsStats))
+    if mergeKey is not None:
+        rescued.clear()
+        processor.processIntentions()
+        print("    goals processed: " + str(len(rescued)) + ", queue empty: " + str(len(processor._intentions) == 0))
+
+processor.deliberate({'accident': accidents[1]})
+print("Context saved in snapshots: " + str(processor.snapshot()['intentions'][0]['context']))
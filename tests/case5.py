@@ -120,3 +120,14 @@ for s in [lastStates[1]]:
 for st in explainer.xHistory(lastStates[1]):
     s = st[0]
     print(str(st[1]) + ": "+printState(s))
+
+# Causes recorded when the states were written ("parentIds") vs. searched in the history
+searchExplainer = SequentialExplainer(
+    processsor.executionHistory, useProvenance=False)
+print("Same explanation with and without provenance: " + str(
+    [st[0].id for st in explainer.xHistory(lastStates[0])] == [st[0].id for st in searchExplainer.xHistory(lastStates[0])]))
+
+# Batch explanation: shared causes are explained once
+batch = dict(explainer.explainMany(lastStates))
+print("Same explanations in batch: " + str(all(
+    [st[0].id for st in batch[i]] == [st[0].id for st in explainer.xHistory(lastStates[i])] for i in range(len(lastStates)))))
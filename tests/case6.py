@@ -0,0 +1,89 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+import time
+
+# Event-driven deliberation: updates are pushed as they arrive, bursts are coalesced.
+
+deliberations = []
+rescues = []
+
+# Belief revision functions
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    deliberations.append(await getEnv("battery"))
+    if (await getEnv("battery") < 30):
+        await set("resources.battery", "low")
+    else:
+        await set("resources.battery", "high")
+
+# Goal "Recharge"
+# "Recharge" goal promotions
+
+
+async def goalRechargeBatteryToExecutive(get, priority):
+    if (await get("resources.battery") == "low"):
+        return priority+1
+
+# "Recharge" plan1 actions
+
+
+async def actionRechargeBattery(getEnv, get):
+    rescues.append(time.time())
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[
+        BeliefReviewFunction(f=brfAnalyzeBattery, desc="Review battery level")
+    ],
+    goals=[
+        Goal(
+            desc="Recharge battery",
+            promotions=[
+                GoalPromotion(f=goalRechargeBatteryToExecutive, desc="Promote recharge battery",
+                              name="executive")
+            ],
+            plans=[
+                Plan(
+                    desc="Recharge battery in base",
+                    priority=0,
+                    actions=[
+                        Action(f=actionRechargeBattery,
+                               desc="Recharge battery in base")
+                    ]
+                )
+            ]
+        )
+    ],
+    conflicts=[]
+)
+
+processsor = SequentialProcessor(
+    agent=agent,
+    executionHistory=InMemoryExecutionHistory()
+)
+
+processsor.runOnChange({'battery': 80})
+time.sleep(0.2)
+print("Idle deliberations: " + str(deliberations))
+# A burst of updates is coalesced into one deliberation
+for level in [60, 50, 40, 20]:
+    processsor.push({'battery': level})
+time.sleep(0.2)
+processsor.stopLoop()
+print("Deliberations: " + str(deliberations))
+print("Coalesced updates: " + str(processsor.coalescedUpdates))
+print("Recharges: " + str(len(rescues)))
+
+# Updates pushed before the loop starts are newer than its initial data
+deliberations.clear()
+processsor = SequentialProcessor(agent=agent, executionHistory=InMemoryExecutionHistory())
+processsor.push({'battery': 15})
+processsor.runOnChange({'battery': 80})
+time.sleep(0.2)
+processsor.stopLoop()
+print("Deliberations with an update pushed before the loop: " + str(deliberations))
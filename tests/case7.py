@@ -0,0 +1,97 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action, IntentionQueue
+
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+import time
+
+# Bounded goal queue: deliberation is faster than goal processing.
+
+# Belief revision functions
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.battery", "low" if await getEnv("battery") < 30 else "high")
+
+# Goal "Recharge"
+# "Recharge" goal promotions
+
+
+async def goalRechargeBatteryToExecutive(get, priority):
+    if (await get("resources.battery") == "low"):
+        return priority+1
+
+# Goal "Patrol"
+# "Patrol" goal promotions
+
+
+async def goalPatrolToExecutive(get, priority):
+    return priority
+
+# plan actions
+
+
+async def actionRechargeBattery(getEnv, get):
+    pass
+
+
+async def actionPatrol(getEnv, get):
+    pass
+
+recharge = Goal(
+    desc="Recharge battery",
+    promotions=[
+        GoalPromotion(f=goalRechargeBatteryToExecutive, desc="Promote recharge battery",
+                      name="executive")
+    ],
+    plans=[
+        Plan(desc="Recharge battery in base", priority=0, actions=[
+             Action(f=actionRechargeBattery, desc="Recharge battery in base")])
+    ]
+)
+patrol = Goal(
+    desc="Patrol",
+    promotions=[
+        GoalPromotion(f=goalPatrolToExecutive, desc="Always patrol",
+                      name="executive")
+    ],
+    plans=[
+        Plan(desc="Patrol area", priority=0, actions=[
+             Action(f=actionPatrol, desc="Patrol area")])
+    ]
+)
+
+agent = Agent(
+    beliefs=DataContainer("beliefs"),
+    channel=DataContainer("channel"),
+    brfs=[
+        BeliefReviewFunction(f=brfAnalyzeBattery, desc="Review battery level")
+    ],
+    goals=[recharge, patrol],
+    conflicts=[]
+)
+
+# Keeps only the highest priority instance of each goal
+processsor = SequentialProcessor(
+    agent=agent,
+    executionHistory=InMemoryExecutionHistory(),
+    intentions=IntentionQueue(maxSize=10, mergePolicy="priority")
+)
+for i in range(100):
+    processsor.deliberate({'battery': 25})
+print("Merge by goal: " + str(processsor.intentionsStats))
+processsor.processIntentions()
+
+# Without merging, the lowest priority goals are shed when the queue is full
+processsor = SequentialProcessor(
+    agent=agent,
+    executionHistory=InMemoryExecutionHistory(),
+    intentions=IntentionQueue(maxSize=10, overflowPolicy="shed")
+)
+for i in range(100):
+    processsor.deliberate({'battery': 25})
+print("Shed: " + str(processsor.intentionsStats))
+print("Queued: " + str([g.desc for g in processsor._intentions]))
+rejected = processsor.executionHistory.get(
+    {'limit': 1, 'fromIds': {patrol.id}, 'toIds': {""}})
+print("Last rejected: " + str(rejected[0]))
@@ -0,0 +1,71 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.hosts.agent_host import AgentHost
+from src.goal_processing.execution_history.in_memory_execution_history import InMemoryExecutionHistory
+
+import time
+
+# Many agents driven by a single scheduler, sharing the execution history.
+
+recharges = []
+
+# Belief revision functions
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.battery", "low" if await getEnv("battery") < 30 else "high")
+
+# Goal "Recharge"
+# "Recharge" goal promotions
+
+
+async def goalRechargeBatteryToExecutive(get, priority):
+    if (await get("resources.battery") == "low"):
+        return priority+1
+
+# "Recharge" plan1 actions
+
+
+async def actionRechargeBattery(getEnv, get):
+    recharges.append(time.time())
+
+
+def createAgent(desc: str) -> Agent:
+    return Agent(
+        desc=desc,
+        beliefs=DataContainer("beliefs"),
+        channel=DataContainer("channel"),
+        brfs=[
+            BeliefReviewFunction(f=brfAnalyzeBattery,
+                                 desc="Review battery level")
+        ],
+        goals=[
+            Goal(
+                desc="Recharge battery",
+                promotions=[
+                    GoalPromotion(f=goalRechargeBatteryToExecutive, desc="Promote recharge battery",
+                                  name="executive")
+                ],
+                plans=[
+                    Plan(desc="Recharge battery in base", priority=0, actions=[
+                        Action(f=actionRechargeBattery, desc="Recharge battery in base")])
+                ]
+            )
+        ],
+        conflicts=[]
+    )
+
+
+host = AgentHost(InMemoryExecutionHistory(), scheduling="weighted")
+agents = [createAgent("Robot " + str(i)) for i in range(200)]
+for i, agent in enumerate(agents):
+    host.register(agent, {'battery': 80}, weight=1 + i % 3)
+host.run()
+time.sleep(0.5)
+for agent in agents:
+    host.push(agent.id, {'battery': 20})
+time.sleep(1)
+host.stop()
+print("Recharges: " + str(len(recharges)))
+print("Stats of first agent: " + str(host.stats(agents[0].id)))
+print("History size: " + str(len(host.executionHistory.states)))
@@ -0,0 +1,99 @@
+from src.goal_processing.core import Entity, DataContainer, BeliefReviewFunction, Goal, State, Conflict, Agent, GoalPromotion, Plan, Action
+
+from src.goal_processing.hosts.sharded_runtime import ShardedRuntime
+from src.goal_processing.processors.sequential_processor import SequentialProcessor
+
+import time
+import asyncio
+
+# Agents partitioned across worker processes, communicating through the shared channel.
+
+# Belief revision functions
+
+
+async def brfAnalyzeBattery(getEnv, get, getChannel, set):
+    await set("resources.battery", "low" if await getEnv("battery") < 30 else "high")
+
+
+async def brfReadBase(getEnv, get, getChannel, set):
+    await set("base", await getChannel("base"))
+
+# Goal "Recharge"
+# "Recharge" goal promotions
+
+
+async def goalRechargeBatteryToExecutive(get, priority):
+    if (await get("resources.battery") == "low" and await get("base.free")):
+        return priority+1
+
+# "Recharge" plan1 actions
+
+
+async def actionRechargeBattery(getEnv, get):
+    pass
+
+
+def createAgent(channel: DataContainer) -> Agent:
+    return Agent(
+        beliefs=DataContainer("beliefs"),
+        channel=channel,
+        brfs=[
+            BeliefReviewFunction(f=brfAnalyzeBattery,
+                                 desc="Review battery level"),
+            BeliefReviewFunction(f=brfReadBase,
+                                 desc="Review base availability")
+        ],
+        goals=[
+            Goal(
+                desc="Recharge battery",
+                promotions=[
+                    GoalPromotion(f=goalRechargeBatteryToExecutive, desc="Promote recharge battery",
+                                  name="executive")
+                ],
+                plans=[
+                    Plan(desc="Recharge battery in base", priority=0, actions=[
+                        Action(f=actionRechargeBattery, desc="Recharge battery in base")])
+                ]
+            )
+        ],
+        conflicts=[]
+    )
+
+
+if __name__ == "__main__":
+    runtime = ShardedRuntime(shards=2)
+    runtime.channel.set("base.free", True)
+    keys = ["robot-" + str(i) for i in range(20)]
+    for key in keys:
+        runtime.register(key, createAgent)
+    print("Shards: " + str([runtime.shardOf(key) for key in keys]))
+    for key in keys:
+        runtime.push(key, {'battery': 20})
+    time.sleep(1)
+    history = runtime.history()
+    actions = [s for s in history.get({}) if isinstance(
+        s.value, dict) and 'priority' in s.value]
+    print("Plans selected in all shards: " + str(len(actions)))
+    shardStates = asyncio.run(runtime.getShardHistoryAsync(
+        runtime.shardOf(keys[0]), {}))
+    plans = [s for s in shardStates if isinstance(
+        s.value, dict) and 'priority' in s.value]
+    for st in runtime.xHistory(keys[0], plans[0]):
+        print(str(st[1]) + ": " + str(st[0].value))
+    print("Stats: " + str(runtime.stats(keys[0])['deliberate']['count']))
+    try:
+        runtime.push("unknown", {'battery': 20})
+    except KeyError as e:
+        print("Push to an unknown agent: " + str(e))
+    runtime._send(runtime.shardOf(keys[0]), ("push", "unknown", {}))  # Fails in the shard, without an answer
+    stats = runtime.stats(keys[0])
+    print("Requests after a failed push: " + str(stats['deliberate']['count'] > 0) + ", push errors: " + str(stats['shardPushErrors']))
+    try:
+        history.add(State("brf", "belief", time.time(), time.time(), {}))
+    except TypeError as e:
+        print("Save in the merged history: " + str(e))
+    try:
+        SequentialProcessor(createAgent(DataContainer("channel")), history)
+    except TypeError as e:
+        print("Processor with the merged history: " + str(e))
+    runtime.stop()